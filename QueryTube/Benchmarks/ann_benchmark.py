@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+# The API's backends live next to app.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Task_7_Semantic_Search_API_Flask"))
+
+# --- Configuration ---
+INPUT_PATH = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Embedding\Embedded_Merged_Dataset.parquet"
+EMBEDDING_COLUMN = 'embedding_vector'
+CHROMA_DB_PATH = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Storing_in_ChromaDB\ChromaDB_Collection_Updated"
+COLLECTION_NAME = "youtube_analysis_collection"
+FAISS_INDEX_DIR = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Storing_in_FAISS\FAISS_IVFPQ_Index"
+
+# Fixed query set: one natural-language query per line. Encoded once and cached next to it.
+# Without the file, a fixed-seed sample of perturbed corpus vectors is used instead.
+QUERY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_queries.txt")
+QUERY_VECTORS_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_queries.npy")
+N_SAMPLED_QUERIES = 500
+
+BACKENDS = ['numpy_exact', 'chroma', 'faiss']
+TOP_K = 10
+THREAD_COUNTS = [1, 8]
+WARMUP_QUERIES = 20
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ann_benchmark_results.json")
+
+def unique_ids(ids):
+    """Reproduces the duplicate-id suffixing done by store_in_chroma, so ids line up with the index."""
+    ids = pd.Series(ids, dtype=str)
+    if ids.duplicated().any():
+        return (ids.groupby(ids).cumcount().astype(str) + '_' + ids).tolist()
+    return ids.tolist()
+
+def load_corpus():
+    print("--- 1. LOADING EMBEDDED DATA ---")
+    df = pd.read_parquet(INPUT_PATH, columns=['id', EMBEDDING_COLUMN])
+    vectors = np.vstack(df[EMBEDDING_COLUMN].to_numpy()).astype(np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    print(f"-> {len(vectors)} vectors, {vectors.shape[1]} dims from: {INPUT_PATH}")
+    return unique_ids(df['id']), vectors
+
+def load_queries(vectors):
+    """Loads the fixed query set as unit vectors."""
+    if os.path.exists(QUERY_FILE):
+        if os.path.exists(QUERY_VECTORS_CACHE) and os.path.getmtime(QUERY_VECTORS_CACHE) >= os.path.getmtime(QUERY_FILE):
+            queries = np.load(QUERY_VECTORS_CACHE)
+        else:
+            from chromadb.utils import embedding_functions
+            with open(QUERY_FILE, encoding='utf-8') as f:
+                texts = [line.strip() for line in f if line.strip()]
+            print(f"-> Encoding {len(texts)} queries from: {QUERY_FILE}")
+            encoder = embedding_functions.DefaultEmbeddingFunction()
+            queries = np.asarray(encoder(texts), dtype=np.float32)
+            np.save(QUERY_VECTORS_CACHE, queries)
+        if queries.shape[1] != vectors.shape[1]:
+            print(f"FATAL ERROR: query vectors have {queries.shape[1]} dims, corpus has {vectors.shape[1]}.")
+            return None
+    else:
+        rng = np.random.default_rng(42)
+        rows = rng.choice(len(vectors), size=min(N_SAMPLED_QUERIES, len(vectors)), replace=False)
+        queries = vectors[rows] + rng.normal(scale=0.05, size=(len(rows), vectors.shape[1])).astype(np.float32)
+        print(f"-> No query file found; using {len(queries)} perturbed corpus vectors (seed 42)")
+    return queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+def exact_ground_truth(queries, vectors, k):
+    """Exact top-k row positions by cosine similarity, in batches to bound memory."""
+    truth = []
+    for start in range(0, len(queries), 256):
+        scores = queries[start:start + 256] @ vectors.T
+        truth.extend(set(row) for row in np.argpartition(-scores, k - 1, axis=1)[:, :k])
+    return truth
+
+# --- Backends: each returns a function mapping (query vector, k) -> list of result ids ---
+
+def make_numpy_exact(ids, vectors):
+    def search(query, k):
+        scores = vectors @ query
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [ids[i] for i in top]
+    return search
+
+def make_chroma(ids, vectors):
+    from chromadb import PersistentClient
+    if not os.path.exists(CHROMA_DB_PATH):
+        raise FileNotFoundError(f"ChromaDB collection not found at {CHROMA_DB_PATH}")
+    collection = PersistentClient(path=CHROMA_DB_PATH).get_collection(name=COLLECTION_NAME)
+    def search(query, k):
+        return collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])['ids'][0]
+    return search
+
+def make_faiss(ids, vectors):
+    from vector_backends import FaissIVFPQBackend
+    backend = FaissIVFPQBackend(FAISS_INDEX_DIR)
+    def search(query, k):
+        return backend.query([query], n_results=k, include=[])['ids'][0]
+    return search
+
+BACKEND_FACTORIES = {
+    'numpy_exact': make_numpy_exact,
+    'chroma': make_chroma,
+    'faiss': make_faiss
+}
+
+def run_backend(search, queries, truth_ids, k, threads):
+    """Runs every query once on a pool of `threads` workers; returns recall, QPS and latency percentiles."""
+    for query in queries[:WARMUP_QUERIES]:
+        search(query, k)
+
+    def timed(index):
+        start_time = time.perf_counter()
+        found = search(queries[index], k)
+        return index, found, time.perf_counter() - start_time
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        outcomes = list(pool.map(timed, range(len(queries))))
+    wall_seconds = time.perf_counter() - wall_start
+
+    latencies_ms = np.array([latency for _, _, latency in outcomes]) * 1000
+    hits = sum(len(set(found) & truth_ids[index]) for index, found, _ in outcomes)
+    return {
+        f'recall@{k}': round(hits / (k * len(queries)), 4),
+        'qps': round(len(queries) / wall_seconds, 1),
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies_ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 3)
+    }
+
+def main():
+    print("\n--- ANN RECALL & LATENCY BENCHMARK ---")
+    try:
+        ids, vectors = load_corpus()
+    except Exception as e:
+        print(f"FATAL ERROR: Could not load data. {e}")
+        return
+    queries = load_queries(vectors)
+    if queries is None:
+        return
+
+    k = min(TOP_K, len(vectors))
+    print(f"\n--- 2. EXACT GROUND TRUTH (k={k}, {len(queries)} queries) ---")
+    truth_ids = [{ids[i] for i in row} for row in exact_ground_truth(queries, vectors, k)]
+
+    print("\n--- 3. RUNNING BACKENDS ---")
+    report = {
+        'corpus_size': len(vectors),
+        'dimensions': int(vectors.shape[1]),
+        'queries': len(queries),
+        'k': k,
+        'results': []
+    }
+    for name in BACKENDS:
+        try:
+            search = BACKEND_FACTORIES[name](ids, vectors)
+        except Exception as e:
+            # Optional backends (no index built, faiss not installed) are skipped, not fatal
+            print(f"-> Skipping '{name}': {e}")
+            continue
+        for threads in THREAD_COUNTS:
+            row = {'backend': name, 'threads': threads}
+            row.update(run_backend(search, queries, truth_ids, k, threads))
+            print(f"-> {name} @ {threads} thread(s): recall@{k}={row[f'recall@{k}']}, qps={row['qps']}")
+            report['results'].append(row)
+
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n--- SUMMARY ---")
+    if report['results']:
+        print(pd.DataFrame(report['results']).to_string(index=False))
+    print(f"\n-> Machine-readable results saved to: {RESULTS_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.abspath(os.path.join(BENCHMARKS_DIR, "..", "Task_7_Semantic_Search_API_Flask"))
+
+# --- Configuration ---
+# Budget from process spawn until create_app() has returned (index, metadata and encoder loaded)
+COLD_START_BUDGET_SECONDS = 8.0
+N_RUNS = 3
+# With USE_SYNTHETIC_COLLECTION the API is started against the synthetic collection from
+# load_test.py; otherwise against whatever the QUERYTUBE_* environment variables point at.
+USE_SYNTHETIC_COLLECTION = True
+IMPORTTIME_TOP = 15
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, "cold_start_results.json")
+
+# Child process: times the import of app.py and create_app(), then reports them on one line
+CHILD_SCRIPT = """
+import time, json
+ready_import = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+print('COLD_START ' + json.dumps({
+    'ready_at': time.time(),
+    'import_app_ms': (imported - ready_import) * 1000,
+    'create_app_ms': (time.perf_counter() - imported) * 1000,
+    'stages': application.config['STARTUP_TIMINGS']
+}), flush=True)
+"""
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def run_child(env, importtime=False):
+    """Starts a fresh interpreter running CHILD_SCRIPT; returns (report, importtime stderr)."""
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', CHILD_SCRIPT]
+    spawned_at = time.time()
+    result = subprocess.run(command, cwd=APP_DIR, env=env, capture_output=True, text=True, timeout=600)
+    line = next((line for line in result.stdout.splitlines() if line.startswith('COLD_START ')), None)
+    if line is None:
+        raise RuntimeError(f"app did not start:\n{result.stdout[-2000:]}\n{result.stderr[-2000:]}")
+    report = json.loads(line[len('COLD_START '):])
+    report['spawn_to_ready_ms'] = (report.pop('ready_at') - spawned_at) * 1000
+    return report, result.stderr
+
+def importtime_breakdown(stderr, top=IMPORTTIME_TOP):
+    """Cumulative import time of each top-level import (lazy imports made during create_app included)."""
+    totals = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # One leading space marks an import made directly by the script, not by another module
+        if match and len(match.group(3)) == 1:
+            package = match.group(4).split('.')[0]
+            totals[package] = totals.get(package, 0) + int(match.group(2))
+    rows = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return [{'module': module, 'cumulative_ms': round(us / 1000, 1)} for module, us in rows[:top]]
+
+def main():
+    print("\n--- API COLD START ---")
+    env = dict(os.environ)
+    workdir = None
+    try:
+        if USE_SYNTHETIC_COLLECTION:
+            sys.path.insert(0, BENCHMARKS_DIR)
+            import load_test
+            workdir = tempfile.mkdtemp(prefix="querytube_coldstart_")
+            chroma_path = os.path.join(workdir, "chroma")
+            load_test.build_synthetic_collection(chroma_path)
+            env.update(QUERYTUBE_CHROMA_DB_PATH=chroma_path,
+                       QUERYTUBE_COLLECTION_NAME=load_test.SYNTHETIC_COLLECTION_NAME,
+                       QUERYTUBE_SEARCH_BACKEND='chroma')
+
+        print(f"-> Import-time breakdown (python -X importtime)")
+        _, stderr = run_child(env, importtime=True)
+        imports = importtime_breakdown(stderr)
+        for row in imports:
+            print(f"   {row['module']:<28} {row['cumulative_ms']:>9.1f} ms")
+
+        runs = []
+        for run in range(N_RUNS):
+            report, _ = run_child(env)
+            runs.append(report)
+            print(f"-> Run {run + 1}: spawn->ready {report['spawn_to_ready_ms'] / 1000:.2f}s "
+                  f"(import app {report['import_app_ms']:.0f} ms, create_app {report['create_app_ms']:.0f} ms)")
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    median_seconds = float(np.median([run['spawn_to_ready_ms'] for run in runs])) / 1000
+    stage_names = sorted({name for run in runs for name in run['stages']})
+    stages = {name: round(float(np.median([run['stages'].get(name, 0) for run in runs])), 1) for name in stage_names}
+    within_budget = median_seconds <= COLD_START_BUDGET_SECONDS
+
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump({'budget_seconds': COLD_START_BUDGET_SECONDS, 'median_seconds': median_seconds,
+                   'within_budget': within_budget, 'stages_ms': stages, 'imports': imports, 'runs': runs}, f, indent=2)
+
+    print("\n--- SUMMARY ---")
+    print("Startup stages (median ms): " + ", ".join(f"{name}={value}" for name, value in stages.items()))
+    print(f"Median spawn->ready: {median_seconds:.2f}s (budget {COLD_START_BUDGET_SECONDS:.2f}s) "
+          f"{'OK' if within_budget else 'OVER BUDGET'}")
+    print(f"-> Results saved to: {RESULTS_PATH}")
+    if not within_budget:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
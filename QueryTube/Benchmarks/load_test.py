@@ -0,0 +1,247 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import tempfile
+import threading
+import subprocess
+import urllib.request
+import urllib.error
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(BENCHMARKS_DIR, "..", "Task_7_Semantic_Search_API_Flask", "app.py")
+
+# --- Configuration ---
+# Target API. With START_LOCAL_APP, app.py is started on API_PORT against a synthetic collection.
+START_LOCAL_APP = True
+API_PORT = 5055
+BASE_URL = f"http://127.0.0.1:{API_PORT}"
+STARTUP_TIMEOUT_SECONDS = 180
+
+# Synthetic Chroma collection (random unit vectors with realistic-looking metadata)
+SYNTHETIC_DOCUMENTS = 2000
+SYNTHETIC_DIMENSIONS = 384
+SYNTHETIC_COLLECTION_NAME = "youtube_analysis_collection"
+
+# Query mix: one query per line; repeat a line to make it more frequent
+QUERY_FILE = os.path.join(BENCHMARKS_DIR, "benchmark_queries.txt")
+SEARCH_FRACTION = 0.8          # remaining requests go to /initial-videos
+PAGE_SIZE = 12                 # same page size as the frontend
+MAX_PAGE = 5                   # offsets are drawn from the first MAX_PAGE pages
+
+# Load shape
+# 'closed': CONCURRENCY workers each send the next request as soon as the previous one returns
+# 'rps':    requests are scheduled at a fixed TARGET_RPS regardless of how fast the server answers
+MODE = 'closed'
+CONCURRENCY = 8
+TARGET_RPS = 50
+DURATION_SECONDS = 30
+WARMUP_SECONDS = 5
+REQUEST_TIMEOUT_SECONDS = 10
+
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, "load_test_results.json")
+
+def build_synthetic_collection(path):
+    """Creates a small Chroma collection shaped like the one written by ChromaDB_updated.py."""
+    from chromadb import PersistentClient
+    print(f"-> Building synthetic collection ({SYNTHETIC_DOCUMENTS} docs) in: {path}")
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(SYNTHETIC_DOCUMENTS, SYNTHETIC_DIMENSIONS)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    client = PersistentClient(path=path)
+    collection = client.create_collection(name=SYNTHETIC_COLLECTION_NAME, metadata={"hnsw:space": "cosine"})
+    channels = [f"Synthetic Channel {i}" for i in range(20)]
+    for start in range(0, SYNTHETIC_DOCUMENTS, 500):
+        rows = range(start, min(start + 500, SYNTHETIC_DOCUMENTS))
+        ids = [f"syn{i:08d}" for i in rows]
+        metadatas = []
+        for i, video_id in zip(rows, ids):
+            duration = int(rng.integers(15, 3600))
+            metadatas.append({
+                'id': video_id,
+                'original_id': video_id,
+                'title': f"Synthetic video {i}",
+                'description': "Synthetic description " * 20,
+                'publishedAt': f"20{int(rng.integers(15, 26))}-0{int(rng.integers(1, 10))}-1{int(rng.integers(0, 10))}T12:00:00Z",
+                'channel_title': channels[i % len(channels)],
+                'channel_id': f"UC{i % len(channels):022d}",
+                'viewCount': str(int(rng.integers(0, 10_000_000))),
+                'likeCount': str(int(rng.integers(0, 100_000))),
+                'commentCount': str(int(rng.integers(0, 10_000))),
+                'duration': str(duration),
+                'is_short': str(duration < 120)
+            })
+        documents = ["synthetic transcript text " * 200 for _ in ids]
+        collection.add(ids=ids, embeddings=vectors[start:start + len(ids)], metadatas=metadatas, documents=documents)
+
+def start_local_app(chroma_path):
+    """Starts app.py as a subprocess against the synthetic collection and waits until it answers."""
+    env = dict(os.environ,
+               QUERYTUBE_CHROMA_DB_PATH=chroma_path,
+               QUERYTUBE_COLLECTION_NAME=SYNTHETIC_COLLECTION_NAME,
+               QUERYTUBE_SEARCH_BACKEND='chroma',
+               QUERYTUBE_PORT=str(API_PORT))
+    process = subprocess.Popen([sys.executable, os.path.abspath(APP_PATH)], env=env,
+                               cwd=os.path.dirname(os.path.abspath(APP_PATH)))
+    deadline = time.time() + STARTUP_TIMEOUT_SECONDS
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"app.py exited during startup with code {process.returncode}")
+        try:
+            urllib.request.urlopen(f"{BASE_URL}/initial-videos?limit=1", timeout=2).read()
+            # The query encoder loads lazily on the first search; do not count that in the run
+            send_request(('search', random.choice(load_query_mix())))
+            print(f"-> app.py is up at {BASE_URL}")
+            return process
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"app.py did not answer within {STARTUP_TIMEOUT_SECONDS}s")
+
+def load_query_mix():
+    with open(QUERY_FILE, encoding='utf-8') as f:
+        return [line.strip() for line in f if len(line.strip()) >= 3]
+
+def next_request(queries, rng):
+    """Draws the next (endpoint, payload) pair from the configured mix."""
+    if rng.random() < SEARCH_FRACTION:
+        return ('search', rng.choice(queries))
+    return ('initial-videos', rng.randrange(MAX_PAGE) * PAGE_SIZE)
+
+def send_request(job):
+    """Sends one request; returns (endpoint, ok, latency_seconds)."""
+    endpoint, payload = job
+    if endpoint == 'search':
+        body = json.dumps({'query': payload, 'offset': 0, 'limit': PAGE_SIZE}).encode('utf-8')
+        req = urllib.request.Request(f"{BASE_URL}/search", data=body, headers={'Content-Type': 'application/json'})
+    else:
+        req = urllib.request.Request(f"{BASE_URL}/initial-videos?offset={payload}&limit={PAGE_SIZE}")
+    start_time = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT_SECONDS) as response:
+            response.read()
+            ok = response.status < 400
+    except (urllib.error.URLError, ConnectionError, OSError):
+        ok = False
+    return endpoint, ok, time.perf_counter() - start_time
+
+def run_closed_loop(queries, duration):
+    """CONCURRENCY workers, each issuing back-to-back requests until the deadline."""
+    samples = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = []
+        while time.perf_counter() < stop_at:
+            local.append(send_request(next_request(queries, rng)))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(CONCURRENCY)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+def run_fixed_rps(queries, duration):
+    """Open loop: dispatches TARGET_RPS requests per second and measures from the scheduled send time."""
+    rng = random.Random(0)
+    interval = 1.0 / TARGET_RPS
+    start = time.perf_counter()
+    futures = []
+
+    def scheduled(job, scheduled_at):
+        endpoint, ok, _ = send_request(job)
+        # Latency includes any time spent queued behind a slow server (no coordinated omission)
+        return endpoint, ok, time.perf_counter() - scheduled_at
+
+    with ThreadPoolExecutor(max_workers=max(CONCURRENCY, int(TARGET_RPS * REQUEST_TIMEOUT_SECONDS))) as pool:
+        n = 0
+        while True:
+            scheduled_at = start + n * interval
+            if scheduled_at - start >= duration:
+                break
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(scheduled, next_request(queries, rng), scheduled_at))
+            n += 1
+    return [future.result() for future in futures]
+
+def summarize(samples, wall_seconds):
+    """Throughput, error rate and latency percentiles, overall and per endpoint."""
+    def stats(rows):
+        latencies_ms = np.array([latency for _, _, latency in rows]) * 1000
+        errors = sum(1 for _, ok, _ in rows if not ok)
+        return {
+            'requests': len(rows),
+            'throughput_rps': round(len(rows) / wall_seconds, 1),
+            'error_rate': round(errors / len(rows), 4),
+            'p50_ms': round(float(np.percentile(latencies_ms, 50)), 1),
+            'p90_ms': round(float(np.percentile(latencies_ms, 90)), 1),
+            'p99_ms': round(float(np.percentile(latencies_ms, 99)), 1),
+            'max_ms': round(float(latencies_ms.max()), 1)
+        }
+
+    summary = {'overall': stats(samples)} if samples else {}
+    for endpoint in sorted({endpoint for endpoint, _, _ in samples}):
+        summary[endpoint] = stats([row for row in samples if row[0] == endpoint])
+    return summary
+
+def main():
+    print("\n--- QUERYTUBE API LOAD TEST ---")
+    queries = load_query_mix()
+    print(f"-> {len(queries)} queries loaded from: {QUERY_FILE}")
+
+    workdir = None
+    process = None
+    try:
+        if START_LOCAL_APP:
+            workdir = tempfile.mkdtemp(prefix="querytube_loadtest_")
+            chroma_path = os.path.join(workdir, "chroma")
+            build_synthetic_collection(chroma_path)
+            process = start_local_app(chroma_path)
+
+        runner = run_closed_loop if MODE == 'closed' else run_fixed_rps
+        shape = f"concurrency={CONCURRENCY}" if MODE == 'closed' else f"target_rps={TARGET_RPS}"
+        print(f"-> Warmup {WARMUP_SECONDS}s, then {DURATION_SECONDS}s in '{MODE}' mode ({shape})")
+        runner(queries, WARMUP_SECONDS)
+
+        wall_start = time.perf_counter()
+        samples = runner(queries, DURATION_SECONDS)
+        wall_seconds = time.perf_counter() - wall_start
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'base_url': BASE_URL,
+        'mode': MODE,
+        'concurrency': CONCURRENCY if MODE == 'closed' else None,
+        'target_rps': TARGET_RPS if MODE == 'rps' else None,
+        'duration_seconds': DURATION_SECONDS,
+        'results': summarize(samples, wall_seconds)
+    }
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n--- SUMMARY ---")
+    for name, row in report['results'].items():
+        print(f"{name:>16}: {row['requests']} req, {row['throughput_rps']} req/s, "
+              f"errors {row['error_rate']:.2%}, p50 {row['p50_ms']} ms, p90 {row['p90_ms']} ms, "
+              f"p99 {row['p99_ms']} ms, max {row['max_ms']} ms")
+    print(f"\n-> Machine-readable results saved to: {RESULTS_PATH}")
+
+if __name__ == "__main__":
+    main()
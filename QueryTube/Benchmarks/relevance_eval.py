@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import math
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "Task_7_Semantic_Search_API_Flask"))
+
+# --- Configuration ---
+# Judged queries, one JSON object per line: {"query": "...", "relevant": {"<video_id>": grade, ...}}
+# Grades are graded relevance (2 = the video being looked for, 1 = also relevant).
+JUDGMENTS_PATH = os.path.join(BENCHMARKS_DIR, "relevance_judgments.jsonl")
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, "relevance_baseline.json")
+
+# Engine configurations to evaluate. 'engine_kwargs' go to VideoSearchEngine(...);
+# 'settings' temporarily override module-level constants in app.py (e.g. FAISS_NPROBE, HNSW_SEARCH_EF).
+# Every engine is built with the semantic query cache off (EVAL_SETTINGS), so each query is ranked by
+# the index itself rather than by an earlier, similar query's cached ranking.
+ENGINE_CONFIGS = [
+    {'name': 'chroma', 'engine_kwargs': {'backend': 'chroma'}, 'settings': {}},
+    {'name': 'faiss', 'engine_kwargs': {'backend': 'faiss'}, 'settings': {}}
+]
+
+EVAL_SETTINGS = {'QUERY_CACHE_SIZE': 0}
+
+# Set to True (or run with --write-baseline) to (re)write the baseline from this run instead of
+# gating against it. Without it, a config with no baseline fails the gate, so a CI job pointed at a
+# wrong BASELINE_PATH cannot pass silently.
+UPDATE_BASELINE = False
+
+# Baseline entry each config is gated against: None compares every config with its own previous
+# run; a config name (e.g. 'chroma') gates every config against that reference's baseline instead.
+COMPARE_AGAINST = None
+
+# Maximum allowed absolute drop of each mean metric versus the baseline
+MAX_METRIC_DROP = {'ndcg@10': 0.02, 'mrr': 0.02, 'recall@50': 0.02}
+RETRIEVE_K = 50
+WORST_QUERIES_SHOWN = 5
+
+def load_judgments(path=JUDGMENTS_PATH):
+    with open(path, encoding='utf-8') as f:
+        judgments = [json.loads(line) for line in f if line.strip()]
+    print(f"-> {len(judgments)} judged queries loaded from: {path}")
+    return judgments
+
+def ndcg_at_k(ranked_ids, relevant, k=10):
+    dcg = sum((2 ** relevant.get(video_id, 0) - 1) / math.log2(rank + 2)
+              for rank, video_id in enumerate(ranked_ids[:k]))
+    ideal_grades = sorted(relevant.values(), reverse=True)[:k]
+    idcg = sum((2 ** grade - 1) / math.log2(rank + 2) for rank, grade in enumerate(ideal_grades))
+    return dcg / idcg if idcg > 0 else 0.0
+
+def reciprocal_rank(ranked_ids, relevant):
+    for rank, video_id in enumerate(ranked_ids):
+        if relevant.get(video_id, 0) > 0:
+            return 1.0 / (rank + 1)
+    return 0.0
+
+def recall_at_k(ranked_ids, relevant, k=50):
+    wanted = {video_id for video_id, grade in relevant.items() if grade > 0}
+    return len(wanted & set(ranked_ids[:k])) / len(wanted) if wanted else 0.0
+
+def ranked_video_ids(engine, query, k=RETRIEVE_K):
+    """Top-k video ids from VideoSearchEngine, with duplicate uploads collapsed."""
+    results = engine.search(query, offset=0, limit=k)['results']
+    return list(dict.fromkeys(result['video_id'] for result in results))
+
+def build_engine(config):
+    """Constructs VideoSearchEngine with the config's app.py overrides applied during construction."""
+    import app
+    settings = {**EVAL_SETTINGS, **config.get('settings', {})}
+    originals = {name: getattr(app, name) for name in settings}
+    try:
+        for name, value in settings.items():
+            setattr(app, name, value)
+        return app.VideoSearchEngine(**config.get('engine_kwargs', {}))
+    finally:
+        for name, value in originals.items():
+            setattr(app, name, value)
+
+def evaluate(engine, judgments):
+    """Per-query and mean metrics for one engine."""
+    per_query = {}
+    for judged in judgments:
+        ranked = ranked_video_ids(engine, judged['query'])
+        relevant = judged['relevant']
+        per_query[judged['query']] = {
+            'ndcg@10': ndcg_at_k(ranked, relevant, 10),
+            'mrr': reciprocal_rank(ranked, relevant),
+            'recall@50': recall_at_k(ranked, relevant, RETRIEVE_K),
+            'missed': [video_id for video_id in relevant if video_id not in ranked]
+        }
+    means = {metric: float(np.mean([row[metric] for row in per_query.values()])) for metric in MAX_METRIC_DROP}
+    return {'metrics': means, 'per_query': per_query}
+
+def compare_to_baseline(name, current, baseline):
+    """Prints a metric diff against the baseline; returns False if any drop exceeds its threshold."""
+    passed = True
+    print(f"\n[{name}] metric        baseline   current     delta   allowed")
+    for metric, allowed in MAX_METRIC_DROP.items():
+        before = baseline['metrics'][metric]
+        after = current['metrics'][metric]
+        delta = after - before
+        status = 'OK' if delta >= -allowed else 'FAIL'
+        passed = passed and status == 'OK'
+        print(f"[{name}] {metric:<12} {before:>9.4f} {after:>9.4f} {delta:>+9.4f}  -{allowed:.3f}  {status}")
+
+    if not passed:
+        # Show which queries lost the most, and which judged videos fell out of the top results
+        drops = []
+        for query, row in current['per_query'].items():
+            before = baseline['per_query'].get(query)
+            if before:
+                drops.append((row['ndcg@10'] - before['ndcg@10'], query, row['missed']))
+        drops.sort()
+        print(f"[{name}] Worst regressions (nDCG@10 delta, query, judged videos not retrieved):")
+        for delta, query, missed in drops[:WORST_QUERIES_SHOWN]:
+            if delta < 0:
+                print(f"[{name}]   {delta:+.4f}  '{query}'  missed={missed}")
+    return passed
+
+def main():
+    print("\n--- OFFLINE RELEVANCE EVALUATION ---")
+    judgments = load_judgments()
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    results = {}
+    for config in ENGINE_CONFIGS:
+        try:
+            engine = build_engine(config)
+        except Exception as e:
+            print(f"-> Skipping '{config['name']}': {e}")
+            continue
+        results[config['name']] = evaluate(engine, judgments)
+
+    if not results:
+        print("FATAL ERROR: No engine configuration could be evaluated.")
+        sys.exit(1)
+
+    print("\n--- SUMMARY ---")
+    print(pd.DataFrame({name: result['metrics'] for name, result in results.items()}).T
+          .to_string(float_format=lambda x: f"{x:.4f}"))
+
+    if UPDATE_BASELINE or "--write-baseline" in sys.argv[1:]:
+        baseline.update(results)
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n-> Baseline written to: {BASELINE_PATH}")
+        return
+
+    failed = []
+    for name, result in results.items():
+        reference = COMPARE_AGAINST or name
+        if reference not in baseline:
+            print(f"\n[{name}] No baseline recorded for '{reference}' in {BASELINE_PATH}; "
+                  f"run with --write-baseline to create one.")
+            failed.append(name)
+            continue
+        if not compare_to_baseline(name, result, baseline[reference]):
+            failed.append(name)
+
+    if failed:
+        print(f"\nRELEVANCE GATE FAILED for: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nRELEVANCE GATE PASSED")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.abspath(os.path.join(BENCHMARKS_DIR, "..", "Task_7_Semantic_Search_API_Flask"))
+sys.path.insert(0, APP_DIR)
+
+# --- Configuration ---
+# Exact search over one matrix vs. the same rows split into N shards searched in parallel
+SYNTHETIC_VECTORS = 400_000
+SYNTHETIC_DIMENSIONS = 384
+SHARD_COUNTS = [1, 2, 4, 8]
+N_QUERIES = 50
+TOP_K = 200                         # SORT_CANDIDATE_POOL, the largest top-k the API asks for
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, "shard_scaling_results.json")
+
+def write_shard(index_dir, vectors, ids):
+    """One index directory in the NumPy_matrix.py layout."""
+    from vector_backends import MATRIX_FILENAME, METADATA_FILENAME, CONFIG_FILENAME
+    os.makedirs(index_dir)
+    np.save(os.path.join(index_dir, MATRIX_FILENAME), vectors)
+    pd.DataFrame({'id': ids, 'original_id': ids}).to_parquet(os.path.join(index_dir, METADATA_FILENAME), index=False)
+    with open(os.path.join(index_dir, CONFIG_FILENAME), 'w') as f:
+        json.dump({'count': len(ids), 'dimension': vectors.shape[1], 'metric': 'cosine'}, f)
+
+def build_sharded_index(shards_dir, vectors, ids, n_shards):
+    """Splits the rows into n_shards contiguous shards plus a shards.json manifest."""
+    from vector_backends import SHARDS_MANIFEST_FILENAME
+    shards = []
+    for shard, rows in enumerate(np.array_split(np.arange(len(ids)), n_shards)):
+        name = f"shard_{shard:03d}"
+        write_shard(os.path.join(shards_dir, name), vectors[rows], [ids[i] for i in rows])
+        shards.append({'dir': name, 'count': len(rows)})
+    with open(os.path.join(shards_dir, SHARDS_MANIFEST_FILENAME), 'w') as f:
+        json.dump({'n_shards': n_shards, 'shard_key': 'row', 'count': len(ids),
+                   'dimension': vectors.shape[1], 'shards': shards}, f)
+
+def time_queries(backend, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        backend.query(query[None, :], n_results=TOP_K, include=[])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {'p50_ms': round(float(np.percentile(latencies, 50)), 2), 'p95_ms': round(float(np.percentile(latencies, 95)), 2)}
+
+def main():
+    from vector_backends import ShardedBackend
+    print("\n--- SHARD SCALING (scatter-gather exact search) ---")
+    print(f"-> {SYNTHETIC_VECTORS} x {SYNTHETIC_DIMENSIONS} vectors, top {TOP_K}, {os.cpu_count()} CPUs")
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(SYNTHETIC_VECTORS, SYNTHETIC_DIMENSIONS)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"syn{i:08d}" for i in range(SYNTHETIC_VECTORS)]
+    queries = rng.normal(size=(N_QUERIES, SYNTHETIC_DIMENSIONS)).astype(np.float32)
+
+    workdir = tempfile.mkdtemp(prefix="querytube_shards_")
+    report = {'cpus': os.cpu_count(), 'vectors': SYNTHETIC_VECTORS, 'top_k': TOP_K, 'runs': []}
+    reference = None
+    try:
+        for n_shards in SHARD_COUNTS:
+            shards_dir = os.path.join(workdir, f"shards_{n_shards}")
+            build_sharded_index(shards_dir, vectors, ids, n_shards)
+            backend = ShardedBackend(shards_dir)
+            backend.query(queries[:1], n_results=TOP_K, include=[])  # page the matrices in
+
+            # Exact search: every shard count must return the same top-k
+            top = backend.query(queries[:5].copy(), n_results=TOP_K, include=[])['ids']
+            reference = reference or top
+            result = {'shards': n_shards, **time_queries(backend, queries), 'same_results': top == reference}
+            backend.close()
+            report['runs'].append(result)
+            print(f"-> {n_shards} shard(s): p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, "
+                  f"results match: {result['same_results']}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n-> Results saved to: {RESULTS_PATH}")
+
+if __name__ == "__main__":
+    main()
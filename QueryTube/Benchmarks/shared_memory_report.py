@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.abspath(os.path.join(BENCHMARKS_DIR, "..", "Task_7_Semantic_Search_API_Flask"))
+sys.path.insert(0, APP_DIR)
+
+# --- Configuration ---
+# Matrix directory written by NumPy_matrix.py; None builds a synthetic one of SYNTHETIC_VECTORS rows
+NUMPY_INDEX_DIR = None
+SYNTHETIC_VECTORS = 100_000
+SYNTHETIC_DIMENSIONS = 384
+N_WORKERS = 4
+QUERIES_PER_WORKER = 20
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, "shared_memory_results.json")
+
+def build_synthetic_index(index_dir):
+    """Writes a matrix directory in the NumPy_matrix.py layout with random unit vectors."""
+    from vector_backends import MATRIX_FILENAME, METADATA_FILENAME, CONFIG_FILENAME
+    print(f"-> Building synthetic matrix ({SYNTHETIC_VECTORS} x {SYNTHETIC_DIMENSIONS}) in: {index_dir}")
+    os.makedirs(index_dir)
+    rng = np.random.default_rng(7)
+    matrix = np.lib.format.open_memmap(os.path.join(index_dir, MATRIX_FILENAME), mode='w+', dtype=np.float32,
+                                       shape=(SYNTHETIC_VECTORS, SYNTHETIC_DIMENSIONS))
+    for start in range(0, SYNTHETIC_VECTORS, 10_000):
+        block = rng.normal(size=(min(10_000, SYNTHETIC_VECTORS - start), SYNTHETIC_DIMENSIONS)).astype(np.float32)
+        matrix[start:start + len(block)] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    matrix.flush()
+    del matrix
+
+    ids = [f"syn{i:08d}" for i in range(SYNTHETIC_VECTORS)]
+    pd.DataFrame({
+        'id': ids,
+        'original_id': ids,
+        'title': [f"Synthetic video {i}" for i in range(SYNTHETIC_VECTORS)],
+        'channel_title': [f"Synthetic Channel {i % 500}" for i in range(SYNTHETIC_VECTORS)],
+        'publishedAt': [f"20{15 + i % 10}-0{1 + i % 9}-15T12:00:00Z" for i in range(SYNTHETIC_VECTORS)],
+        'viewCount': rng.integers(0, 10_000_000, SYNTHETIC_VECTORS).astype(str),
+        'likeCount': rng.integers(0, 100_000, SYNTHETIC_VECTORS).astype(str),
+        'commentCount': rng.integers(0, 10_000, SYNTHETIC_VECTORS).astype(str),
+        'duration': rng.integers(15, 3600, SYNTHETIC_VECTORS).astype(str),
+        'is_short': 'False'
+    }).to_parquet(os.path.join(index_dir, METADATA_FILENAME), index=False)
+    with open(os.path.join(index_dir, CONFIG_FILENAME), 'w') as f:
+        json.dump({'count': SYNTHETIC_VECTORS, 'dimension': SYNTHETIC_DIMENSIONS, 'metric': 'cosine'}, f)
+
+def process_memory_rollup():
+    """RSS and PSS of this process in bytes (PSS splits shared pages between the processes mapping them)."""
+    rollup = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('Rss', 'Pss', 'Shared_Clean', 'Private_Clean', 'Private_Dirty'):
+                rollup[key] = int(value.split()[0]) * 1024
+    return rollup
+
+def worker(index_dir, arrays_dir, shared, barrier, results):
+    sys.path.insert(0, APP_DIR)
+    from vector_backends import NumpyMatrixBackend
+    from metadata_store import MetadataStore
+
+    backend = NumpyMatrixBackend(index_dir, use_mmap=shared)
+    store = MetadataStore.from_collection(backend, arrays_dir=arrays_dir if shared else None)
+    rng = np.random.default_rng(os.getpid())
+    for _ in range(QUERIES_PER_WORKER):
+        # Exact search reads every row of the matrix, so the whole matrix is resident afterwards
+        backend.query(rng.normal(size=(1, backend.dimension)), n_results=10, include=[])
+        store.feed_page('views', 0, 12)
+        store.facet_counts(rng.integers(0, store.count(), 200))
+
+    # Measure only once every worker has loaded, so PSS reflects the final sharing
+    barrier.wait()
+    results.put({'pid': os.getpid(), **process_memory_rollup()})
+    barrier.wait()
+
+def run_mode(index_dir, arrays_dir, shared):
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(N_WORKERS)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(index_dir, arrays_dir, shared, barrier, results))
+                 for _ in range(N_WORKERS)]
+    for process in processes:
+        process.start()
+    rows = [results.get(timeout=600) for _ in processes]
+    for process in processes:
+        process.join()
+    return rows
+
+def main():
+    print("\n--- SHARED MEMORY REPORT (per-worker RSS / PSS) ---")
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("FATAL ERROR: /proc/self/smaps_rollup is required (Linux 4.14+).")
+        sys.exit(1)
+
+    workdir = tempfile.mkdtemp(prefix="querytube_shm_")
+    report = {}
+    try:
+        index_dir = NUMPY_INDEX_DIR
+        if index_dir is None:
+            index_dir = os.path.join(workdir, "matrix")
+            build_synthetic_index(index_dir)
+        arrays_dir = os.path.join(workdir, "shared_arrays")
+
+        for mode, shared in (('private_copies', False), ('shared_mmap', True)):
+            print(f"-> {N_WORKERS} workers, {mode}...")
+            report[mode] = run_mode(index_dir, arrays_dir, shared)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n--- SUMMARY ---")
+    for mode, rows in report.items():
+        print(f"\n{mode}:")
+        for row in rows:
+            print(f"   pid {row['pid']:>7}  RSS {row['Rss'] / 1e6:8.1f} MB  PSS {row['Pss'] / 1e6:8.1f} MB")
+        print(f"   total PSS {sum(row['Pss'] for row in rows) / 1e6:.1f} MB "
+              f"(sum of RSS {sum(row['Rss'] for row in rows) / 1e6:.1f} MB)")
+    print(f"\n-> Results saved to: {RESULTS_PATH}")
+
+if __name__ == "__main__":
+    main()
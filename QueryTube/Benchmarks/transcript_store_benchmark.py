@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "Task_7_Semantic_Search_API_Flask"))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "Task 5_ Merging Metadata & Transcripts", "Storing_in_ChromaDB"))
+
+# --- Configuration ---
+INPUT_PATH = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Embedding\Embedded_Merged_Dataset.parquet"
+
+# Layouts compared. 'chroma_documents' is the layout before the transcript store existed:
+# text_for_embedding as the Chroma document and the transcript copied into every metadata dict.
+VARIANTS = [
+    {'name': 'chroma_documents', 'settings': {'WRITE_TRANSCRIPT_STORE': False, 'STORE_CHROMA_DOCUMENTS': True}},
+    {'name': 'sidecar_raw', 'settings': {'WRITE_TRANSCRIPT_STORE': True, 'STORE_CHROMA_DOCUMENTS': False,
+                                         'TRANSCRIPT_CODEC': 'raw'}},
+    {'name': 'sidecar_zstd', 'settings': {'WRITE_TRANSCRIPT_STORE': True, 'STORE_CHROMA_DOCUMENTS': False,
+                                          'TRANSCRIPT_CODEC': 'zstd'}}
+]
+N_READS = 200
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, "transcript_store_results.json")
+
+def directory_size(path, include=lambda name: True):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            if include(os.path.relpath(os.path.join(root, name), path)):
+                total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def evict_page_cache(path):
+    """Best effort: asks the kernel to drop cached pages of every file under path (Linux only)."""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for root, _, files in os.walk(path):
+        for name in files:
+            fd = os.open(os.path.join(root, name), os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+
+def build_variant(store_module, df, variant, db_path):
+    """Runs store_in_chroma with the variant's settings applied for the duration of the build."""
+    originals = {name: getattr(store_module, name) for name in variant['settings']}
+    try:
+        for name, value in variant['settings'].items():
+            setattr(store_module, name, value)
+        return store_module.store_in_chroma(df, db_path)
+    finally:
+        for name, value in originals.items():
+            setattr(store_module, name, value)
+
+def make_reader(variant, db_path, collection):
+    """Returns a function video_id -> transcript text, the way the API reads it for this layout."""
+    from transcript_store import TranscriptStore, TRANSCRIPT_STORE_DIRNAME
+    if variant['settings']['WRITE_TRANSCRIPT_STORE']:
+        store = TranscriptStore(os.path.join(db_path, TRANSCRIPT_STORE_DIRNAME))
+        return store.get
+    def read(video_id):
+        result = collection.get(where={'original_id': video_id}, limit=1, include=['metadatas', 'documents'])
+        return result['metadatas'][0].get('transcript', '') if result['ids'] else None
+    return read
+
+def time_reads(read, video_ids, db_path, cold):
+    latencies_ms = []
+    for video_id in video_ids:
+        if cold:
+            evict_page_cache(db_path)
+        start = time.perf_counter()
+        read(video_id)
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+    return {
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies_ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 3)
+    }
+
+def main():
+    print("\n--- TRANSCRIPT STORE BENCHMARK ---")
+    import ChromaDB_updated as store_module
+    from transcript_store import TRANSCRIPT_STORE_DIRNAME
+
+    df = pd.read_parquet(INPUT_PATH)
+    print(f"-> {len(df)} rows loaded from: {INPUT_PATH}")
+    with_transcript = df[df['transcript'].notna() & (df['transcript'].astype(str).str.strip() != '')]
+    rng = np.random.default_rng(0)
+    video_ids = with_transcript['id'].astype(str).drop_duplicates().to_numpy()
+    video_ids = rng.choice(video_ids, size=min(N_READS, len(video_ids)), replace=False).tolist()
+
+    workdir = tempfile.mkdtemp(prefix="querytube_transcripts_")
+    rows = []
+    try:
+        for variant in VARIANTS:
+            print(f"\n=== {variant['name']} ===")
+            db_path = os.path.join(workdir, variant['name'])
+            collection = build_variant(store_module, df, variant, db_path)
+            read = make_reader(variant, db_path, collection)
+            rows.append({
+                'variant': variant['name'],
+                'chroma_sqlite_mb': round(os.path.getsize(os.path.join(db_path, "chroma.sqlite3")) / 1e6, 2),
+                'transcript_store_mb': round(directory_size(os.path.join(db_path, TRANSCRIPT_STORE_DIRNAME)) / 1e6, 2),
+                'total_mb': round(directory_size(db_path) / 1e6, 2),
+                'cold_read': time_reads(read, video_ids, db_path, cold=True),
+                'warm_read': time_reads(read, video_ids, db_path, cold=False)
+            })
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump({'input': INPUT_PATH, 'reads': len(video_ids), 'results': rows}, f, indent=2)
+
+    print("\n--- SUMMARY ---")
+    table = pd.DataFrame([{
+        'variant': row['variant'],
+        'sqlite MB': row['chroma_sqlite_mb'],
+        'store MB': row['transcript_store_mb'],
+        'total MB': row['total_mb'],
+        'cold p50 ms': row['cold_read']['p50_ms'],
+        'cold p99 ms': row['cold_read']['p99_ms'],
+        'warm p50 ms': row['warm_read']['p50_ms']
+    } for row in rows])
+    print(table.to_string(index=False))
+    print(f"\n-> Results saved to: {RESULTS_PATH}")
+
+if __name__ == "__main__":
+    main()
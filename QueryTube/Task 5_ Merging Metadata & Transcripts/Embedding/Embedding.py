@@ -1,9 +1,15 @@
 import pandas as pd
+import numpy as np
 import os
+import sys
 import time
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+# The PCA projection is saved and applied by the same module the API uses to project query vectors
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Task_7_Semantic_Search_API_Flask"))
+from pca_projection import save_pca_projection, apply_pca_projection
+
 # Set to suppress pandas warnings when creating copies
 pd.options.mode.chained_assignment = None  
 
@@ -22,6 +28,20 @@ EMBEDDED_PARQUET_FULL_PATH = os.path.join(OUTPUT_DIR, EMBEDDED_PARQUET_FILENAME)
 # We use a highly efficient model for demonstration
 EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2' 
 
+# 4. Optional PCA Projection
+# None keeps only the full 384-dim vectors. Set to e.g. 128 or 192 to also store a
+# projected copy in 'embedding_vector_pca' (select it via EMBEDDING_COLUMN in ChromaDB_updated.py).
+PCA_DIMENSIONS = None
+PCA_WHITEN = False
+PCA_PROJECTION_FILENAME = "pca_projection.npz"
+PCA_PROJECTION_FULL_PATH = os.path.join(OUTPUT_DIR, PCA_PROJECTION_FILENAME)
+
+# Recall@k of the projected vectors against full-dimension exact search, used to pick PCA_DIMENSIONS
+RUN_PCA_RECALL_REPORT = False
+PCA_REPORT_DIMENSIONS = [64, 96, 128, 192, 256]
+PCA_REPORT_K_VALUES = [1, 10, 50]
+PCA_REPORT_SAMPLE_QUERIES = 200
+
 def process_data_for_embeddings(df):
     """
     Cleans the merged dataframe and creates the combined text field ('text_for_embedding') 
@@ -54,6 +74,84 @@ def process_data_for_embeddings(df):
     print(f"-> Cleaned dataset size for embedding: {len(df_clean)} rows.")
     return df_clean
 
+def fit_pca_projection(embeddings, n_components, whiten=False):
+    """
+    Fits a PCA projection on the corpus vectors. Returns the mean, the top principal
+    components and their variances, which is everything needed to project new vectors.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float64)
+    mean = matrix.mean(axis=0)
+    centred = matrix - mean
+
+    # Eigen-decomposition of the 384x384 covariance is cheap regardless of corpus size
+    covariance = centred.T @ centred / max(len(matrix) - 1, 1)
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    order = np.argsort(eigenvalues)[::-1][:n_components]
+
+    return {
+        'mean': mean.astype(np.float32),
+        'components': eigenvectors[:, order].T.astype(np.float32),
+        'explained_variance': np.clip(eigenvalues[order], 1e-12, None).astype(np.float32),
+        'total_variance': np.float32(eigenvalues.sum()),
+        'whiten': bool(whiten)
+    }
+
+def _exact_top_k(queries, corpus, k, exclude_self=None):
+    """Exact top-k neighbours by cosine similarity (vectors are unit length)."""
+    scores = queries @ corpus.T
+    if exclude_self is not None:
+        # A query taken from the corpus would otherwise always match itself
+        scores[np.arange(len(queries)), exclude_self] = -np.inf
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [set(row) for row in top]
+
+def pca_recall_report(embeddings, dimensions=PCA_REPORT_DIMENSIONS, k_values=PCA_REPORT_K_VALUES,
+                      n_queries=PCA_REPORT_SAMPLE_QUERIES, whiten=PCA_WHITEN):
+    """
+    Measures recall@k of exact search over PCA-projected vectors against exact search
+    over the full-dimension vectors, using corpus vectors as sample queries.
+    """
+    print("\n--- PCA RECALL@K REPORT (vs. full-dimension exact search) ---")
+    # A new array: np.asarray would hand back the caller's float32 embeddings, normalized in place
+    full = np.asarray(embeddings, dtype=np.float32)
+    full = full / np.maximum(np.linalg.norm(full, axis=1, keepdims=True), 1e-12)
+
+    rng = np.random.default_rng(42)
+    query_rows = rng.choice(len(full), size=min(n_queries, len(full)), replace=False)
+    k_values = [k for k in k_values if k < len(full)]
+    dimensions = [d for d in dimensions if d < full.shape[1]]
+    if not k_values or not dimensions:
+        print("   Corpus too small for a meaningful report.")
+        return []
+
+    truth = {k: _exact_top_k(full[query_rows], full, k, query_rows) for k in k_values}
+
+    # PCA components are nested, so one fit at the largest dimension serves every row
+    projection = fit_pca_projection(full, max(dimensions), whiten)
+    rows = []
+    for dim in dimensions:
+        sliced = {
+            'mean': projection['mean'],
+            'components': projection['components'][:dim],
+            'explained_variance': projection['explained_variance'][:dim],
+            'whiten': projection['whiten']
+        }
+        reduced = apply_pca_projection(full, sliced)
+        row = {
+            'dimensions': dim,
+            'variance_kept': float(sliced['explained_variance'].sum() / projection['total_variance']),
+            'bytes_per_vector': dim * 4
+        }
+        for k in k_values:
+            found = _exact_top_k(reduced[query_rows], reduced, k, query_rows)
+            hits = sum(len(f & t) for f, t in zip(found, truth[k]))
+            row[f'recall@{k}'] = hits / (k * len(query_rows))
+        rows.append(row)
+
+    print(f"-> {len(query_rows)} sample queries, full dimension = {full.shape[1]}")
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+    return rows
+
 def generate_embeddings(df):
     """
     Loads the SentenceTransformer model, generates embeddings for the 'text_for_embedding'
@@ -80,11 +178,22 @@ def generate_embeddings(df):
     # Store embeddings in a new column as a list (saved as a string in CSV/Parquet)
     df['embedding_vector'] = [vec.tolist() for vec in embeddings]
     
+    # Optional PCA projection, fitted on this corpus and stored alongside the full vectors
+    if RUN_PCA_RECALL_REPORT:
+        pca_recall_report(embeddings)
+    if PCA_DIMENSIONS:
+        print(f"-> Fitting PCA projection to {PCA_DIMENSIONS} dims (whiten={PCA_WHITEN})...")
+        projection = fit_pca_projection(embeddings, PCA_DIMENSIONS, PCA_WHITEN)
+        df['embedding_vector_pca'] = [vec.tolist() for vec in apply_pca_projection(embeddings, projection)]
+    
     end_time = time.time()
     print(f"-> Embedding generation complete in {end_time - start_time:.2f} seconds.")
     
     # Save the dataframe with vectors
     os.makedirs(OUTPUT_DIR, exist_ok=True) # Ensure output directory exists
+    if PCA_DIMENSIONS:
+        save_pca_projection(projection, PCA_PROJECTION_FULL_PATH)
+        print(f"-> PCA projection ({len(projection['components'])} dims) saved to: {PCA_PROJECTION_FULL_PATH}")
 
     # 1. Save to CSV
     df.to_csv(EMBEDDED_CSV_FULL_PATH, index=False)
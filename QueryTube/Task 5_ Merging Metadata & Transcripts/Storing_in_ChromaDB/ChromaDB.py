@@ -17,6 +17,14 @@ OUTPUT_DIR = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\
 CHROMA_DB_PATH = os.path.join(OUTPUT_DIR, "ChromaDB_Collection")
 COLLECTION_NAME = "youtube_analysis_collection"
 
+# HNSW index configuration. The distance space, M and construction_ef are fixed once the
+# collection is created; search_ef can also be changed at query time (HNSW_SEARCH_EF in app.py).
+# Use HNSW_parameter_sweep.py to measure latency/recall before changing these.
+HNSW_SPACE = "cosine"
+HNSW_M = 16
+HNSW_CONSTRUCTION_EF = 100
+HNSW_SEARCH_EF = 100
+
 def load_embedded_data():
     """
     Loads the Parquet file and prepares the data structures for ChromaDB insertion.
@@ -88,7 +96,18 @@ def store_in_chroma(df):
         # Ignore error if collection does not exist
         pass
         
-    collection = client.create_collection(name=COLLECTION_NAME)
+    # Cosine space must be set explicitly (Chroma defaults to L2); the API converts distances assuming it
+    collection = client.create_collection(
+        name=COLLECTION_NAME,
+        metadata={
+            "hnsw:space": HNSW_SPACE,
+            "hnsw:M": HNSW_M,
+            "hnsw:construction_ef": HNSW_CONSTRUCTION_EF,
+            "hnsw:search_ef": HNSW_SEARCH_EF
+        }
+    )
+    print(f"-> Collection created (space={HNSW_SPACE}, M={HNSW_M}, "
+          f"construction_ef={HNSW_CONSTRUCTION_EF}, search_ef={HNSW_SEARCH_EF})")
     
     # 3. Prepare data for ChromaDB format
     documents = df['text_for_embedding'].tolist()
@@ -1,6 +1,12 @@
 import pandas as pd
+import numpy as np
 import os
+import json
 import time
+import uuid
+import shutil
+import socket
+from datetime import datetime, timezone
 from chromadb import PersistentClient
 from tqdm import tqdm
 
@@ -10,6 +16,50 @@ OUTPUT_DIR = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\
 CHROMA_DB_PATH = os.path.join(OUTPUT_DIR, "ChromaDB_Collection_Updated")
 COLLECTION_NAME = "youtube_analysis_collection"
 
+# Blue/green snapshots: when enabled, every run builds into a new versioned directory under
+# CHROMA_SNAPSHOTS_DIR, writes manifest.json once the build is complete and then atomically
+# repoints CURRENT at it. The running API (QUERYTUBE_CHROMA_SNAPSHOTS_DIR) swaps to it without
+# restarting. When disabled, the collection at CHROMA_DB_PATH is deleted and rebuilt in place.
+SNAPSHOT_MODE = False
+CHROMA_SNAPSHOTS_DIR = os.path.join(OUTPUT_DIR, "ChromaDB_Snapshots")
+SNAPSHOTS_TO_KEEP = 3  # completed snapshots kept on disk (the live one and the one being drained included)
+# Older snapshots are only removed once they have been replaced for this long. API workers swap
+# every QUERYTUBE_SNAPSHOT_POLL_SECONDS (10 s by default) and then drain their in-flight requests,
+# so keep this well above the poll interval plus the slowest request.
+SNAPSHOT_RETIRE_GRACE_SECONDS = 300
+# Written into the directory being built (with this process's pid and host) and removed once the
+# build is complete; compact_segments.py never touches a directory whose build is still running
+BUILD_MARKER_FILENAME = "build_in_progress.json"
+
+# HNSW index configuration. The distance space, M and construction_ef are fixed once the
+# collection is created; search_ef can also be changed at query time (HNSW_SEARCH_EF in app.py).
+# Use HNSW_parameter_sweep.py to measure latency/recall before changing these.
+HNSW_SPACE = "cosine"
+HNSW_M = 16
+HNSW_CONSTRUCTION_EF = 100
+HNSW_SEARCH_EF = 100
+
+# Metadata stored with native types (everything else is stored as a string) so the API can
+# build typed columns for sorting and facets without re-parsing strings
+INT_METADATA_COLUMNS = ['viewCount', 'likeCount', 'commentCount', 'duration']
+BOOL_METADATA_COLUMNS = ['is_short']
+# Transcripts are written to a sidecar store (<db_path>/transcripts) served by the API's
+# /videos/<id>/transcript endpoint, and left out of the Chroma metadata
+WRITE_TRANSCRIPT_STORE = True
+TRANSCRIPT_STORE_DIRNAME = "transcripts"
+# 'zstd': each transcript is compressed on its own (so any one can be read without the others)
+# against a dictionary trained on the corpus, which recovers most of the ratio lost by
+# compressing short texts separately. 'raw' stores plain UTF-8.
+TRANSCRIPT_CODEC = 'zstd'
+ZSTD_LEVEL = 19
+ZSTD_DICT_SIZE = 112_640       # bytes (zstd's default dictionary size)
+ZSTD_DICT_SAMPLES = 5000       # transcripts sampled to train the dictionary
+# Also store text_for_embedding as the Chroma document. Nothing in the API reads it any more
+# (metadata and the transcript store cover everything), and it roughly doubles chroma.sqlite3.
+STORE_CHROMA_DOCUMENTS = False
+# 'embedding_vector' (full 384 dims) or 'embedding_vector_pca' (written by Embedding.py when PCA_DIMENSIONS is set)
+EMBEDDING_COLUMN = 'embedding_vector'
+
 def load_embedded_data():
     print("--- 1. LOADING EMBEDDED DATA ---")
     try:
@@ -25,7 +75,7 @@ def load_embedded_data():
         print(f"FATAL ERROR: Could not load data. {e}")
         return None
 
-def store_in_chroma(df):
+def store_in_chroma(df, db_path=CHROMA_DB_PATH):
     print("\n--- 2. STORING IN CHROMADB ---")
     
     # Create a copy of the dataframe to avoid modifying the original
@@ -44,9 +94,9 @@ def store_in_chroma(df):
     start_time = time.time()
     
     # 1. Initialize Persistent ChromaDB Client
-    os.makedirs(CHROMA_DB_PATH, exist_ok=True)
-    client = PersistentClient(path=CHROMA_DB_PATH)
-    print(f"-> ChromaDB client initialized. Database will be saved in: {CHROMA_DB_PATH}")
+    os.makedirs(db_path, exist_ok=True)
+    client = PersistentClient(path=db_path)
+    print(f"-> ChromaDB client initialized. Database will be saved in: {db_path}")
 
     # 2. Get/Create Collection (Overwrite if already exists)
     try:
@@ -54,27 +104,50 @@ def store_in_chroma(df):
     except Exception:
         pass
         
-    collection = client.create_collection(name=COLLECTION_NAME)
+    # Cosine space must be set explicitly (Chroma defaults to L2); the API converts distances assuming it
+    collection = client.create_collection(
+        name=COLLECTION_NAME,
+        metadata={
+            "hnsw:space": HNSW_SPACE,
+            "hnsw:M": HNSW_M,
+            "hnsw:construction_ef": HNSW_CONSTRUCTION_EF,
+            "hnsw:search_ef": HNSW_SEARCH_EF
+        }
+    )
+    print(f"-> Collection created (space={HNSW_SPACE}, M={HNSW_M}, "
+          f"construction_ef={HNSW_CONSTRUCTION_EF}, search_ef={HNSW_SEARCH_EF})")
     
     # 3. Prepare data for ChromaDB format
     documents = df['text_for_embedding'].tolist()
     ids = df['id'].astype(str).tolist()
-    embeddings = df['embedding_vector'].tolist()
+    embeddings = df[EMBEDDING_COLUMN].tolist()
+    print(f"-> Indexing '{EMBEDDING_COLUMN}' ({len(embeddings[0]) if embeddings else 0} dims)")
     
     # Include all available columns except the ones we don't want in metadata
-    exclude_columns = ['text_for_embedding', 'embedding_vector']
+    exclude_columns = ['text_for_embedding', 'embedding_vector', 'embedding_vector_pca']
+    if WRITE_TRANSCRIPT_STORE:
+        exclude_columns.append('transcript')
     available_columns = [col for col in df.columns if col not in exclude_columns]
     
     print(f"\nIncluding these columns as metadata: {available_columns}")
     
-    # Convert to list of metadata dictionaries
-    metadata_list = df[available_columns].astype(str).to_dict('records')
+    # Convert to list of metadata dictionaries (strings, except the typed numeric/boolean columns)
+    metadata_df = df[available_columns].astype(str)
+    for col in INT_METADATA_COLUMNS:
+        if col in df.columns:
+            metadata_df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('int64')
+    for col in BOOL_METADATA_COLUMNS:
+        if col in df.columns:
+            metadata_df[col] = df[col].astype(str).str.lower().isin(['true', '1', 'yes'])
+    metadata_list = metadata_df.to_dict('records')
     
-    # Ensure all metadata values are strings (ChromaDB requirement)
+    # Ensure no NaN reaches ChromaDB (it only accepts str/int/float/bool values)
     for meta in metadata_list:
         for key, value in meta.items():
-            if pd.isna(value) or value == 'nan':
+            if pd.isna(value) or value in ('nan', 'None'):
                 meta[key] = ''  # Replace NaN with empty string
+            elif hasattr(value, 'item'):
+                meta[key] = value.item()  # NumPy scalars -> plain Python int/bool
     
     # 4. Add data to the collection with chunking
     print(f"\n-> Adding {len(ids)} documents and embeddings to ChromaDB...")
@@ -84,7 +157,7 @@ def store_in_chroma(df):
         end_idx = min(i + chunk_size, len(ids))
         collection.add(
             embeddings=embeddings[i:end_idx],
-            documents=documents[i:end_idx],
+            documents=documents[i:end_idx] if STORE_CHROMA_DOCUMENTS else None,
             metadatas=metadata_list[i:end_idx],
             ids=ids[i:end_idx]
         )
@@ -93,6 +166,9 @@ def store_in_chroma(df):
     print(f"\n-> Successfully stored {collection.count()} documents in collection '{COLLECTION_NAME}'.")
     print(f"-> Storage complete in {end_time - start_time:.2f} seconds.")
     
+    if WRITE_TRANSCRIPT_STORE and 'transcript' in df.columns:
+        write_transcript_store(df, os.path.join(db_path, TRANSCRIPT_STORE_DIRNAME))
+    
     # 5. Verify the data was stored correctly
     print("\n--- 3. VERIFICATION ---")
     if collection.count() > 0:
@@ -102,18 +178,165 @@ def store_in_chroma(df):
     
     return collection
 
+def train_transcript_dictionary(encoded):
+    """Trains a zstd dictionary on a sample of the encoded transcripts (None if there is too little data)."""
+    import zstandard
+    rng = np.random.default_rng(0)
+    sample = [encoded[i] for i in rng.permutation(len(encoded))[:ZSTD_DICT_SAMPLES]]
+    try:
+        return zstandard.train_dictionary(ZSTD_DICT_SIZE, sample)
+    except zstandard.ZstdError as e:
+        print(f"WARNING: could not train a zstd dictionary ({e}); compressing without one.")
+        return None
+
+def write_transcript_store(df, store_dir):
+    """
+    Writes one transcript per video (keyed by the original video id) into a single data file
+    plus an (offset, length) index, so the API can read and decode any one transcript directly.
+    The store is built in a temp directory and swapped in, so a running API never reads it half-written.
+    """
+    print("\n-> Writing transcript store...")
+    transcripts = df.drop_duplicates('original_id')[['original_id', 'transcript']]
+    transcripts = transcripts[transcripts['transcript'].notna() & (transcripts['transcript'].astype(str).str.strip() != '')]
+    encoded = [text.strip().encode('utf-8') for text in transcripts['transcript'].astype(str)]
+
+    tmp_dir = f"{store_dir}.tmp-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp_dir)
+    info = {'codec': TRANSCRIPT_CODEC, 'count': len(encoded), 'raw_bytes': int(sum(map(len, encoded)))}
+    compress = None
+    if TRANSCRIPT_CODEC == 'zstd':
+        import zstandard
+        dictionary = train_transcript_dictionary(encoded) if encoded else None
+        if dictionary is not None:
+            with open(os.path.join(tmp_dir, "transcripts.dict"), 'wb') as f:
+                f.write(dictionary.as_bytes())
+        # Dictionary id and checksum are left out of every frame; the store has exactly one dictionary
+        compress = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dictionary,
+                                            write_dict_id=False, write_checksum=False).compress
+        info.update({'level': ZSTD_LEVEL, 'dictionary': dictionary is not None})
+    elif TRANSCRIPT_CODEC != 'raw':
+        raise ValueError(f"Unknown transcript codec: {TRANSCRIPT_CODEC}")
+
+    offsets, lengths = [], []
+    with open(os.path.join(tmp_dir, "transcripts.bin"), 'wb') as f:
+        for data in tqdm(encoded, desc="Transcript store"):
+            data = compress(data) if compress else data
+            offsets.append(f.tell())
+            lengths.append(len(data))
+            f.write(data)
+    pd.DataFrame({
+        'video_id': transcripts['original_id'].astype(str).values,
+        'offset': pd.Series(offsets, dtype='int64'),
+        'length': pd.Series(lengths, dtype='int64')
+    }).to_parquet(os.path.join(tmp_dir, "transcripts_index.parquet"), index=False)
+    info['bytes'] = int(sum(lengths))
+    with open(os.path.join(tmp_dir, "store.json"), 'w') as f:
+        json.dump(info, f, indent=2)
+
+    old_dir = f"{store_dir}.old-{uuid.uuid4().hex[:8]}"
+    if os.path.exists(store_dir):
+        os.replace(store_dir, old_dir)
+    os.replace(tmp_dir, store_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    ratio = info['raw_bytes'] / max(info['bytes'], 1)
+    print(f"-> {len(offsets)} transcripts written to: {store_dir} "
+          f"({info['raw_bytes'] / 1e6:.1f} MB -> {info['bytes'] / 1e6:.1f} MB, {TRANSCRIPT_CODEC}, {ratio:.1f}x)")
+
+def _write_json_atomically(path, payload):
+    """Writes a file via a temp file + os.replace so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(payload if isinstance(payload, str) else json.dumps(payload, indent=2))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def mark_build_started(db_path):
+    """Drops the in-progress marker into the directory about to be built."""
+    os.makedirs(db_path, exist_ok=True)
+    _write_json_atomically(os.path.join(db_path, BUILD_MARKER_FILENAME), {
+        'pid': os.getpid(),
+        'host': socket.gethostname(),
+        'started_at': datetime.now(timezone.utc).isoformat()
+    })
+
+def mark_build_finished(db_path):
+    """Removes the marker once the build is complete (a failed run leaves it; its pid is then dead)."""
+    marker = os.path.join(db_path, BUILD_MARKER_FILENAME)
+    if os.path.exists(marker):
+        os.remove(marker)
+
+def new_snapshot_dir():
+    """Fresh versioned directory for a blue/green build (never the one being served)."""
+    version = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}_{uuid.uuid4().hex[:8]}"
+    return version, os.path.join(CHROMA_SNAPSHOTS_DIR, version)
+
+def publish_snapshot(version, snapshot_dir, collection):
+    """Writes the snapshot manifest, then atomically points CURRENT at the new snapshot."""
+    print("\n--- 4. PUBLISHING SNAPSHOT ---")
+    manifest = {
+        'version': version,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'collection_name': COLLECTION_NAME,
+        'count': collection.count(),
+        'embedding_column': EMBEDDING_COLUMN,
+        'hnsw': {'space': HNSW_SPACE, 'M': HNSW_M, 'construction_ef': HNSW_CONSTRUCTION_EF,
+                 'search_ef': HNSW_SEARCH_EF}
+    }
+    current_pointer = os.path.join(CHROMA_SNAPSHOTS_DIR, "CURRENT")
+    previous = None
+    if os.path.exists(current_pointer):
+        with open(current_pointer) as f:
+            previous = f.read().strip()
+    # The manifest marks the build as complete; directories without one are never served
+    _write_json_atomically(os.path.join(snapshot_dir, "manifest.json"), manifest)
+    _write_json_atomically(current_pointer, version)
+    print(f"-> CURRENT now points at snapshot {version}")
+    prune_snapshots(keep={version, previous})
+
+def prune_snapshots(keep):
+    """
+    Removes the oldest completed snapshots beyond SNAPSHOTS_TO_KEEP. A snapshot is only removed
+    once it has been replaced for SNAPSHOT_RETIRE_GRACE_SECONDS (it was replaced when the next
+    snapshot's manifest was written), so workers that have not swapped yet, or are still draining
+    requests on it, keep their files. Snapshots in `keep` (the new one and the one CURRENT pointed
+    at before this publish) and failed or in-progress builds (no manifest) are never removed.
+    """
+    completed = sorted(
+        name for name in os.listdir(CHROMA_SNAPSHOTS_DIR)
+        if os.path.exists(os.path.join(CHROMA_SNAPSHOTS_DIR, name, "manifest.json"))
+    )
+    now = time.time()
+    for name, replaced_by in zip(completed[:-SNAPSHOTS_TO_KEEP], completed[1:]):
+        if name in keep:
+            continue
+        replaced_at = os.path.getmtime(os.path.join(CHROMA_SNAPSHOTS_DIR, replaced_by, "manifest.json"))
+        if now - replaced_at < SNAPSHOT_RETIRE_GRACE_SECONDS:
+            print(f"-> Keeping old snapshot {name} (replaced {now - replaced_at:.0f}s ago)")
+            continue
+        shutil.rmtree(os.path.join(CHROMA_SNAPSHOTS_DIR, name), ignore_errors=True)
+        print(f"-> Removed old snapshot {name}")
+
 def main():
     # Load the data
     df = load_embedded_data()
     if df is None:
         return
     
-    # Store in ChromaDB
-    collection = store_in_chroma(df)
+    # Store in ChromaDB (a new snapshot directory in blue/green mode, otherwise in place)
+    if SNAPSHOT_MODE:
+        version, db_path = new_snapshot_dir()
+    else:
+        version, db_path = None, CHROMA_DB_PATH
+    mark_build_started(db_path)
+    collection = store_in_chroma(df, db_path)
     
     if collection and collection.count() > 0:
+        if SNAPSHOT_MODE:
+            publish_snapshot(version, db_path, collection)
+        mark_build_finished(db_path)
         print("\n--- CHROMADB STORAGE COMPLETE ---")
-        print(f"Collection '{COLLECTION_NAME}' is ready at: {CHROMA_DB_PATH}")
+        print(f"Collection '{COLLECTION_NAME}' is ready at: {db_path}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,143 @@
+import pandas as pd
+import numpy as np
+import os
+import time
+import shutil
+import tempfile
+from chromadb import PersistentClient
+
+# --- Configuration ---
+INPUT_PATH = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Embedding\Embedded_Merged_Dataset.parquet"
+OUTPUT_DIR = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Storing_in_ChromaDB"
+SWEEP_RESULTS_PATH = os.path.join(OUTPUT_DIR, "hnsw_sweep_results.csv")
+EMBEDDING_COLUMN = 'embedding_vector'
+
+# Grid to sweep. Each (M, construction_ef) pair builds one throwaway collection. search_ef is
+# changed with collection.modify() (as app.py's set_search_ef does), which Chroma applies when
+# a client first reads the collection, so each search_ef is measured from a freshly opened
+# client: a reload of the saved index from disk rather than a rebuild.
+SWEEP_SPACE = "cosine"
+SWEEP_M = [8, 16, 32]
+SWEEP_CONSTRUCTION_EF = [100, 200]
+SWEEP_SEARCH_EF = [10, 50, 100, 200]
+
+TOP_K = 10
+N_QUERIES = 200
+WARMUP_QUERIES = 20
+
+def load_vectors():
+    print("--- 1. LOADING EMBEDDED DATA ---")
+    try:
+        df = pd.read_parquet(INPUT_PATH, columns=['id', EMBEDDING_COLUMN])
+        print(f"Loaded embedded data from: {INPUT_PATH}")
+    except Exception as e:
+        print(f"FATAL ERROR: Could not load data. {e}")
+        return None
+
+    vectors = np.vstack(df[EMBEDDING_COLUMN].to_numpy()).astype(np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    print(f"-> {len(vectors)} vectors, {vectors.shape[1]} dims")
+    return vectors
+
+def exact_top_k(queries, vectors, k):
+    """Exact cosine top-k by brute force, used as ground truth."""
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [set(row) for row in top]
+
+def build_collection(client, vectors, m, construction_ef, chunk_size=500):
+    name = f"hnsw_sweep_m{m}_cef{construction_ef}"
+    collection = client.create_collection(
+        name=name,
+        metadata={
+            "hnsw:space": SWEEP_SPACE,
+            "hnsw:M": m,
+            "hnsw:construction_ef": construction_ef
+        }
+    )
+    ids = [str(i) for i in range(len(vectors))]
+    start_time = time.time()
+    for i in range(0, len(ids), chunk_size):
+        collection.add(ids=ids[i:i + chunk_size], embeddings=vectors[i:i + chunk_size])
+    return collection, time.time() - start_time
+
+def open_with_search_ef(client, sweep_dir, name, search_ef):
+    """
+    Reopens the collection in a new client and sets search_ef before anything reads it (once a
+    client has loaded the index it keeps the ef it was loaded with).
+    """
+    client.clear_system_cache()
+    client = PersistentClient(path=sweep_dir)
+    collection = client.get_collection(name=name)
+    collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+    return client, collection
+
+def measure(collection, queries, truth, k):
+    """Runs the queries one at a time and returns latency percentiles and recall@k."""
+    for query in queries[:WARMUP_QUERIES]:
+        collection.query(query_embeddings=[query], n_results=k, include=[])
+
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start_time = time.perf_counter()
+        result = collection.query(query_embeddings=[query], n_results=k, include=[])
+        latencies.append(time.perf_counter() - start_time)
+        hits += len({int(i) for i in result['ids'][0]} & expected)
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        f'recall@{k}': hits / (k * len(queries)),
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'qps': len(queries) / float(np.sum(latencies))
+    }
+
+def run_sweep(vectors):
+    print("\n--- 2. HNSW PARAMETER SWEEP ---")
+    rng = np.random.default_rng(42)
+    # Perturbed corpus vectors stand in for queries (near, but not identical to, stored items)
+    query_rows = rng.choice(len(vectors), size=min(N_QUERIES, len(vectors)), replace=False)
+    queries = vectors[query_rows] + rng.normal(scale=0.05, size=(len(query_rows), vectors.shape[1])).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    k = min(TOP_K, len(vectors))
+    truth = exact_top_k(queries, vectors, k)
+
+    sweep_dir = tempfile.mkdtemp(prefix="hnsw_sweep_")
+    rows = []
+    client = None
+    try:
+        for m in SWEEP_M:
+            for construction_ef in SWEEP_CONSTRUCTION_EF:
+                client = PersistentClient(path=sweep_dir)
+                collection, build_seconds = build_collection(client, vectors, m, construction_ef)
+                for search_ef in SWEEP_SEARCH_EF:
+                    client, collection = open_with_search_ef(client, sweep_dir, collection.name, search_ef)
+                    row = {'M': m, 'construction_ef': construction_ef, 'search_ef': search_ef,
+                           'build_seconds': round(build_seconds, 2)}
+                    row.update(measure(collection, queries, truth, k))
+                    print(f"-> M={m}, construction_ef={construction_ef}, search_ef={search_ef}: "
+                          f"recall@{k}={row[f'recall@{k}']:.3f}, p95={row['p95_ms']:.2f} ms")
+                    rows.append(row)
+                client.delete_collection(name=collection.name)
+    finally:
+        if client is not None:
+            client.clear_system_cache()  # releases the files before they are deleted
+        shutil.rmtree(sweep_dir, ignore_errors=True)
+
+    results = pd.DataFrame(rows)
+    print("\n" + results.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    results.to_csv(SWEEP_RESULTS_PATH, index=False)
+    print(f"\n-> Sweep results saved to: {SWEEP_RESULTS_PATH}")
+    return results
+
+def main():
+    vectors = load_vectors()
+    if vectors is None:
+        return
+    run_sweep(vectors)
+    print("\nPick the cheapest setting that meets the recall target and set it in ChromaDB_updated.py / app.py.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import time
+import socket
+import shutil
+import sqlite3
+import pandas as pd
+
+# --- Configuration ---
+OUTPUT_DIR = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Storing_in_ChromaDB"
+# Chroma persistence directories to check. Every completed snapshot under CHROMA_SNAPSHOTS_DIR
+# (see SNAPSHOT_MODE in ChromaDB_updated.py) is checked as well.
+CHROMA_DB_PATHS = [
+    os.path.join(OUTPUT_DIR, "ChromaDB_Collection"),
+    os.path.join(OUTPUT_DIR, "ChromaDB_Collection_Updated")
+]
+CHROMA_SNAPSHOTS_DIR = os.path.join(OUTPUT_DIR, "ChromaDB_Snapshots")
+
+# Only report what would be removed; set to False to actually delete the orphaned segments
+DRY_RUN = True
+# Segment directories younger than this are left alone, in case a build is still writing them
+MIN_ORPHAN_AGE_SECONDS = 3600
+# Also remove snapshot directories without a manifest (failed or abandoned builds)
+REMOVE_INCOMPLETE_SNAPSHOTS = True
+# ChromaDB_updated.py drops this marker (its pid and host) into the directory it is building and
+# removes it when done. A directory whose build is still running is never touched; a marker whose
+# process cannot be checked (written on another host) only counts as stale after this long
+BUILD_MARKER_FILENAME = "build_in_progress.json"
+STALE_BUILD_MARKER_SECONDS = 24 * 3600
+# Run VACUUM on chroma.sqlite3 afterwards to return free pages left by deleted collections
+# (needs exclusive access: stop the API first)
+VACUUM_CATALOG = False
+
+CATALOG_FILENAME = "chroma.sqlite3"
+SEGMENT_DIR_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def referenced_segments(db_path):
+    """Segment ids the sqlite catalog still knows about (opened read-only, so safe while the API runs)."""
+    catalog_path = os.path.join(db_path, CATALOG_FILENAME)
+    with sqlite3.connect(f"file:{catalog_path}?mode=ro", uri=True) as conn:
+        return {row[0] for row in conn.execute("SELECT id FROM segments")}
+
+def find_orphaned_segments(db_path):
+    """Lists (segment_dir, size_bytes, age_seconds) for UUID directories not referenced by the catalog."""
+    live = referenced_segments(db_path)
+    orphans = []
+    for name in sorted(os.listdir(db_path)):
+        path = os.path.join(db_path, name)
+        if os.path.isdir(path) and SEGMENT_DIR_PATTERN.match(name) and name not in live:
+            orphans.append((path, directory_size(path), time.time() - os.path.getmtime(path)))
+    return orphans, len(live)
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+def build_state(path):
+    """'running', 'stale' (the build died) or None when path has no build marker."""
+    marker = os.path.join(path, BUILD_MARKER_FILENAME)
+    if not os.path.exists(marker):
+        return None
+    try:
+        with open(marker) as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        info = {}
+    pid = info.get('pid')
+    # os.kill(pid, 0) only probes on POSIX (on Windows signal 0 is CTRL_C_EVENT)
+    if os.name == 'posix' and isinstance(pid, int) and info.get('host') == socket.gethostname():
+        return 'running' if _process_alive(pid) else 'stale'
+    try:
+        marker_age = time.time() - os.path.getmtime(marker)
+    except OSError:
+        return None  # removed just now: the build finished
+    return 'running' if marker_age < STALE_BUILD_MARKER_SECONDS else 'stale'
+
+def snapshot_dirs(snapshots_dir):
+    """Splits snapshot directories into completed (have a manifest) and incomplete ones."""
+    completed, incomplete = [], []
+    if not os.path.isdir(snapshots_dir):
+        return completed, incomplete
+    current = None
+    pointer = os.path.join(snapshots_dir, "CURRENT")
+    if os.path.exists(pointer):
+        with open(pointer) as f:
+            current = f.read().strip()
+    for name in sorted(os.listdir(snapshots_dir)):
+        path = os.path.join(snapshots_dir, name)
+        if not os.path.isdir(path):
+            continue
+        if os.path.exists(os.path.join(path, "manifest.json")):
+            completed.append(path)
+        elif name != current:
+            incomplete.append(path)
+    return completed, incomplete
+
+def vacuum_catalog(db_path):
+    catalog_path = os.path.join(db_path, CATALOG_FILENAME)
+    before = os.path.getsize(catalog_path)
+    with sqlite3.connect(catalog_path) as conn:
+        conn.execute("VACUUM")
+    after = os.path.getsize(catalog_path)
+    print(f"   VACUUM {catalog_path}: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+
+def main():
+    print("\n--- CHROMA SEGMENT COMPACTION ---")
+    print(f"-> Mode: {'DRY RUN (nothing is deleted)' if DRY_RUN else 'DELETE'}")
+
+    completed, incomplete = snapshot_dirs(CHROMA_SNAPSHOTS_DIR)
+    rows = []
+    for db_path in CHROMA_DB_PATHS + completed:
+        if not os.path.isdir(db_path):
+            continue
+        if build_state(db_path) == 'running':
+            print(f"-> Skipping {db_path}: a build is still writing it")
+            continue
+        if not os.path.exists(os.path.join(db_path, CATALOG_FILENAME)):
+            # Without the catalog every segment would look orphaned; never guess
+            print(f"-> Skipping {db_path}: no {CATALOG_FILENAME} found")
+            continue
+        try:
+            orphans, live_count = find_orphaned_segments(db_path)
+        except sqlite3.Error as e:
+            print(f"-> Skipping {db_path}: could not read the catalog ({e})")
+            continue
+        print(f"\n-> {db_path}: {live_count} live segments, {len(orphans)} orphaned")
+        for path, size, age in orphans:
+            too_new = age < MIN_ORPHAN_AGE_SECONDS
+            action = 'kept (too new)' if too_new else ('would remove' if DRY_RUN else 'removed')
+            if not too_new and not DRY_RUN:
+                shutil.rmtree(path)
+            print(f"   {os.path.basename(path)}  {size / 1e6:8.2f} MB  {action}")
+            rows.append({'kind': 'segment', 'path': path, 'size_mb': size / 1e6, 'action': action})
+        if VACUUM_CATALOG and not DRY_RUN:
+            vacuum_catalog(db_path)
+
+    if REMOVE_INCOMPLETE_SNAPSHOTS and incomplete:
+        print(f"\n-> {CHROMA_SNAPSHOTS_DIR}: {len(incomplete)} incomplete snapshot(s)")
+        for path in incomplete:
+            size = directory_size(path)
+            state = build_state(path)
+            if state == 'running':
+                keep, action = True, 'kept (build running)'
+            else:
+                # A stale marker means the build died; without one (a build that predates the
+                # marker) fall back to the directory's age
+                keep = state is None and time.time() - os.path.getmtime(path) < MIN_ORPHAN_AGE_SECONDS
+                action = 'kept (too new)' if keep else ('would remove' if DRY_RUN else 'removed')
+            if not keep and not DRY_RUN:
+                shutil.rmtree(path)
+            print(f"   {os.path.basename(path)}  {size / 1e6:8.2f} MB  {action}")
+            rows.append({'kind': 'snapshot', 'path': path, 'size_mb': size / 1e6, 'action': action})
+
+    print("\n--- SUMMARY ---")
+    if not rows:
+        print("Nothing to reclaim.")
+        return
+    summary = pd.DataFrame(rows).groupby(['kind', 'action'])['size_mb'].agg(['count', 'sum'])
+    print(summary.to_string(float_format=lambda x: f"{x:.2f}"))
+
+if __name__ == "__main__":
+    main()
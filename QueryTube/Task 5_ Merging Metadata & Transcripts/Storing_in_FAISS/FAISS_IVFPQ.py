@@ -0,0 +1,117 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+import time
+import faiss
+
+# --- Configuration ---
+INPUT_PATH = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Embedding\Embedded_Merged_Dataset.parquet"
+OUTPUT_DIR = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Storing_in_FAISS"
+FAISS_INDEX_DIR = os.path.join(OUTPUT_DIR, "FAISS_IVFPQ_Index")
+INDEX_FILENAME = "ivfpq.index"
+METADATA_FILENAME = "metadata.parquet"
+CONFIG_FILENAME = "index_config.json"
+# 'embedding_vector' (full 384 dims) or 'embedding_vector_pca' (written by Embedding.py when PCA_DIMENSIONS is set)
+EMBEDDING_COLUMN = 'embedding_vector'
+
+# IVF-PQ parameters
+# nlist: number of coarse clusters (None picks ~4*sqrt(N), capped so each cluster gets enough training points)
+# m: PQ sub-quantizers, must divide the vector dimension (384 -> 16, 24, 32, 48, 64, 96)
+# nbits: bits per sub-quantizer code; m * nbits / 8 bytes are stored per vector
+# nprobe: clusters scanned per query, the default used at search time (the API can override it)
+FAISS_NLIST = None
+FAISS_M = 48
+FAISS_NBITS = 8
+FAISS_NPROBE = 16
+
+def load_embedded_data():
+    print("--- 1. LOADING EMBEDDED DATA ---")
+    try:
+        df = pd.read_parquet(INPUT_PATH)
+        print(f"Loaded embedded data from: {INPUT_PATH}")
+        return df
+    except Exception as e:
+        print(f"FATAL ERROR: Could not load data. {e}")
+        return None
+
+def choose_nlist(n_vectors):
+    """Picks ~4*sqrt(N) clusters, keeping at least 39 training points per cluster (FAISS minimum)."""
+    nlist = int(4 * np.sqrt(n_vectors))
+    return max(1, min(nlist, n_vectors // 39))
+
+def build_faiss_index(df):
+    print("\n--- 2. BUILDING FAISS IVF-PQ INDEX ---")
+    start_time = time.time()
+
+    # Same id handling as ChromaDB_updated.py so both backends return identical ids
+    df = df.copy()
+    df['original_id'] = df['id']
+    if len(df['id']) != len(df['id'].unique()):
+        df['id'] = df.groupby('id').cumcount().astype(str) + '_' + df['id']
+
+    vectors = np.vstack(df[EMBEDDING_COLUMN].to_numpy()).astype(np.float32)
+    # Unit-length vectors make inner product equal to cosine similarity
+    faiss.normalize_L2(vectors)
+    n_vectors, dimension = vectors.shape
+
+    if dimension % FAISS_M != 0:
+        print(f"FATAL ERROR: FAISS_M={FAISS_M} does not divide the vector dimension {dimension}.")
+        return None
+
+    nlist = FAISS_NLIST or choose_nlist(n_vectors)
+    print(f"-> {n_vectors} vectors, {dimension} dims, nlist={nlist}, m={FAISS_M}, nbits={FAISS_NBITS}")
+    if n_vectors < 39 * 2 ** FAISS_NBITS:
+        print(f"   WARNING: PQ training wants at least {39 * 2 ** FAISS_NBITS} vectors; "
+              f"codebooks will be weak on this corpus (consider a lower FAISS_NBITS).")
+
+    quantizer = faiss.IndexFlatIP(dimension)
+    index = faiss.IndexIVFPQ(quantizer, dimension, nlist, FAISS_M, FAISS_NBITS, faiss.METRIC_INNER_PRODUCT)
+    index.train(vectors)
+    index.add(vectors)  # FAISS ids are row positions in metadata.parquet
+    index.nprobe = FAISS_NPROBE
+
+    os.makedirs(FAISS_INDEX_DIR, exist_ok=True)
+    faiss.write_index(index, os.path.join(FAISS_INDEX_DIR, INDEX_FILENAME))
+
+    # Metadata lives next to the index; values are stringified like in Chroma.
+    # Transcripts are served from the transcript store, so they are left out.
+    exclude_columns = ['embedding_vector', 'embedding_vector_pca', 'text_for_embedding', 'transcript']
+    metadata = df[[col for col in df.columns if col not in exclude_columns]].astype(str)
+    metadata = metadata.replace({'nan': '', 'None': ''})
+    metadata.to_parquet(os.path.join(FAISS_INDEX_DIR, METADATA_FILENAME), index=False)
+
+    config = {
+        'embedding_column': EMBEDDING_COLUMN,
+        'count': n_vectors,
+        'dimension': dimension,
+        'nlist': nlist,
+        'm': FAISS_M,
+        'nbits': FAISS_NBITS,
+        'nprobe': FAISS_NPROBE,
+        'metric': 'cosine'
+    }
+    with open(os.path.join(FAISS_INDEX_DIR, CONFIG_FILENAME), 'w') as f:
+        json.dump(config, f, indent=2)
+
+    end_time = time.time()
+    index_size = os.path.getsize(os.path.join(FAISS_INDEX_DIR, INDEX_FILENAME))
+    print(f"-> Index written to: {FAISS_INDEX_DIR}")
+    print(f"-> Index file: {index_size / 1e6:.2f} MB "
+          f"({index_size / n_vectors:.1f} bytes/vector vs {dimension * 4} bytes as float32)")
+    print(f"-> Build complete in {end_time - start_time:.2f} seconds.")
+    return index
+
+def main():
+    df = load_embedded_data()
+    if df is None:
+        return
+
+    index = build_faiss_index(df)
+
+    if index is not None and index.ntotal > 0:
+        print("\n--- FAISS INDEX BUILD COMPLETE ---")
+        print(f"Set SEARCH_BACKEND = 'faiss' in app.py to serve from: {FAISS_INDEX_DIR}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+import time
+import zlib
+import uuid
+import shutil
+
+# --- Configuration ---
+INPUT_PATH = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Embedding\Embedded_Merged_Dataset.parquet"
+OUTPUT_DIR = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Storing_in_NumPy"
+NUMPY_INDEX_DIR = os.path.join(OUTPUT_DIR, "NumPy_Matrix_Index")
+MATRIX_FILENAME = "embeddings.npy"
+METADATA_FILENAME = "metadata.parquet"
+CONFIG_FILENAME = "index_config.json"
+# 'embedding_vector' (full 384 dims) or 'embedding_vector_pca' (written by Embedding.py when PCA_DIMENSIONS is set)
+EMBEDDING_COLUMN = 'embedding_vector'
+
+# Sharding: with N_SHARDS > 1 the corpus is also split into N_SHARDS independent matrix directories
+# under NUMPY_SHARDS_DIR (served with SEARCH_BACKEND = 'sharded', which queries them in parallel).
+# SHARD_KEY 'original_id' hashes each video to a shard (even sizes); 'channel_id' keeps every
+# video of a channel in the same shard.
+N_SHARDS = 1
+SHARD_KEY = 'original_id'
+NUMPY_SHARDS_DIR = os.path.join(OUTPUT_DIR, "NumPy_Sharded_Index")
+SHARDS_MANIFEST_FILENAME = "shards.json"
+
+# The matrix is written as a plain .npy file so every API worker can np.load(..., mmap_mode='r') it:
+# the pages live once in the OS page cache and are mapped into each worker instead of copied.
+# Searching it is exact (a brute-force matrix-vector product), which is fast up to ~1M vectors.
+
+def load_embedded_data():
+    print("--- 1. LOADING EMBEDDED DATA ---")
+    try:
+        df = pd.read_parquet(INPUT_PATH)
+        print(f"Loaded embedded data from: {INPUT_PATH}")
+        return df
+    except Exception as e:
+        print(f"FATAL ERROR: Could not load data. {e}")
+        return None
+
+def prepare_rows(df):
+    """Same id handling as ChromaDB_updated.py so every backend (and every shard) returns identical ids."""
+    df = df.copy()
+    df['original_id'] = df['id']
+    if len(df['id']) != len(df['id'].unique()):
+        df['id'] = df.groupby('id').cumcount().astype(str) + '_' + df['id']
+    return df
+
+def write_matrix_files(df, index_dir):
+    """Writes the matrix, metadata and config of one index directory; returns (n_vectors, dimension)."""
+    vectors = np.vstack(df[EMBEDDING_COLUMN].to_numpy()).astype(np.float32)
+    # Unit-length rows make the dot product equal to cosine similarity
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    n_vectors, dimension = vectors.shape
+
+    os.makedirs(index_dir, exist_ok=True)
+    # Written to a temp file and renamed, so workers that already mapped the old matrix keep a valid file
+    tmp_path = os.path.join(index_dir, MATRIX_FILENAME + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.ascontiguousarray(vectors))
+    os.replace(tmp_path, os.path.join(index_dir, MATRIX_FILENAME))
+
+    # Metadata lives next to the matrix; values are stringified like in Chroma.
+    # Transcripts are served from the transcript store, so they are left out.
+    exclude_columns = ['embedding_vector', 'embedding_vector_pca', 'text_for_embedding', 'transcript']
+    metadata = df[[col for col in df.columns if col not in exclude_columns]].astype(str)
+    metadata = metadata.replace({'nan': '', 'None': ''})
+    metadata.to_parquet(os.path.join(index_dir, METADATA_FILENAME), index=False)
+
+    config = {
+        'embedding_column': EMBEDDING_COLUMN,
+        'count': n_vectors,
+        'dimension': dimension,
+        'dtype': 'float32',
+        'metric': 'cosine'
+    }
+    with open(os.path.join(index_dir, CONFIG_FILENAME), 'w') as f:
+        json.dump(config, f, indent=2)
+    return n_vectors, dimension
+
+def write_matrix_index(df):
+    print("\n--- 2. WRITING EMBEDDING MATRIX ---")
+    start_time = time.time()
+
+    n_vectors, dimension = write_matrix_files(prepare_rows(df), NUMPY_INDEX_DIR)
+
+    end_time = time.time()
+    matrix_size = os.path.getsize(os.path.join(NUMPY_INDEX_DIR, MATRIX_FILENAME))
+    print(f"-> {n_vectors} vectors, {dimension} dims written to: {NUMPY_INDEX_DIR}")
+    print(f"-> Matrix file: {matrix_size / 1e6:.2f} MB")
+    print(f"-> Write complete in {end_time - start_time:.2f} seconds.")
+    return n_vectors
+
+def shard_of(key, n_shards):
+    """Stable shard number for a key (crc32, unlike hash(), is the same in every process and run)."""
+    return zlib.crc32(str(key).encode('utf-8')) % n_shards
+
+def write_sharded_index(df):
+    print(f"\n--- 3. WRITING {N_SHARDS} SHARDS (by {SHARD_KEY}) ---")
+    start_time = time.time()
+
+    df = prepare_rows(df)
+    if SHARD_KEY not in df.columns:
+        print(f"FATAL ERROR: shard key column '{SHARD_KEY}' not found.")
+        return 0
+    assignment = df[SHARD_KEY].map(lambda key: shard_of(key, N_SHARDS))
+
+    # Built next to the live directory and swapped in once every shard is complete
+    tmp_dir = NUMPY_SHARDS_DIR + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    shards = []
+    dimension = None
+    for shard in range(N_SHARDS):
+        name = f"shard_{shard:03d}"
+        if not (assignment == shard).any():
+            # Possible with SHARD_KEY = 'channel_id' and few channels; an empty shard is left out
+            print(f"-> {name}: empty, skipped")
+            continue
+        n_vectors, shard_dimension = write_matrix_files(df[assignment == shard], os.path.join(tmp_dir, name))
+        if dimension is not None and shard_dimension != dimension:
+            print(f"FATAL ERROR: {name} has {shard_dimension} dims, the previous shards {dimension}.")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return 0
+        dimension = shard_dimension
+        shards.append({'dir': name, 'count': n_vectors})
+        print(f"-> {name}: {n_vectors} vectors")
+
+    if dimension is None:
+        print("FATAL ERROR: every shard is empty; nothing was written.")
+        return 0
+
+    manifest = {'n_shards': N_SHARDS, 'shard_key': SHARD_KEY, 'count': len(df), 'dimension': dimension, 'shards': shards}
+    with open(os.path.join(tmp_dir, SHARDS_MANIFEST_FILENAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    # The old index is moved aside before the new one is renamed in and only then deleted, so a
+    # crash during the swap leaves it on disk (as .old-*) rather than no index at all
+    old_dir = f"{NUMPY_SHARDS_DIR}.old-{uuid.uuid4().hex[:8]}"
+    if os.path.exists(NUMPY_SHARDS_DIR):
+        os.replace(NUMPY_SHARDS_DIR, old_dir)
+    os.replace(tmp_dir, NUMPY_SHARDS_DIR)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    print(f"-> {len(df)} vectors in {N_SHARDS} shards written to: {NUMPY_SHARDS_DIR}")
+    print(f"-> Write complete in {time.time() - start_time:.2f} seconds.")
+    return len(df)
+
+def main():
+    df = load_embedded_data()
+    if df is None:
+        return
+
+    n_vectors = write_matrix_index(df)
+
+    if n_vectors:
+        print("\n--- EMBEDDING MATRIX COMPLETE ---")
+        print(f"Set SEARCH_BACKEND = 'numpy' in app.py to serve from: {NUMPY_INDEX_DIR}")
+
+    if N_SHARDS > 1 and write_sharded_index(df):
+        print("\n--- SHARDED INDEX COMPLETE ---")
+        print(f"Set SEARCH_BACKEND = 'sharded' in app.py to serve from: {NUMPY_SHARDS_DIR}")
+
+if __name__ == "__main__":
+    main()
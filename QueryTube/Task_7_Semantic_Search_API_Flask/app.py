@@ -1,10 +1,26 @@
 import os
 import time
+import atexit
 import json
-from flask import Flask, request, jsonify
-from chromadb import PersistentClient
+import hashlib
+import sqlite3
+import shutil
+import tempfile
+import threading
+import tracemalloc
+from datetime import datetime, timezone
+from flask import Flask, Blueprint, request, jsonify, g, current_app
 import numpy as np
-from flask_cors import CORS
+from metadata_store import MetadataStore, FEED_ORDERS, SORT_KEYS
+from index_snapshots import EngineManager, resolve_current_snapshot, make_read_only_copy
+from transcript_store import TranscriptStore, TRANSCRIPT_STORE_DIRNAME, transcript_page
+from memory_accounting import process_memory, files_size, tracemalloc_summary
+from request_profiling import stage, profile_call
+from request_deadlines import Deadline, remaining_ms, expired
+from semantic_cache import SemanticQueryCache, normalize_query
+from query_log import QueryLog
+from encoder_service import EncoderClient, EncoderUnavailable
+from pca_projection import load_pca_projection, apply_pca_projection
 
 def safe_int_convert(value, default=0):
     """Safely convert a value to int, handling empty strings and invalid values."""
@@ -24,77 +40,609 @@ def safe_float_convert(value, default=0.0):
     except (ValueError, TypeError):
         return default
 CHROMA_BASE_PATH = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Storing_in_ChromaDB"
-CHROMA_DB_PATH = os.path.join(CHROMA_BASE_PATH, "ChromaDB_Collection_Updated")
-COLLECTION_NAME = "youtube_analysis_collection"
+# QUERYTUBE_* environment variables override the defaults (used by Benchmarks/load_test.py)
+CHROMA_DB_PATH = os.environ.get("QUERYTUBE_CHROMA_DB_PATH", os.path.join(CHROMA_BASE_PATH, "ChromaDB_Collection_Updated"))
+COLLECTION_NAME = os.environ.get("QUERYTUBE_COLLECTION_NAME", "youtube_analysis_collection")
+API_PORT = int(os.environ.get("QUERYTUBE_PORT", 5000))
+# Blue/green snapshots published by ChromaDB_updated.py (SNAPSHOT_MODE). When set, the 'chroma'
+# backend serves the snapshot CURRENT points at and hot-swaps to newer ones without a restart
+# (other backends ignore it).
+CHROMA_SNAPSHOTS_DIR = os.environ.get("QUERYTUBE_CHROMA_SNAPSHOTS_DIR")
+SNAPSHOT_POLL_SECONDS = int(os.environ.get("QUERYTUBE_SNAPSHOT_POLL_SECONDS", 10))
+# Read-only serving: each process opens a private copy of the Chroma collection (or snapshot) made
+# under READ_ONLY_WORK_DIR, so serving never locks or writes the files ingest and the other workers
+# use. The faiss and numpy backends always open their files read-only (mmap), so this only affects 'chroma'.
+READ_ONLY_SERVING = os.environ.get("QUERYTUBE_READ_ONLY", "0") == "1"
+READ_ONLY_WORK_DIR = os.environ.get("QUERYTUBE_READ_ONLY_WORK_DIR", os.path.join(tempfile.gettempdir(), "querytube_read_only"))
+# Token required in the X-Admin-Token header by /admin/* and /debug/* endpoints (disabled when unset)
+ADMIN_TOKEN = os.environ.get("QUERYTUBE_ADMIN_TOKEN")
+# Start tracemalloc at launch so /debug/memory can attribute Python-heap allocations
+# (costs roughly 2x on allocations; leave off unless investigating memory growth)
+TRACEMALLOC_FRAMES = int(os.environ.get("QUERYTUBE_TRACEMALLOC", 0))
+if TRACEMALLOC_FRAMES and not tracemalloc.is_tracing():
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+# /search?profile=1 (admin only): number of functions listed, and where the .prof files go (None = not saved)
+PROFILE_TOP_FRAMES = 25
+PROFILE_DIR = os.environ.get("QUERYTUBE_PROFILE_DIR")
+# PCA projection written by Embedding.py; only applied when the collection holds projected vectors
+EMBEDDING_BASE_PATH = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Embedding"
+PCA_PROJECTION_PATH = os.path.join(EMBEDDING_BASE_PATH, "pca_projection.npz")
+
+# Vector index backend: 'chroma' (persistent ChromaDB collection opened in-process, for a single
+# process), 'chroma_http' (a Chroma server, e.g. `chroma run --path <CHROMA_DB_PATH>`, shared by all
+# workers), 'faiss' (IVF-PQ index built by FAISS_IVFPQ.py), 'numpy' (exact search over the
+# memory-mapped matrix written by NumPy_matrix.py) or 'sharded' (NumPy_matrix.py with N_SHARDS > 1:
+# every shard is searched in parallel and the top results merged)
+SEARCH_BACKEND = os.environ.get("QUERYTUBE_SEARCH_BACKEND", "chroma")
+CHROMA_SERVER_HOST = os.environ.get("QUERYTUBE_CHROMA_HOST", "localhost")
+CHROMA_SERVER_PORT = int(os.environ.get("QUERYTUBE_CHROMA_PORT", 8000))
+CHROMA_SERVER_SSL = False
+# Per-request timeouts, connections kept open per worker, and retries of failed reads (with backoff)
+CHROMA_HTTP_TIMEOUT_SECONDS = 10.0
+CHROMA_HTTP_CONNECT_TIMEOUT_SECONDS = 2.0
+CHROMA_HTTP_POOL_SIZE = 16
+CHROMA_HTTP_RETRIES = 2
+FAISS_INDEX_DIR = r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Storing_in_FAISS\FAISS_IVFPQ_Index"
+FAISS_NPROBE = None  # None uses the nprobe stored with the index
+NUMPY_INDEX_DIR = os.environ.get("QUERYTUBE_NUMPY_INDEX_DIR", r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Storing_in_NumPy\NumPy_Matrix_Index")
+SHARDS_DIR = os.environ.get("QUERYTUBE_SHARDS_DIR", r"C:\Users\dream\Desktop\Internships\Infosys Springboard\QueryTube\Task 5_ Merging Metadata & Transcripts\Storing_in_NumPy\NumPy_Sharded_Index")
+SHARD_QUERY_THREADS = None  # None = one thread per shard
+# Directory where the metadata store's arrays (typed columns, feed orders, facet bitmaps) are saved
+# once per index version and memory-mapped, so all worker processes share one copy (None = per-process copies).
+# The first worker on a new index version builds them and removes the directories of older versions.
+SHARED_ARRAYS_DIR = os.environ.get("QUERYTUBE_SHARED_ARRAYS_DIR")
+# Number of top results re-sorted when a search asks for sort=views/likes/date/duration
+SORT_CANDIDATE_POOL = 200
+
+# Time budget of a search in ms (0 = none). Clients can ask for their own with deadline_ms, capped at
+# MAX_DEADLINE_MS. Optional stages (the re-sort pool, the sort) are skipped once the budget is spent
+# and the response is marked partial. Once the query vector exists the page is always fetched.
+DEFAULT_DEADLINE_MS = int(os.environ.get("QUERYTUBE_DEADLINE_MS", 1000))
+MAX_DEADLINE_MS = 5000
+# With less budget than this left after encoding, a sorted search re-sorts only the requested page
+# instead of fetching the whole SORT_CANDIDATE_POOL
+SORT_POOL_MIN_REMAINING_MS = 50
+
+# Semantic query cache: rankings of the last QUERY_CACHE_SIZE queries (0 disables it), reused for the
+# same normalized text or for a query whose vector is within QUERY_CACHE_THRESHOLD cosine similarity.
+# QUERY_CACHE_AUDIT_RATE of the similarity hits are re-run against the index to measure false hits.
+QUERY_CACHE_SIZE = int(os.environ.get("QUERYTUBE_QUERY_CACHE_SIZE", 1024))
+QUERY_CACHE_THRESHOLD = float(os.environ.get("QUERYTUBE_QUERY_CACHE_THRESHOLD", 0.95))
+QUERY_CACHE_AUDIT_RATE = 0.02
+QUERY_CACHE_AUDIT_MIN_OVERLAP = 0.7  # share of the top 10 a hit must have in common with the fresh results
+
+# Anonymized search log (normalized query, latency, result count), one rotating JSONL file per worker
+# under QUERY_LOG_DIR (None disables it). prewarm_queries.py turns it into PREWARM_PATH: the top
+# queries with their vectors, whose rankings are loaded into the query cache at startup.
+QUERY_LOG_DIR = os.environ.get("QUERYTUBE_QUERY_LOG_DIR")
+QUERY_LOG_MAX_BYTES = 50_000_000
+QUERY_LOG_BACKUPS = 5
+PREWARM_PATH = os.environ.get("QUERYTUBE_PREWARM_PATH")
+PREWARM_BATCH_SIZE = 64
+
+# Number of top results whose facet counts /facets reports for a query
+FACET_CANDIDATE_POOL = 200
+
+# HTTP caching: responses carry an ETag derived from the index version and request parameters
+CACHE_MAX_AGE_SECONDS = int(os.environ.get("QUERYTUBE_CACHE_MAX_AGE", 300))
+
+# Transcript sidecar written by ChromaDB_updated.py (None = the 'transcripts' directory inside the
+# Chroma collection or snapshot being served). Collections ingested before the sidecar existed
+# fall back to the transcript kept in their metadata.
+TRANSCRIPT_STORE_DIR = os.environ.get("QUERYTUBE_TRANSCRIPT_STORE_DIR")
+TRANSCRIPT_PAGE_CHARS = 5000        # default page size for character paging
+TRANSCRIPT_MAX_PAGE_CHARS = 50000
+TRANSCRIPT_SEGMENT_CHARS = 1000     # approximate segment size for segment paging
+
+# Load the query encoder (ONNX session) on a background thread while the index and metadata
+# load, so the replica is warm when it starts answering instead of on its first search
+WARM_UP_ENCODER = True
+
+# Unix socket of the shared query encoder (encoder_service.py). When set, query vectors come
+# from that one process instead of a model loaded in every worker; if it is down, the worker
+# loads the model and encodes in-process until the service answers again.
+ENCODER_SOCKET = os.environ.get("QUERYTUBE_ENCODER_SOCKET")
+ENCODER_TIMEOUT_SECONDS = 2.0
+
+# HNSW ef at query time for the Chroma backend (None keeps the value set at ingest).
+# Applied at startup, before the index is loaded; the new value is persisted with the collection.
+HNSW_SEARCH_EF = None
+
+def collection_distance_space(collection):
+    """Returns the distance space of a Chroma collection ('l2' unless set at creation)."""
+    configuration = getattr(collection, 'configuration', None) or {}
+    hnsw = configuration.get('hnsw') if isinstance(configuration, dict) else None
+    if hnsw and hnsw.get('space'):
+        return hnsw['space']
+    return (collection.metadata or {}).get('hnsw:space', 'l2')
+
+def distance_to_similarity(distance, space):
+    """
+    Converts a distance between unit-length vectors to a 0-1 similarity (1 = best match).
+    cosine: distance = 1 - cos, in [0, 2];  l2: squared distance = 2 - 2*cos, in [0, 4];
+    ip: distance = 1 - dot, in [0, 2].
+    """
+    if space == 'l2':
+        return max(0, min(1, (4 - distance) / 4))
+    return max(0, min(1, (2 - distance) / 2))
 
 class VideoSearchEngine:
     """
     Initializes the ChromaDB client and handles all semantic search logic.
     """
-    def __init__(self):
-        if not os.path.exists(CHROMA_DB_PATH):
-            raise FileNotFoundError(f"ChromaDB collection not found at {CHROMA_DB_PATH}")
-        
-        # Initialize client to load the existing database persistently
-        self.client = PersistentClient(path=CHROMA_DB_PATH)
-        self.collection = self.client.get_collection(name=COLLECTION_NAME)
+    def __init__(self, backend=None, chroma_path=None, snapshot_manifest=None):
+        # Read at construction, not import, so settings changed after import (tests, relevance_eval.py) apply
+        self.backend = backend = backend or SEARCH_BACKEND
+        self.startup_timings = {}
+        chroma_path = chroma_path or CHROMA_DB_PATH
+        if backend == 'chroma' and not os.path.exists(chroma_path):
+            raise FileNotFoundError(f"ChromaDB collection not found at {chroma_path}")
+
+        # chromadb is imported here rather than at module level: it is the slowest import by far
+        with stage(self.startup_timings, 'import_chromadb_ms'):
+            from chromadb.utils import embedding_functions
+
+        # Query vectors are encoded here (same all-MiniLM-L6-v2 model Chroma uses by default)
+        # so they can be projected to the indexed dimension before the ANN lookup. One
+        # ONNXMiniLM_L6_V2 is kept: DefaultEmbeddingFunction builds a new one, and so opens a new
+        # ONNX session, on every call
+        self.embedding_function = embedding_functions.ONNXMiniLM_L6_V2()
+        self.encoder_client = EncoderClient(ENCODER_SOCKET, timeout=ENCODER_TIMEOUT_SECONDS) if ENCODER_SOCKET else None
+        encoder_thread = None
+        if WARM_UP_ENCODER:
+            encoder_thread = threading.Thread(target=self._warm_up_encoder, name="encoder-warmup", daemon=True)
+            encoder_thread.start()
+
+        self.working_copy = None
+        with stage(self.startup_timings, 'open_index_ms'):
+            self._open_index(backend, chroma_path)
 
-    def search(self, query: str, offset: int = 0, limit: int = 10):
+        self.index_version, self.index_modified_at = self._index_fingerprint()
+        if snapshot_manifest:
+            # Published snapshots carry their own version, so caches are invalidated per snapshot
+            self.index_version = snapshot_manifest['version']
+        print(f"-> Serving index version {self.index_version}")
+
+        # Metadata for hydration plus the precomputed home-feed orderings
+        arrays_dir = os.path.join(SHARED_ARRAYS_DIR, f"{self.backend}_{self.index_version}") if SHARED_ARRAYS_DIR else None
+        with stage(self.startup_timings, 'metadata_store_ms'):
+            self.metadata_store = MetadataStore.from_collection(self.collection, arrays_dir=arrays_dir)
+        if hasattr(self.collection, 'release_metadata'):
+            # The faiss/numpy/sharded backends load metadata.parquet into a frame for get(); searches
+            # are hydrated from the store, so that copy is only dead weight from here on
+            self.collection.release_metadata()
+        print(f"-> Metadata store loaded ({self.metadata_store.count()} videos"
+              f"{', shared arrays' if self.metadata_store.shared_arrays else ''})")
+
+        self.transcript_store = None
+        transcript_dir = TRANSCRIPT_STORE_DIR or os.path.join(chroma_path, TRANSCRIPT_STORE_DIRNAME)
+        if os.path.exists(transcript_dir):
+            self.transcript_store = TranscriptStore(transcript_dir)
+            print(f"-> Transcript store loaded ({self.transcript_store.count()} transcripts)")
+
+        self.pca_projection = None
+        projection = load_pca_projection(PCA_PROJECTION_PATH)
+        if projection is not None:
+            indexed_dim = self._indexed_dimension()
+            if indexed_dim == len(projection['components']):
+                self.pca_projection = projection
+                print(f"-> Applying PCA projection to query vectors ({indexed_dim} dims)")
+
+        self.query_cache = None
+        if QUERY_CACHE_SIZE:
+            # Cached vectors are compared with encode_query() output, i.e. in the indexed dimension
+            query_dim = self._indexed_dimension()
+            if query_dim:
+                self.query_cache = SemanticQueryCache(query_dim, capacity=QUERY_CACHE_SIZE, threshold=QUERY_CACHE_THRESHOLD,
+                                                      audit_rate=QUERY_CACHE_AUDIT_RATE,
+                                                      audit_min_overlap=QUERY_CACHE_AUDIT_MIN_OVERLAP)
+                if PREWARM_PATH and os.path.exists(PREWARM_PATH):
+                    # Off the startup path: searches are served (and cached) normally meanwhile
+                    threading.Thread(target=self.prewarm_query_cache, args=(PREWARM_PATH,),
+                                     name="query-cache-prewarm", daemon=True).start()
+
+        if encoder_thread is not None:
+            with stage(self.startup_timings, 'encoder_wait_ms'):
+                encoder_thread.join()
+
+    def _open_index(self, backend, chroma_path):
+        if backend == 'faiss':
+            from vector_backends import FaissIVFPQBackend
+            # Drop-in replacement for the Chroma collection (count/get/query)
+            self.client = None
+            self.collection = FaissIVFPQBackend(FAISS_INDEX_DIR, nprobe=FAISS_NPROBE)
+            self.distance_space = 'cosine'
+        elif backend == 'numpy':
+            from vector_backends import NumpyMatrixBackend
+            self.client = None
+            self.collection = NumpyMatrixBackend(NUMPY_INDEX_DIR)
+            self.distance_space = 'cosine'
+        elif backend == 'sharded':
+            from vector_backends import ShardedBackend
+            self.client = None
+            self.collection = ShardedBackend(SHARDS_DIR, max_workers=SHARD_QUERY_THREADS)
+            self.distance_space = 'cosine'
+            print(f"-> Serving {len(self.collection.shards)} shards "
+                  f"(by {self.collection.manifest['shard_key']}) from {SHARDS_DIR}")
+        elif backend == 'chroma_http':
+            from vector_backends import open_chroma_http_collection
+            # The server owns the sqlite and HNSW files; this process only holds pooled connections
+            self.chroma_path = None
+            self.client, self.collection = open_chroma_http_collection(
+                CHROMA_SERVER_HOST, CHROMA_SERVER_PORT, COLLECTION_NAME, ssl=CHROMA_SERVER_SSL,
+                timeout_seconds=CHROMA_HTTP_TIMEOUT_SECONDS, connect_timeout_seconds=CHROMA_HTTP_CONNECT_TIMEOUT_SECONDS,
+                pool_size=CHROMA_HTTP_POOL_SIZE, retries=CHROMA_HTTP_RETRIES)
+            self.distance_space = collection_distance_space(self.collection)
+            if self.distance_space != 'cosine':
+                print(f"WARNING: collection uses '{self.distance_space}' distance; re-ingest to get cosine space.")
+        elif backend == 'chroma':
+            from chromadb import PersistentClient
+            # Initialize client to load the existing database persistently
+            self.chroma_path = chroma_path
+            if READ_ONLY_SERVING:
+                self.working_copy = make_read_only_copy(chroma_path, READ_ONLY_WORK_DIR)
+                print(f"-> Serving a read-only copy of {chroma_path} from {self.working_copy}")
+                atexit.register(shutil.rmtree, self.working_copy, ignore_errors=True)
+            self.client = PersistentClient(path=self.working_copy or chroma_path)
+            self.collection = self.client.get_collection(name=COLLECTION_NAME)
+            self.distance_space = collection_distance_space(self.collection)
+            if self.distance_space != 'cosine':
+                print(f"WARNING: collection uses '{self.distance_space}' distance; re-ingest to get cosine space.")
+            if HNSW_SEARCH_EF:
+                self.set_search_ef(HNSW_SEARCH_EF)
+        else:
+            raise ValueError(f"Unknown search backend: {backend}")
+
+    def _warm_up_encoder(self):
+        """Encodes a dummy query so the model (or the encoder service) is ready before the first real search."""
+        start = time.perf_counter()
+        if self.encoder_client is not None:
+            try:
+                self.encoder_client.encode(["warm up"])
+                self.startup_timings['encoder_load_ms'] = round((time.perf_counter() - start) * 1000, 3)
+                return
+            except EncoderUnavailable as e:
+                print(f"WARNING: {e}; loading the query encoder in-process")
+        try:
+            self.embedding_function(["warm up"])
+            self.startup_timings['encoder_load_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        except Exception as e:
+            print(f"WARNING: query encoder warm-up failed, it will load on the first search: {e}")
+
+    def close(self):
+        """Releases the index once this engine has been swapped out and drained."""
+        if self.client is not None and hasattr(self.client, 'close'):
+            self.client.close()
+        if self.transcript_store is not None:
+            self.transcript_store.close()
+        if self.encoder_client is not None:
+            self.encoder_client.close()
+        if self.working_copy is not None:
+            shutil.rmtree(self.working_copy, ignore_errors=True)
+        if self.backend == 'sharded':
+            self.collection.close()  # stops the shard query threads
+        self.client = None
+        self.collection = None
+        self.transcript_store = None
+
+    def _encoder_memory(self):
+        """
+        Size of the query encoder's weights: the model.onnx file of the ONNXMiniLM_L6_V2 instance, once
+        its session is open (ONNX runtime memory is native, so the model file size stands in for it).
+        """
+        encoder = self.embedding_function
+        loaded = 'model' in vars(encoder)  # the ONNX session is a cached_property, kept on the instance once opened
+        weights = 0
+        if hasattr(encoder, 'DOWNLOAD_PATH'):
+            weights = files_size([os.path.join(encoder.DOWNLOAD_PATH, encoder.EXTRACTED_FOLDER_NAME, "model.onnx")])
+        report = {'bytes': weights if loaded else 0, 'loaded': loaded, 'model_file_bytes': weights}
+        if self.encoder_client is not None:
+            # The service's model lives in its own process and is not counted here
+            report['service'] = {'socket': self.encoder_client.socket_path, 'available': self.encoder_client.available()}
+        return report
+
+    def _index_memory(self):
+        """Vector index size: the backend reports it, or the HNSW segment files Chroma loads fully into memory."""
+        if hasattr(self.collection, 'memory_usage'):
+            return self.collection.memory_usage()
+        if self.chroma_path is None:
+            # The HNSW index lives in the Chroma server process
+            return {'bytes': 0, 'vectors': self.collection.count(), 'server': f"{CHROMA_SERVER_HOST}:{CHROMA_SERVER_PORT}"}
+        chroma_path = self.working_copy or self.chroma_path
+        catalog = os.path.join(chroma_path, "chroma.sqlite3")
+        with sqlite3.connect(f"file:{catalog}?mode=ro", uri=True) as conn:
+            segments = [row[0] for row in conn.execute(
+                "SELECT id FROM segments WHERE collection = ? AND scope = 'VECTOR'", (str(self.collection.id),))]
+        hnsw_bytes = files_size([os.path.join(chroma_path, segment) for segment in segments])
+        return {'bytes': hnsw_bytes, 'vectors': self.collection.count(), 'hnsw_segment_bytes': hnsw_bytes}
+
+    def memory_report(self):
+        """Per-component memory, as reported by each component (approximate, see memory_accounting)."""
+        metadata = self.metadata_store.memory_usage()
+        components = {
+            'encoder': self._encoder_memory(),
+            'index': self._index_memory(),
+            'metadata_store': {key: value for key, value in metadata.items() if key != 'caches'},
+            'transcript_store': self.transcript_store.memory_usage() if self.transcript_store is not None
+                                else {'bytes': 0, 'loaded': False},
+            'pca_projection': {'bytes': sum(value.nbytes for value in self.pca_projection.values()
+                                            if isinstance(value, np.ndarray)) if self.pca_projection else 0}
+        }
+        caches = dict(metadata['caches'])
+        if self.query_cache is not None:
+            caches['semantic_query_cache'] = self.query_cache.memory_usage()
+        return {'index_version': self.index_version, 'components': components, 'caches': caches}
+
+    def set_search_ef(self, search_ef):
+        """Changes the HNSW ef used at query time (Chroma backend only)."""
+        self.collection.modify(configuration={"hnsw": {"ef_search": int(search_ef)}})
+        print(f"-> HNSW search_ef set to {search_ef}")
+
+    def _index_fingerprint(self):
+        """
+        Stamps the loaded index with a version id and its last modification time. The id only
+        changes when the index does, so every worker and restart serving it sends the same ETags.
+        Index directories are only ever opened read-only, so their files' sizes and mtimes are
+        used. Chroma rewrites its files (sqlite and HNSW) whenever a client opens them, so a
+        collection is identified by its id, size and write-log position plus the HNSW file sizes.
+        """
+        identity = [self.backend, str(self.collection.count())]
+        modified_at = 0.0
+        if hasattr(self.collection, 'index_files'):
+            for path in self.collection.index_files:
+                if os.path.exists(path):
+                    stat = os.stat(path)
+                    identity.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+                    modified_at = max(modified_at, stat.st_mtime)
+        else:
+            # Served over HTTP there are no local files; the collection id and size identify it
+            identity += [str(self.collection.id), self.collection.name]
+            if self.chroma_path:
+                log_position, modified_at, segment_files = self._chroma_write_state()
+                identity.append(str(log_position))
+                identity += [f"{name}:{size}" for name, size in segment_files]
+        version = hashlib.sha1("|".join(identity).encode('utf-8')).hexdigest()[:16]
+        return version, datetime.fromtimestamp(int(modified_at or time.time()), tz=timezone.utc)
+
+    def _chroma_write_state(self):
+        """
+        Reads, from the catalog of the collection being served: the last write-log sequence number
+        applied to its segments, the time of its last logged write (0 if the log was purged), and
+        the (segment/file, size) of its HNSW files. None of these change unless the collection is written.
+        """
+        chroma_path = self.working_copy or self.chroma_path
+        catalog = os.path.join(chroma_path, "chroma.sqlite3")
+        collection_id = str(self.collection.id)
+        with sqlite3.connect(f"file:{catalog}?mode=ro", uri=True) as conn:
+            segments = conn.execute("SELECT id, scope FROM segments WHERE collection = ?", (collection_id,)).fetchall()
+            placeholders = ",".join("?" * len(segments))
+            log_position = sorted(repr(row[0]) for row in conn.execute(
+                f"SELECT seq_id FROM max_seq_id WHERE segment_id IN ({placeholders})", [segment for segment, _ in segments]))
+            last_write = conn.execute("SELECT MAX(created_at) FROM embeddings_queue WHERE topic LIKE ?",
+                                      (f"%{collection_id}",)).fetchone()[0]
+        modified_at = datetime.strptime(last_write, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp() \
+            if last_write else 0.0
+        segment_files = []
+        for segment, scope in segments:
+            segment_dir = os.path.join(chroma_path, segment)
+            if scope == 'VECTOR' and os.path.isdir(segment_dir):
+                segment_files += [(f"{segment}/{name}", os.path.getsize(os.path.join(segment_dir, name)))
+                                  for name in sorted(os.listdir(segment_dir))]
+        return log_position, modified_at, segment_files
+
+    def ranked_candidates(self, query: str, n_results: int, pool_size: int = 0, deadline=None, timings=None,
+                          use_cache=True):
+        """
+        (ids, distances, reused_from) of a query's top candidates, best first: n_results of them, or
+        pool_size when the deadline leaves time to fetch a re-sort pool. Served from the semantic query
+        cache when the same or a close enough query was answered recently; otherwise the query is
+        encoded and run against the index, and the ranking is cached. reused_from is the cached query
+        whose ranking was reused for a close enough query, None when the ranking is the query's own. Once the query vector exists the page is
+        always fetched, even past the deadline (only the re-sort pool is dropped); returns None only
+        when the deadline ran out before there was a vector. use_cache=False skips the cache lookups
+        (the fresh ranking is still cached), so every stage runs.
+        """
+        total = self.metadata_store.count()
+        n_results = min(n_results, total)
+        wanted = min(max(n_results, pool_size), total)
+        key = normalize_query(query)
+        if self.query_cache is not None and use_cache:
+            hit = self.query_cache.get(key, wanted)
+            if hit is not None:
+                return hit.ids, hit.distances, None
+
+        with stage(timings, 'encode_ms'):
+            query_vector = self.encode_query(query, deadline)
+        if query_vector is None:
+            deadline.degrade('encode')
+            return None
+
+        audited_hit = None
+        if self.query_cache is not None and use_cache:
+            hit = self.query_cache.get_similar(query_vector, wanted)
+            if hit is not None:
+                if not self.query_cache.should_audit():
+                    return hit.ids, hit.distances, hit.key
+                audited_hit = hit
+
+        if wanted > n_results:
+            # The vector is paid for, so the page is always fetched; only the larger re-sort pool is skipped
+            budget_ms = remaining_ms(deadline)
+            if budget_ms is not None and budget_ms < SORT_POOL_MIN_REMAINING_MS:
+                deadline.degrade('sort_pool')
+                wanted = n_results
+
+        with stage(timings, 'ann_query_ms'):
+            # Metadata is hydrated from the in-memory store, so the index only returns ids and distances
+            results = self.collection.query(query_embeddings=[query_vector.tolist()], n_results=wanted,
+                                            include=['distances'])
+        ids, distances = results['ids'][0], results['distances'][0]
+        if self.query_cache is not None:
+            if audited_hit is not None:
+                self.query_cache.record_audit(key, audited_hit, ids)
+            self.query_cache.put(key, query_vector, ids, distances)
+        return ids, distances, None
+
+    def prewarm_query_cache(self, path):
+        """
+        Loads the queries and vectors written by prewarm_queries.py and caches their rankings
+        (SORT_CANDIDATE_POOL deep, so sorted searches hit too), most frequent first. The vectors
+        are precomputed, so this only runs batched ANN queries.
+        """
+        start = time.perf_counter()
+        try:
+            with np.load(path) as data:
+                queries, vectors = data['queries'].tolist(), data['vectors']
+            if self.pca_projection is not None:
+                vectors = apply_pca_projection(vectors, self.pca_projection)
+            if vectors.shape[1] != self.query_cache.vectors.shape[1]:
+                print(f"WARNING: prewarm vectors have {vectors.shape[1]} dims, the index {self.query_cache.vectors.shape[1]}; "
+                      f"rerun prewarm_queries.py")
+                return
+            # Never more than the cache holds, or the least frequent would evict the most frequent
+            queries, vectors = queries[:self.query_cache.capacity], vectors[:self.query_cache.capacity]
+            n_results = min(SORT_CANDIDATE_POOL, self.metadata_store.count())
+            for batch_start in range(0, len(queries), PREWARM_BATCH_SIZE):
+                batch = vectors[batch_start:batch_start + PREWARM_BATCH_SIZE]
+                results = self.collection.query(query_embeddings=batch.tolist(), n_results=n_results, include=['distances'])
+                for offset, (ids, distances) in enumerate(zip(results['ids'], results['distances'])):
+                    self.query_cache.put(normalize_query(queries[batch_start + offset]), batch[offset], ids, distances)
+            self.startup_timings['prewarm_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            print(f"-> Query cache prewarmed with {len(queries)} queries in {self.startup_timings['prewarm_ms'] / 1000:.2f}s")
+        except Exception as e:
+            print(f"WARNING: query cache prewarm failed, the cache fills as queries arrive: {e}")
+
+    def candidate_positions(self, query: str, n_results: int):
+        """
+        (positions, reused_from): metadata-store row positions of the top n_results for a query
+        (ids only, no hydration), and the query whose cached ranking was reused (see ranked_candidates).
+        """
+        ids, _, reused_from = self.ranked_candidates(query, n_results)
+        positions = self.metadata_store.positions
+        return [positions[video_id] for video_id in ids if video_id in positions], reused_from
+
+    def _sort_candidates(self, results, sort, descending):
+        """Reorders a query result's candidate set by a typed metadata column (one argsort)."""
+        positions = [self.metadata_store.positions[video_id] for video_id in results['ids'][0]]
+        new_order = self.metadata_store.sort_order(positions, sort, descending)
+        reordered = {}
+        for key in ('ids', 'metadatas', 'distances', 'documents'):
+            values = results.get(key)
+            if values and len(values[0]) == len(positions):
+                reordered[key] = [[values[0][i] for i in new_order]]
+        return reordered
+
+    def get_transcript(self, video_id):
+        """Full transcript for a video id, or None if the video or its transcript is unknown."""
+        if self.transcript_store is not None:
+            return self.transcript_store.get(video_id)
+        # Older collections keep the transcript in each video's metadata
+        position = self.metadata_store.video_positions.get(video_id)
+        if position is None:
+            return None
+        transcript = str(self.metadata_store.metadatas[position].get('transcript', '') or '').strip()
+        return transcript or None
+
+    def _indexed_dimension(self):
+        """Dimension of the stored vectors (backends expose it; Chroma needs a sample read)."""
+        if hasattr(self.collection, 'dimension'):
+            return self.collection.dimension
+        sample = self.collection.get(limit=1, include=['embeddings'])
+        return len(sample['embeddings'][0]) if len(sample['embeddings']) else None
+
+    def encode_query(self, query: str, deadline=None):
+        """
+        Encodes a query into the vector space of the indexed collection. Returns None when the
+        deadline ran out before or while waiting on the encoder service (falling back would only run later).
+        """
+        vector = None
+        if self.encoder_client is not None and self.encoder_client.available():
+            budget_ms = remaining_ms(deadline)
+            if budget_ms is not None and budget_ms <= 0:
+                return None
+            try:
+                vector = self.encoder_client.encode([query], timeout=None if budget_ms is None else budget_ms / 1000)[0]
+            except EncoderUnavailable as e:
+                if expired(deadline):
+                    return None
+                print(f"WARNING: {e}; encoding in-process")
+        if vector is None:
+            vector = np.asarray(self.embedding_function([query])[0], dtype=np.float32)
+        if self.pca_projection is not None:
+            vector = apply_pca_projection(vector, self.pca_projection)[0]
+        return vector
+
+    def search(self, query: str, offset: int = 0, limit: int = 10, order: str = 'default', seed: int = 0,
+               sort: str = 'relevance', descending: bool = True, timings=None, deadline=None, use_cache=True):
         """
         Performs semantic search with pagination support.
         Args:
-            query: Search query string
+            query: Search query string (empty for the home feed)
             offset: Number of results to skip
             limit: Maximum number of results to return
+            order: Home-feed ordering for an empty query ('default', 'views', 'recent' or 'shuffle')
+            seed: Shuffle seed for order='shuffle' (e.g. one per client session)
+            sort: 'relevance' or a metadata key ('views', 'likes', 'date', 'duration') to reorder
+                  the top SORT_CANDIDATE_POOL results by before paginating
+            descending: Sort direction for a metadata sort
+            timings: Optional dict that receives per-stage wall times in ms (used by profile=1)
+            deadline: Optional Deadline. Each stage checks it and cuts its work short once it is
+                      spent, recording itself in deadline.degraded (the response is then 'partial')
+            use_cache: False bypasses the semantic query cache (used by profile=1)
         """
         start_time = time.time()
+        reused_from = None
         
-        # Calculate how many results to fetch
-        fetch_count = min(offset + limit, self.collection.count())
-        
-        # For empty query, get all documents; otherwise do semantic search
+        # For empty query, serve the home feed; otherwise do semantic search
         if not query or query.strip() == "":
-            # Get all documents with pagination
-            results = self.collection.get(
-                limit=fetch_count,
-                offset=0,
-                include=['metadatas', 'documents']
-            )
-            # Convert to query format for consistency
-            if results and results.get('metadatas'):
+            # Precomputed ordering sliced to just this page (O(limit) at any depth),
+            # hydrated from the in-memory metadata store in query format for consistency
+            positions = self.metadata_store.feed_page(order, offset, limit, seed)
+            results = {
+                'metadatas': [[self.metadata_store.metadatas[p] for p in positions]],
+                'distances': [[0.0] * len(positions)]  # No distance for the feed
+            }
+            page_start = 0
+        else:
+            results = None
+            page_start = offset
+            # The page, or a whole candidate pool when re-sorting (if there is time for it)
+            candidates = self.ranked_candidates(query, offset + limit,
+                                                pool_size=SORT_CANDIDATE_POOL if sort != 'relevance' else 0,
+                                                deadline=deadline, timings=timings, use_cache=use_cache)
+            if candidates is not None:
+                ids, distances, reused_from = candidates
+                # Hydrated from the metadata store (transcripts are served by /videos/<id>/transcript)
+                positions = self.metadata_store.positions
+                hits = [(video_id, distance) for video_id, distance in zip(ids, distances) if video_id in positions]
                 results = {
-                    'metadatas': [results['metadatas']],
-                    'distances': [[0.0] * len(results['metadatas'])],  # No distance for get()
-                    'documents': [results.get('documents', [])]
+                    'ids': [[video_id for video_id, _ in hits]],
+                    'metadatas': [[self.metadata_store.metadatas[positions[video_id]] for video_id, _ in hits]],
+                    'distances': [[float(distance) for _, distance in hits]]
                 }
-        else:
-            # ChromaDB handles the query embedding and performs the search
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=fetch_count,
-                include=['metadatas', 'distances', 'documents']
-            )
+                if sort != 'relevance' and results.get('ids') and len(results['ids'][0]) > 0:
+                    if expired(deadline):
+                        # Keep relevance order rather than spend more time
+                        deadline.degrade('sort')
+                    else:
+                        with stage(timings, 'sort_ms'):
+                            results = self._sort_candidates(results, sort, descending)
         
         end_time = time.time()
+        format_start = time.perf_counter()
         
         formatted_results = []
         
         if results and results.get('metadatas') and len(results['metadatas'][0]) > 0:
-            metadatas = results['metadatas'][0][offset:offset+limit]
-            distances = results['distances'][0][offset:offset+limit]
-            documents = results.get('documents', [[]])[0][offset:offset+limit]  # Get the transcript text
+            metadatas = results['metadatas'][0][page_start:page_start+limit]
+            distances = results['distances'][0][page_start:page_start+limit]
             
-            for idx, (metadata, distance) in enumerate(zip(metadatas, distances)):
-                # ChromaDB with cosine distance returns values where:
-                # - 0 means identical vectors (perfect match)
-                # - 2 means opposite vectors (completely different)
-                # Convert to similarity score (0-1 where 1 is best match)
-                # Formula: similarity = (2 - distance) / 2
-                # This maps: distance 0 -> similarity 1.0, distance 2 -> similarity 0.0
-                similarity_score = max(0, min(1, (2 - distance) / 2))
-                
-                # Get the transcript if available, otherwise use empty string
-                transcript = documents[idx] if idx < len(documents) else ''
+            # The page is already fetched and formatting it takes well under a millisecond,
+            # so it is never cut short by the deadline
+            for metadata, distance in zip(metadatas, distances):
+                # Convert to similarity score (0-1 where 1 is best match) using the
+                # collection's distance space, e.g. cosine: distance 0 -> 1.0, distance 2 -> 0.0
+                similarity_score = distance_to_similarity(distance, self.distance_space)
                 
                 # Extract video ID from metadata
                 video_id = (
@@ -112,7 +660,6 @@ class VideoSearchEngine:
                     'likes': int(float(metadata.get('likeCount', metadata.get('likes', 0)))),
                     'published_at': str(metadata.get('publishedAt', metadata.get('published_at', ''))).strip(),
                     'description': str(metadata.get('description', '')).strip(),
-                    'transcript': str(transcript or '').strip(),
                     'similarity_score': round(similarity_score, 3),
                     'comment_count': int(float(metadata.get('commentCount', metadata.get('comment_count', 0)))),
                     'duration': int(float(metadata.get('duration', metadata.get('duration_seconds', 0)))),
@@ -138,64 +685,162 @@ class VideoSearchEngine:
                 
         # Calculate search latency
         latency = round(end_time - start_time, 4)
+        if timings is not None:
+            timings['format_ms'] = round((time.perf_counter() - format_start) * 1000, 3)
         
         return {
             "query": query,
             "latency_seconds": latency,
             "total_results": len(formatted_results),
             "results": formatted_results,
-            "has_more": len(formatted_results) == limit
+            "has_more": len(formatted_results) == limit,
+            "partial": bool(deadline and deadline.degraded),
+            "degraded": list(deadline.degraded) if deadline else [],
+            # Set when the ranking is a close enough cached query's rather than this query's own
+            "reused_ranking_of": reused_from
         }
 
+def snapshots_enabled():
+    """Snapshots are Chroma persistence directories, so they only apply to the 'chroma' backend."""
+    return bool(CHROMA_SNAPSHOTS_DIR) and SEARCH_BACKEND == 'chroma'
+
+def load_search_engine():
+    """Builds the engine for the live snapshot when snapshots are enabled, else for CHROMA_DB_PATH."""
+    if snapshots_enabled():
+        snapshot_path, manifest = resolve_current_snapshot(CHROMA_SNAPSHOTS_DIR)
+        print(f"-> Loading snapshot {manifest['version']} from {snapshot_path}")
+        return VideoSearchEngine(chroma_path=snapshot_path, snapshot_manifest=manifest)
+    return VideoSearchEngine()
+
+def watch_snapshots():
+    """Background loop: hot-swaps the engine whenever CURRENT points at a new snapshot."""
+    while True:
+        time.sleep(SNAPSHOT_POLL_SECONDS)
+        try:
+            _, manifest = resolve_current_snapshot(CHROMA_SNAPSHOTS_DIR)
+            new_version = engine_manager.reload_if_changed(manifest['version'], load_search_engine)
+            if new_version:
+                print(f"-> Hot-swapped to snapshot {new_version}")
+        except Exception as e:
+            print(f"WARNING: snapshot reload failed, still serving the previous index: {e}")
+
 # --- 1. API Setup ---
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+# Routes live on a blueprint; create_app() builds the Flask app, so importing this module is cheap
+api = Blueprint('api', __name__)
+
+# Requests go through the manager so the engine can be swapped while they are in flight (set by create_app)
+engine_manager = None
+# Search log (set by create_app when QUERY_LOG_DIR is configured)
+query_log = None
+
+def create_app():
+    """
+    App factory: loads the search engine once, starts the snapshot watcher and registers the routes.
+    Run with `python app.py`, `flask --app app run` or a WSGI server (e.g. gunicorn "app:create_app()").
+    """
+    global engine_manager, query_log
+    start_time = time.perf_counter()
+    app = Flask(__name__)
+    from flask_cors import CORS
+    CORS(app)  # Enable CORS for all routes
 
-# Initialize the search engine globally so it only loads once
-try:
-    search_engine = VideoSearchEngine()
-except FileNotFoundError as e:
-    print(e)
-    # Exit gracefully if the database isn't found
-    search_engine = None
-    
-# Initialize the search engine
-search_engine = None
-try:
-    search_engine = VideoSearchEngine()
-except FileNotFoundError as e:
-    print(f"Error: {e}")
     search_engine = None
+    try:
+        search_engine = load_search_engine()
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+
+    engine_manager = EngineManager(search_engine)
+    if QUERY_LOG_DIR:
+        query_log = QueryLog(QUERY_LOG_DIR, max_bytes=QUERY_LOG_MAX_BYTES, backups=QUERY_LOG_BACKUPS)
+    if snapshots_enabled():
+        threading.Thread(target=watch_snapshots, name="snapshot-watcher", daemon=True).start()
+    elif CHROMA_SNAPSHOTS_DIR:
+        # Other backends' versions are content hashes that never match a manifest version, so a
+        # watcher would rebuild and swap the engine on every poll
+        print(f"WARNING: QUERYTUBE_CHROMA_SNAPSHOTS_DIR is ignored with the '{SEARCH_BACKEND}' backend")
+    app.register_blueprint(api)
+
+    app.config['STARTUP_TIMINGS'] = {
+        **(search_engine.startup_timings if search_engine else {}),
+        'create_app_ms': round((time.perf_counter() - start_time) * 1000, 3)
+    }
+    print(f"-> App ready in {app.config['STARTUP_TIMINGS']['create_app_ms'] / 1000:.2f}s "
+          f"{app.config['STARTUP_TIMINGS']}")
+    return app
+
+@api.before_request
+def acquire_search_engine():
+    g.search_engine = engine_manager.acquire()
+
+@api.teardown_request
+def release_search_engine(exc):
+    engine_manager.release(g.pop('search_engine', None))
+
+def is_admin_request():
+    """Admin endpoints need ADMIN_TOKEN configured and sent in the X-Admin-Token header."""
+    return bool(ADMIN_TOKEN) and request.headers.get('X-Admin-Token') == ADMIN_TOKEN
+
+def make_etag(endpoint, *params):
+    """ETag derived from the loaded index version plus the normalized request parameters."""
+    digest = hashlib.sha1(json.dumps([endpoint, *params]).encode('utf-8')).hexdigest()[:16]
+    return f"{g.search_engine.index_version}-{digest}"
 
-@app.route('/initial-videos', methods=['GET'])
+def add_cache_headers(response, etag):
+    """Marks a response as cacheable until the index version changes or max-age expires."""
+    response.set_etag(etag)
+    response.last_modified = g.search_engine.index_modified_at
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE_SECONDS
+    return response
+
+def not_modified_response(etag):
+    """Returns a 304 response when the client already holds this ETag, otherwise None."""
+    if request.if_none_match.contains(etag):
+        return add_cache_headers(current_app.response_class(status=304), etag)
+    return None
+
+@api.route('/initial-videos', methods=['GET'])
 def get_initial_videos():
     """
     API endpoint to get initial videos for the home page with pagination
     Query params:
         offset: Number of results to skip (default: 0)
         limit: Maximum number of results to return (default: 10, max: 50)
+        order: 'default' (storage order), 'views', 'recent' or 'shuffle' (default: 'default')
+        seed: Seed for order=shuffle; reuse it for every page of a session (default: 0)
     """
-    if not search_engine:
+    if not g.search_engine:
         return jsonify({"error": "Search engine not initialized"}), 500
 
     try:
         # Get pagination parameters
         offset = max(0, int(request.args.get('offset', 0)))
         limit = min(50, max(1, int(request.args.get('limit', 10))))
+        order = request.args.get('order', 'default')
+        seed = int(request.args.get('seed', 0))
+        if order not in FEED_ORDERS:
+            return jsonify({"error": f"Invalid order. Use one of: {', '.join(FEED_ORDERS)}"}), 400
+
+        # The feed only changes when the index does, so repeat requests can be answered with 304
+        etag = make_etag('initial-videos', offset, limit, order, seed if order == 'shuffle' else 0)
+        cached = not_modified_response(etag)
+        if cached is not None:
+            return cached
         
         # Check if offset exceeds total collection count
-        total_count = search_engine.collection.count()
+        total_count = g.search_engine.metadata_store.count()
         if offset >= total_count:
             # Return empty result when offset exceeds available data
-            return jsonify({
+            return add_cache_headers(jsonify({
                 'videos': [],
                 'has_more': False,
                 'total': 0
-            })
+            }), etag)
         
-        # Use an empty query to get random videos with pagination
-        results = search_engine.search("", offset, limit)
+        # Use an empty query to get the home feed with pagination
+        results = g.search_engine.search("", offset, limit, order=order, seed=seed)
         videos = []
         
         if 'results' in results:
@@ -218,36 +863,81 @@ def get_initial_videos():
         # Check if there are more videos available
         has_more = (offset + len(videos)) < total_count
         
-        return jsonify({
+        return add_cache_headers(jsonify({
             'videos': videos,
             'has_more': has_more,
             'total': len(videos)
-        })
+        }), etag)
     except Exception as e:
         print(f"Error in get_initial_videos: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/search', methods=['POST'])
+@api.route('/search', methods=['GET', 'POST'])
 def search_api():
     """
     API endpoint to handle semantic search queries.
-    Accepts JSON body: {"query": "...", "offset": N, "limit": M}
+    POST accepts JSON body: {"query": "...", "offset": N, "limit": M, "sort": "...", "direction": "..."}
+    sort: 'relevance' (default), 'views', 'likes', 'date' or 'duration'; direction: 'desc' (default) or 'asc'
+    GET accepts the same fields as query params (?query=...&offset=N&limit=M) and is cacheable:
+    results are deterministic for a given index version, so repeat requests get a 304. A response
+    built from a similar query's cached ranking is not this query's own result, so it carries no
+    ETag and is never cached (the client never revalidates it against this query's ETag).
+    profile=1 (admin token required) runs the request under cProfile and adds a 'profile' object
+    with per-stage timings and the top functions; such responses are never cached. Profiled
+    searches bypass the query cache, so a cached query is profiled through encoding and the index.
+    deadline_ms: time budget for the search (default DEFAULT_DEADLINE_MS, capped at MAX_DEADLINE_MS).
+    When it runs out the response has 'partial': true and lists the cut-short stages in 'degraded';
+    partial responses are never cached.
     """
-    if not search_engine:
+    if not g.search_engine:
         return jsonify({"error": "Semantic search engine not initialized. Check server logs."}), 500
         
-    data = request.get_json()
-    query = (data or {}).get('query', '')
-    offset = max(0, int((data or {}).get('offset', 0)))
-    limit = min(50, max(1, int((data or {}).get('limit', 10))))
+    data = request.args if request.method == 'GET' else (request.get_json(silent=True) or {})
+    query = data.get('query', '')
+    sort = data.get('sort', 'relevance')
+    direction = data.get('direction', 'desc')
+    profile = str(data.get('profile', '0')).lower() in ('1', 'true', 'yes')
+    try:
+        offset = max(0, int(data.get('offset', 0)))
+        limit = min(50, max(1, int(data.get('limit', 10))))
+        deadline_ms = min(MAX_DEADLINE_MS, max(0, int(data.get('deadline_ms', DEFAULT_DEADLINE_MS))))
+    except (ValueError, TypeError):
+        return jsonify({"error": "offset, limit and deadline_ms must be integers."}), 400
 
     # 1. Input Validation
     if not query or len(query.strip()) < 3:
         return jsonify({"error": "Invalid query provided. Query must be at least 3 characters long."}), 400
+    if sort not in SORT_KEYS or direction not in ('asc', 'desc'):
+        return jsonify({"error": f"Invalid sort. Use one of: {', '.join(SORT_KEYS)} with direction asc or desc."}), 400
+    if profile and not is_admin_request():
+        return jsonify({"error": "Forbidden: profile=1 requires the admin token."}), 403
+
+    etag = make_etag('search', query.strip(), offset, limit, sort, direction)
+    if request.method == 'GET' and not profile:
+        cached = not_modified_response(etag)
+        if cached is not None:
+            return cached
 
     try:
         # 2. Perform Search with pagination
-        results = search_engine.search(query, offset=offset, limit=limit)
+        profile_report = None
+        if profile:
+            timings = {}
+            results, profile_report = profile_call(
+                lambda: g.search_engine.search(query, offset=offset, limit=limit, sort=sort,
+                                               descending=(direction == 'desc'), timings=timings, use_cache=False),
+                top_n=PROFILE_TOP_FRAMES, save_dir=PROFILE_DIR)
+            profile_report['stages'] = timings
+            profile_report['query_cache'] = 'bypassed' if g.search_engine.query_cache is not None else 'disabled'
+        else:
+            # Profiled requests run without a deadline so the whole pipeline is measured
+            search_start = time.perf_counter()
+            results = g.search_engine.search(query, offset=offset, limit=limit,
+                                           sort=sort, descending=(direction == 'desc'),
+                                           deadline=Deadline(deadline_ms) if deadline_ms else None)
+            if query_log is not None:
+                query_log.record(query, (time.perf_counter() - search_start) * 1000, results['total_results'],
+                                 sort=sort, offset=offset, partial=results['partial'])
         videos = []
 
         if 'results' in results:
@@ -268,14 +958,192 @@ def search_api():
                 }
                 videos.append(video)
 
-        return jsonify({
+        payload = {
             'results': videos,
             'has_more': results.get('has_more', False),
-            'total': len(videos)
+            'total': len(videos),
+            'partial': results.get('partial', False)
+        }
+        if profile_report is not None:
+            response = jsonify({**payload, 'profile': profile_report})
+            response.cache_control.no_store = True
+            return response
+        if payload['partial']:
+            payload['degraded'] = results['degraded']
+            response = jsonify(payload)
+            response.cache_control.no_store = True
+            return response
+        if results['reused_ranking_of'] is not None:
+            response = jsonify(payload)
+            response.cache_control.no_store = True
+            return response
+        response = jsonify(payload)
+        return add_cache_headers(response, etag) if request.method == 'GET' else response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/facets', methods=['GET'])
+def facets_api():
+    """
+    API endpoint for facet counts (channel, is_short, publish_year, duration_bucket).
+    Query params:
+        query: Optional search query; counts cover its top FACET_CANDIDATE_POOL results.
+               Without a query, counts cover the whole corpus.
+        top: Maximum number of channel values returned (default: 20, max: 100)
+    """
+    if not g.search_engine:
+        return jsonify({"error": "Search engine not initialized"}), 500
+
+    query = request.args.get('query', '').strip()
+    try:
+        top = min(100, max(1, int(request.args.get('top', 20))))
+    except ValueError:
+        return jsonify({"error": "top must be an integer."}), 400
+    if query and len(query) < 3:
+        return jsonify({"error": "Invalid query provided. Query must be at least 3 characters long."}), 400
+
+    etag = make_etag('facets', query, top)
+    cached = not_modified_response(etag)
+    if cached is not None:
+        return cached
+
+    try:
+        # Counts come from bitmaps built at startup, never from iterating metadata dicts
+        positions, reused_from = g.search_engine.candidate_positions(query, FACET_CANDIDATE_POOL) if query else (None, None)
+        response = jsonify({
+            'query': query,
+            'candidates': len(positions) if positions is not None else g.search_engine.metadata_store.count(),
+            'facets': g.search_engine.metadata_store.facet_counts(positions, top_n=top)
+        })
+        if reused_from is not None:
+            # Counted over a similar query's cached candidates; see search_api
+            response.cache_control.no_store = True
+            return response
+        return add_cache_headers(response, etag)
+    except Exception as e:
+        print(f"Error in facets_api: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/videos/<video_id>/transcript', methods=['GET'])
+def transcript_api(video_id):
+    """
+    API endpoint for one video's transcript, fetched on demand (search results do not carry it).
+    Query params (character paging, the default):
+        start: First character to return (default: 0)
+        length: Number of characters (default: TRANSCRIPT_PAGE_CHARS, max: TRANSCRIPT_MAX_PAGE_CHARS)
+    Query params (segment paging, used when 'segment' is given):
+        segment: First segment to return (segments are ~TRANSCRIPT_SEGMENT_CHARS characters, split at spaces)
+        segments: Number of segments (default: 1, max: 50)
+    """
+    if not g.search_engine:
+        return jsonify({"error": "Search engine not initialized"}), 500
+
+    try:
+        start = max(0, int(request.args.get('start', 0)))
+        length = min(TRANSCRIPT_MAX_PAGE_CHARS, max(1, int(request.args.get('length', TRANSCRIPT_PAGE_CHARS))))
+        segment = request.args.get('segment')
+        segment = max(0, int(segment)) if segment is not None else None
+        segments = min(50, max(1, int(request.args.get('segments', 1))))
+    except ValueError:
+        return jsonify({"error": "Paging parameters must be integers."}), 400
+
+    etag = make_etag('transcript', video_id, start, length, segment, segments)
+    cached = not_modified_response(etag)
+    if cached is not None:
+        return cached
+
+    try:
+        transcript = g.search_engine.get_transcript(video_id)
+        if transcript is None:
+            return jsonify({"error": f"No transcript found for video {video_id}"}), 404
+        page = transcript_page(transcript, start=start, length=length, segment=segment,
+                               segments=segments, segment_chars=TRANSCRIPT_SEGMENT_CHARS)
+        return add_cache_headers(jsonify({'video_id': video_id, **page}), etag)
+    except Exception as e:
+        print(f"Error in transcript_api: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/debug/memory', methods=['GET'])
+def memory_api():
+    """
+    Admin endpoint: resident memory of the process broken down by component (encoder, index,
+    metadata store, transcript store), cache sizes with entry counts, and, when tracemalloc is
+    running (QUERYTUBE_TRACEMALLOC=<frames>), the top Python-heap allocation sites.
+    Query params:
+        top: Number of allocation sites to list (default: 15, max: 100)
+        group_by: 'filename' (default) or 'lineno'
+    """
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    if not g.search_engine:
+        return jsonify({"error": "Search engine not initialized"}), 500
+
+    try:
+        top = min(100, max(1, int(request.args.get('top', 15))))
+    except ValueError:
+        return jsonify({"error": "top must be an integer."}), 400
+    group_by = request.args.get('group_by', 'filename')
+    if group_by not in ('filename', 'lineno'):
+        return jsonify({"error": "Invalid group_by. Use 'filename' or 'lineno'."}), 400
+
+    try:
+        report = g.search_engine.memory_report()
+        components_bytes = sum(component['bytes'] for component in report['components'].values())
+        caches_bytes = sum(cache['bytes'] for cache in report['caches'].values())
+        response = jsonify({
+            'process': process_memory(),
+            'accounted_bytes': components_bytes + caches_bytes,
+            **report,
+            # Each retired engine still draining holds a full copy of everything above
+            'retired_engines': engine_manager.retired_count(),
+            'tracemalloc': tracemalloc_summary(limit=top, group_by=group_by)
+        })
+        response.cache_control.no_store = True
+        return response
+    except Exception as e:
+        print(f"Error in memory_api: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/debug/query-cache', methods=['GET'])
+def query_cache_api():
+    """
+    Admin endpoint: semantic query cache statistics for the live engine: lookups, exact and
+    similarity hits, hit rate, and the audit results (false-hit rate and the latest false hits).
+    """
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    if not g.search_engine:
+        return jsonify({"error": "Search engine not initialized"}), 500
+    if g.search_engine.query_cache is None:
+        return jsonify({"error": "The query cache is disabled (QUERYTUBE_QUERY_CACHE_SIZE=0)."}), 404
+
+    response = jsonify({'index_version': g.search_engine.index_version, **g.search_engine.query_cache.report()})
+    response.cache_control.no_store = True
+    return response
+
+@api.route('/admin/reload', methods=['POST'])
+def reload_api():
+    """
+    Admin endpoint: swaps to the snapshot CURRENT points at, if it is newer than the live one.
+    The previous engine finishes its in-flight requests before it is closed.
+    """
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    if not snapshots_enabled():
+        return jsonify({"error": "Snapshots are not enabled (set QUERYTUBE_CHROMA_SNAPSHOTS_DIR "
+                                 "and use the 'chroma' backend)."}), 400
+
+    try:
+        _, manifest = resolve_current_snapshot(CHROMA_SNAPSHOTS_DIR)
+        new_version = engine_manager.reload_if_changed(manifest['version'], load_search_engine)
+        return jsonify({
+            'swapped': new_version is not None,
+            'index_version': engine_manager.engine.index_version
         })
     except Exception as e:
+        print(f"Error in reload_api: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
     # Flask runs in debug mode by default, suitable for testing
-    app.run(host='0.0.0.0', port=5000)
+    create_app().run(host='0.0.0.0', port=API_PORT)
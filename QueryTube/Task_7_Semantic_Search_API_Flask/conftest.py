@@ -0,0 +1,160 @@
+import os
+import json
+import zlib
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from chromadb.utils import embedding_functions
+import app as app_module
+from vector_backends import MATRIX_FILENAME, METADATA_FILENAME, CONFIG_FILENAME
+from transcript_store import DATA_FILENAME, INDEX_FILENAME, INFO_FILENAME
+from encoder_service import BatchingEncoder, EncoderServer
+
+DIMENSION = 32
+ADMIN_TOKEN = "test-admin-token"
+
+# (video id, title, channel, views, likes, published, duration seconds, is_short)
+VIDEOS = [
+    ("vid00000001", "python tutorial for beginners", "Code Academy", 5000, 300, "2021-03-01T00:00:00Z", 900, False),
+    ("vid00000002", "advanced python tutorial decorators", "Code Academy", 12000, 150, "2023-07-15T00:00:00Z", 2400, False),
+    ("vid00000003", "python tutorial web scraping", "Data Lab", 800, 90, "2022-01-10T00:00:00Z", 1500, False),
+    ("vid00000004", "learn python in one minute", "Data Lab", 40000, 2000, "2023-11-02T00:00:00Z", 58, True),
+    ("vid00000005", "italian pasta cooking recipe", "Kitchen Stories", 7000, 500, "2020-05-20T00:00:00Z", 600, False),
+    ("vid00000006", "quick pasta recipe", "Kitchen Stories", 300, 20, "2022-09-09T00:00:00Z", 45, True),
+    ("vid00000007", "guitar lesson for beginners", "Music Room", 2500, 110, "2019-12-31T00:00:00Z", 1200, False),
+    ("vid00000008", "jazz guitar chords lesson", "Music Room", 900, 70, "2021-08-08T00:00:00Z", 3700, False),
+    ("vid00000009", "rust programming tutorial", "Code Academy", 6500, 420, "2024-02-02T00:00:00Z", 3000, False),
+    ("vid00000010", "home workout routine", "Fit Daily", 15000, 800, "2023-01-01T00:00:00Z", 1800, False),
+]
+
+TRANSCRIPTS = {
+    "vid00000001": " ".join(f"word{i}" for i in range(400)),
+    "vid00000005": "Boil the water, add salt, then the pasta.",
+}
+
+def embed(text):
+    """Bag of hashed words: queries sharing words with a title land close to it."""
+    vector = np.zeros(DIMENSION, dtype=np.float32)
+    for word in text.lower().split():
+        vector[zlib.crc32(word.encode('utf-8')) % DIMENSION] += 1.0
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+class StubEncoder:
+    """Stands in for ONNXMiniLM_L6_V2: no model download, deterministic vectors, counts its calls."""
+    instances = []
+
+    def __init__(self):
+        self.calls = 0
+        StubEncoder.instances.append(self)
+
+    def __call__(self, texts):
+        self.calls += 1
+        return [embed(text) for text in texts]
+
+def write_index_dir(index_dir):
+    """A NumpyMatrixBackend index of VIDEOS, laid out as NumPy_matrix.py writes it."""
+    os.makedirs(index_dir)
+    np.save(os.path.join(index_dir, MATRIX_FILENAME), np.vstack([embed(video[1]) for video in VIDEOS]))
+    pd.DataFrame({
+        'id': [f"{video[0]}_0" for video in VIDEOS],
+        'original_id': [video[0] for video in VIDEOS],
+        'title': [video[1] for video in VIDEOS],
+        'channel_title': [video[2] for video in VIDEOS],
+        'viewCount': [video[3] for video in VIDEOS],
+        'likeCount': [video[4] for video in VIDEOS],
+        'publishedAt': [video[5] for video in VIDEOS],
+        'duration': [video[6] for video in VIDEOS],
+        'is_short': [str(video[7]) for video in VIDEOS]
+    }).to_parquet(os.path.join(index_dir, METADATA_FILENAME), index=False)
+    with open(os.path.join(index_dir, CONFIG_FILENAME), 'w') as f:
+        json.dump({'backend': 'numpy', 'count': len(VIDEOS), 'dimension': DIMENSION}, f)
+
+def write_chroma_dir(chroma_path, collection_name):
+    """A persisted Chroma collection of VIDEOS in cosine space, as ChromaDB_updated.py creates it."""
+    import chromadb
+    client = chromadb.PersistentClient(path=chroma_path)
+    collection = client.create_collection(collection_name, configuration={'hnsw': {'space': 'cosine'}},
+                                          embedding_function=None)
+    collection.add(ids=[f"{video[0]}_0" for video in VIDEOS],
+                   embeddings=[embed(video[1]).tolist() for video in VIDEOS],
+                   metadatas=[{'original_id': video[0], 'title': video[1], 'channel_title': video[2],
+                               'viewCount': video[3], 'likeCount': video[4], 'publishedAt': video[5],
+                               'duration': video[6], 'is_short': str(video[7])} for video in VIDEOS])
+    # Release this process's handle on the files, as a finished ingest run would
+    client.clear_system_cache()
+
+def write_transcript_store(store_dir):
+    """A raw-codec transcript store of TRANSCRIPTS, laid out as ChromaDB_updated.py writes it."""
+    os.makedirs(store_dir)
+    offsets, lengths = [], []
+    with open(os.path.join(store_dir, DATA_FILENAME), 'wb') as f:
+        for text in TRANSCRIPTS.values():
+            data = text.encode('utf-8')
+            offsets.append(f.tell())
+            lengths.append(len(data))
+            f.write(data)
+    pd.DataFrame({'video_id': list(TRANSCRIPTS), 'offset': offsets, 'length': lengths}) \
+        .to_parquet(os.path.join(store_dir, INDEX_FILENAME), index=False)
+    with open(os.path.join(store_dir, INFO_FILENAME), 'w') as f:
+        json.dump({'codec': 'raw', 'count': len(TRANSCRIPTS)}, f)
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """
+    Returns a factory that builds the API with create_app() over a small numpy-backend index and
+    the stub encoder; keyword arguments override app.py's configuration constants.
+    """
+    index_dir = str(tmp_path / "index")
+    transcript_dir = str(tmp_path / "transcripts")
+    write_index_dir(index_dir)
+    write_transcript_store(transcript_dir)
+    monkeypatch.setattr(embedding_functions, 'ONNXMiniLM_L6_V2', StubEncoder)
+    StubEncoder.instances = []
+
+    def make(**settings):
+        config = {
+            'SEARCH_BACKEND': 'numpy',
+            'NUMPY_INDEX_DIR': index_dir,
+            'TRANSCRIPT_STORE_DIR': transcript_dir,
+            'CHROMA_SNAPSHOTS_DIR': None,
+            'SHARED_ARRAYS_DIR': None,
+            'PCA_PROJECTION_PATH': None,
+            'ENCODER_SOCKET': None,
+            'QUERY_LOG_DIR': None,
+            'PREWARM_PATH': None,
+            'ADMIN_TOKEN': ADMIN_TOKEN,
+            **settings
+        }
+        for name, value in config.items():
+            monkeypatch.setattr(app_module, name, value)
+        monkeypatch.setattr(app_module, 'query_log', None)
+        flask_app = app_module.create_app()
+        flask_app.config['TESTING'] = True
+        return flask_app
+
+    yield make
+    if app_module.engine_manager is not None and app_module.engine_manager.engine is not None:
+        app_module.engine_manager.engine.close()
+
+@pytest.fixture
+def client(make_app):
+    return make_app().test_client()
+
+@pytest.fixture
+def engine(client):
+    return app_module.engine_manager.engine
+
+@pytest.fixture
+def encoder_socket():
+    """Path of a running encoder service that encodes with embed(), like the stub encoder."""
+    # Unix socket paths are limited to ~100 characters, too short for some tmp_path names
+    path = os.path.join(tempfile.gettempdir(), f"querytube_app_test_{os.getpid()}_{threading.get_ident()}.sock")
+    server = EncoderServer(path, BatchingEncoder(lambda texts: [embed(text) for text in texts]))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield path
+    server.shutdown()
+    server.server_close()
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import struct
+import threading
+import socketserver
+import numpy as np
+
+# --- Configuration ---
+# One encoder process per host, shared by every API worker over a Unix socket. Start it with
+# `python encoder_service.py` and point the API at it with QUERYTUBE_ENCODER_SOCKET.
+ENCODER_SOCKET_PATH = os.environ.get("QUERYTUBE_ENCODER_SOCKET", "/tmp/querytube_encoder.sock")
+# Requests arriving within MAX_BATCH_WAIT_MS of each other are encoded in one model call
+MAX_BATCH_SIZE = 32                 # the ONNX encoder runs in batches of 32
+MAX_BATCH_WAIT_MS = 2.0
+MAX_REQUEST_BYTES = 1 << 20
+
+# Wire format, both directions: 4-byte big-endian length + UTF-8 JSON header.
+# Request header: {"texts": [...]}. Response header: {"shape": [n, dim]} followed by
+# n * dim float32 values, or {"error": "..."} with no payload.
+LENGTH = struct.Struct(">I")
+
+def _read_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("encoder connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def _send_message(sock, header, payload=b""):
+    body = json.dumps(header).encode("utf-8")
+    sock.sendall(LENGTH.pack(len(body)) + body + payload)
+
+def _read_header(sock):
+    (size,) = LENGTH.unpack(_read_exact(sock, LENGTH.size))
+    if size > MAX_REQUEST_BYTES:
+        raise ValueError(f"message of {size} bytes exceeds the {MAX_REQUEST_BYTES} byte limit")
+    return json.loads(_read_exact(sock, size))
+
+class EncoderUnavailable(Exception):
+    """The encoder service could not be reached or failed to encode; callers fall back to in-process encoding."""
+
+class EncoderClient:
+    """
+    Client for the encoder service. Each thread keeps its own connection, opened on first use and
+    reopened after an error. After a failure the service is skipped for retry_seconds, so a stopped
+    sidecar costs one failed connect per interval instead of one per query.
+    """
+    def __init__(self, socket_path=ENCODER_SOCKET_PATH, timeout=2.0, retry_seconds=5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _drop_connection(self):
+        sock = getattr(self._local, 'sock', None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def available(self):
+        return time.monotonic() >= self._down_until
+
+    def encode(self, texts, timeout=None):
+        """
+        Returns a float32 array of shape (len(texts), dim); raises EncoderUnavailable on any failure.
+        timeout (seconds) shortens the client's timeout for this call, e.g. to a request deadline;
+        running out of that shorter time does not mark the service down.
+        """
+        if not self.available():
+            raise EncoderUnavailable(f"encoder service at {self.socket_path} is marked down")
+        call_timeout = self.timeout if timeout is None else min(self.timeout, timeout)
+        if call_timeout <= 0:
+            # settimeout(0) would make the socket non-blocking and fail with BlockingIOError
+            raise EncoderUnavailable(f"no time left to call the encoder service at {self.socket_path}")
+        try:
+            sock = self._connection()
+            sock.settimeout(call_timeout)
+            _send_message(sock, {'texts': list(texts)})
+            header = _read_header(sock)
+            if 'error' in header:
+                # The connection is still in sync; the service itself failed on this batch
+                raise EncoderUnavailable(header['error'])
+            rows, dim = header['shape']
+            payload = _read_exact(sock, rows * dim * 4)
+        except (OSError, ValueError, ConnectionError) as e:
+            # The reply may still arrive, so the connection cannot be reused either way
+            self._drop_connection()
+            timed_out = isinstance(e, (socket.timeout, BlockingIOError))
+            if not (timed_out and call_timeout < self.timeout):
+                self._down_until = time.monotonic() + self.retry_seconds
+            raise EncoderUnavailable(f"encoder service at {self.socket_path} failed: {e}") from e
+        return np.frombuffer(payload, dtype=np.float32).reshape(rows, dim)
+
+    def close(self):
+        self._drop_connection()
+
+class _PendingRequest:
+    __slots__ = ('texts', 'done', 'vectors', 'error')
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.done = threading.Event()
+        self.vectors = None
+        self.error = None
+
+class BatchingEncoder:
+    """
+    Funnels requests from every connection through one thread that runs the model. The thread takes
+    the first waiting request, gathers whatever else arrives within MAX_BATCH_WAIT_MS (up to
+    MAX_BATCH_SIZE texts) and encodes them in a single call.
+    """
+    def __init__(self, embedding_function, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_BATCH_WAIT_MS):
+        self.embedding_function = embedding_function
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.pending = queue.Queue()
+        self.stats = {'requests': 0, 'batches': 0, 'texts': 0}
+        threading.Thread(target=self._run, name="encoder-batcher", daemon=True).start()
+
+    def encode(self, texts):
+        request = _PendingRequest(texts)
+        self.pending.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.vectors
+
+    def _collect_batch(self):
+        batch = [self.pending.get()]
+        size = len(batch[0].texts)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            texts = [text for request in batch for text in request.texts]
+            try:
+                vectors = np.asarray(self.embedding_function(texts), dtype=np.float32)
+                start = 0
+                for request in batch:
+                    request.vectors = vectors[start:start + len(request.texts)]
+                    start += len(request.texts)
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+            self.stats['requests'] += len(batch)
+            self.stats['batches'] += 1
+            self.stats['texts'] += len(texts)
+            for request in batch:
+                request.done.set()
+
+class _ConnectionHandler(socketserver.BaseRequestHandler):
+    """Serves one API worker thread's connection until it closes."""
+    def handle(self):
+        while True:
+            try:
+                header = _read_header(self.request)
+            except (ConnectionError, OSError):
+                return
+            texts = header.get('texts')
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                _send_message(self.request, {'error': "'texts' must be a list of strings"})
+                continue
+            try:
+                vectors = self.server.encoder.encode(texts)
+            except Exception as e:
+                _send_message(self.request, {'error': str(e)})
+                continue
+            _send_message(self.request, {'shape': list(vectors.shape)}, vectors.tobytes())
+
+class EncoderServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, encoder):
+        self.encoder = encoder
+        # A socket file left by a previous run would make bind() fail
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, _ConnectionHandler)
+
+def main():
+    print("\n--- QUERY ENCODER SERVICE ---")
+    from chromadb.utils import embedding_functions
+    # Same all-MiniLM-L6-v2 model the API would otherwise load in every worker, as one instance
+    # (DefaultEmbeddingFunction opens a new ONNX session on every call)
+    embedding_function = embedding_functions.ONNXMiniLM_L6_V2()
+    start = time.perf_counter()
+    try:
+        embedding_function(["warm up"])
+    except Exception as e:
+        print(f"FATAL ERROR: could not load the query encoder: {e}")
+        sys.exit(1)
+    print(f"-> Encoder loaded in {time.perf_counter() - start:.2f}s")
+
+    server = EncoderServer(ENCODER_SOCKET_PATH, BatchingEncoder(embedding_function))
+    print(f"-> Listening on {ENCODER_SOCKET_PATH} (batches of up to {MAX_BATCH_SIZE}, {MAX_BATCH_WAIT_MS} ms wait)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(ENCODER_SOCKET_PATH):
+            os.remove(ENCODER_SOCKET_PATH)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+# Layout written by ChromaDB_updated.py in SNAPSHOT_MODE:
+#   <snapshots_dir>/CURRENT                  name of the live snapshot
+#   <snapshots_dir>/<version>/manifest.json  written last, marks the build as complete
+#   <snapshots_dir>/<version>/...            Chroma persistence files
+CURRENT_POINTER = "CURRENT"
+MANIFEST_FILENAME = "manifest.json"
+CATALOG_FILENAME = "chroma.sqlite3"
+# Private working copies made for read-only serving are named <prefix><pid>_<random>
+READ_ONLY_COPY_PREFIX = "querytube_ro_"
+
+def resolve_current_snapshot(snapshots_dir):
+    """Returns (snapshot_path, manifest) for the snapshot CURRENT points at."""
+    pointer = os.path.join(snapshots_dir, CURRENT_POINTER)
+    if not os.path.exists(pointer):
+        raise FileNotFoundError(f"No published snapshot found in {snapshots_dir}")
+    with open(pointer) as f:
+        version = f.read().strip()
+
+    snapshot_path = os.path.join(snapshots_dir, version)
+    manifest_path = os.path.join(snapshot_path, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"Snapshot {version} has no manifest (incomplete build?)")
+    with open(manifest_path) as f:
+        return snapshot_path, json.load(f)
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def remove_stale_copies(work_dir):
+    """Deletes working copies left behind by serving processes that are no longer running."""
+    for name in os.listdir(work_dir):
+        pid = name[len(READ_ONLY_COPY_PREFIX):].split('_')[0]
+        if name.startswith(READ_ONLY_COPY_PREFIX) and pid.isdigit() and not _process_alive(int(pid)):
+            shutil.rmtree(os.path.join(work_dir, name), ignore_errors=True)
+            print(f"-> Removed stale read-only copy {name}")
+
+def make_read_only_copy(source_dir, work_dir):
+    """
+    Copies a persisted Chroma directory into a private working directory under work_dir and
+    returns its path. The source is only ever read: the catalog goes through sqlite's online
+    backup from a mode=ro connection (a consistent copy even while a writer holds the database),
+    then the vector segment directories it lists are copied. The serving process opens the copy,
+    so it takes no locks on, and writes nothing to, the files an ingest run or other workers use.
+    Copy from a published snapshot (or while no ingest runs) so the segment files are complete.
+    """
+    catalog = os.path.join(source_dir, CATALOG_FILENAME)
+    if not os.path.exists(catalog):
+        raise FileNotFoundError(f"ChromaDB catalog not found at {catalog}")
+    os.makedirs(work_dir, exist_ok=True)
+    remove_stale_copies(work_dir)
+    copy_dir = tempfile.mkdtemp(prefix=f"{READ_ONLY_COPY_PREFIX}{os.getpid()}_", dir=work_dir)
+    try:
+        source = sqlite3.connect(f"file:{catalog}?mode=ro", uri=True)
+        target = sqlite3.connect(os.path.join(copy_dir, CATALOG_FILENAME))
+        try:
+            source.backup(target)
+            segments = [row[0] for row in target.execute("SELECT id FROM segments")]
+        finally:
+            target.close()
+            source.close()
+        for segment in segments:
+            segment_dir = os.path.join(source_dir, segment)
+            if os.path.isdir(segment_dir):
+                shutil.copytree(segment_dir, os.path.join(copy_dir, segment))
+    except BaseException:
+        shutil.rmtree(copy_dir, ignore_errors=True)
+        raise
+    return copy_dir
+
+class EngineManager:
+    """
+    Holds the live VideoSearchEngine and swaps it atomically.
+
+    Each request acquires the current engine and releases it when done. A swap
+    only changes which engine new requests get; the old engine keeps serving its
+    in-flight requests and is closed once the last of them has been released.
+    """
+    def __init__(self, engine=None):
+        self._lock = threading.Lock()
+        self._engine = engine
+        self._in_flight = {}
+        self._retired = []
+        self._reload_lock = threading.Lock()
+
+    @property
+    def engine(self):
+        return self._engine
+
+    def acquire(self):
+        with self._lock:
+            engine = self._engine
+            if engine is not None:
+                self._in_flight[id(engine)] = self._in_flight.get(id(engine), 0) + 1
+            return engine
+
+    def retired_count(self):
+        """Swapped-out engines still held in memory until their in-flight requests finish."""
+        with self._lock:
+            return len(self._retired)
+
+    def release(self, engine):
+        if engine is None:
+            return
+        with self._lock:
+            self._in_flight[id(engine)] -= 1
+            drained = self._in_flight[id(engine)] == 0 and engine in self._retired
+            if self._in_flight[id(engine)] == 0:
+                del self._in_flight[id(engine)]
+            if drained:
+                self._retired.remove(engine)
+        if drained:
+            self._close(engine)
+
+    def swap(self, new_engine):
+        """Makes new_engine live; the previous one is closed once drained. Returns the previous engine."""
+        with self._lock:
+            old_engine, self._engine = self._engine, new_engine
+            idle = old_engine is not None and id(old_engine) not in self._in_flight
+            if old_engine is not None and not idle:
+                self._retired.append(old_engine)
+        if idle:
+            self._close(old_engine)
+        return old_engine
+
+    def reload_if_changed(self, current_version, load_engine):
+        """
+        Builds a new engine with load_engine() when the published snapshot version differs from
+        the live one, then swaps it in. Returns the new version, or None if nothing changed.
+        Only one reload runs at a time; the engine is built outside the request path.
+        """
+        with self._reload_lock:
+            live = self._engine
+            if live is not None and live.index_version == current_version:
+                return None
+            new_engine = load_engine()
+            self.swap(new_engine)
+            return new_engine.index_version
+
+    @staticmethod
+    def _close(engine):
+        try:
+            engine.close()
+        except Exception as e:
+            print(f"WARNING: could not close retired engine {engine.index_version}: {e}")
+        print(f"-> Retired engine {engine.index_version} drained and closed")
@@ -0,0 +1,80 @@
+import os
+import sys
+import tracemalloc
+import numpy as np
+
+# Number of records measured when estimating the size of a list of dicts
+RECORD_SAMPLE_SIZE = 200
+
+def process_memory():
+    """Resident and peak memory of this process in bytes, from /proc (Linux) or getrusage."""
+    usage = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'VmHWM', 'RssAnon', 'RssFile'):
+                    usage[key] = int(value.split()[0]) * 1024
+        return {'rss_bytes': usage.get('VmRSS'), 'peak_rss_bytes': usage.get('VmHWM'),
+                'anonymous_bytes': usage.get('RssAnon'), 'file_backed_bytes': usage.get('RssFile')}
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return {'rss_bytes': None, 'peak_rss_bytes': peak if sys.platform == 'darwin' else peak * 1024}
+
+def object_size(value):
+    """Shallow size of an object plus its direct contents (enough for flat dicts, lists and strings)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+def estimate_records_size(records, sample_size=RECORD_SAMPLE_SIZE):
+    """Estimates the size of a list of flat dicts by measuring an evenly spaced sample."""
+    if not records:
+        return sys.getsizeof(records)
+    step = max(1, len(records) // sample_size)
+    sample = records[::step][:sample_size]
+    per_record = sum(object_size(record) for record in sample) / len(sample)
+    return int(sys.getsizeof(records) + per_record * len(records))
+
+def arrays_size(arrays):
+    """Total nbytes of the numpy arrays in an iterable (other values are ignored)."""
+    return int(sum(array.nbytes for array in arrays if isinstance(array, np.ndarray)))
+
+def files_size(paths):
+    total = 0
+    for path in paths:
+        if os.path.isfile(path):
+            total += os.path.getsize(path)
+        elif os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+def tracemalloc_summary(limit=15, group_by='filename'):
+    """
+    Python-heap allocations grouped by file (or line), largest first. Only allocations made
+    after tracing started are seen, so start it at launch (QUERYTUBE_TRACEMALLOC=1).
+    Native memory (ONNX weights, HNSW graph, mmapped files) never shows up here.
+    """
+    if not tracemalloc.is_tracing():
+        return {'tracing': False}
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")
+    ])
+    stats = snapshot.statistics(group_by)
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        'tracing': True,
+        'traced_bytes': current,
+        'traced_peak_bytes': peak,
+        'top': [
+            {'location': str(stat.traceback[0]), 'bytes': stat.size, 'blocks': stat.count}
+            for stat in stats[:limit]
+        ]
+    }
@@ -0,0 +1,300 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from memory_accounting import arrays_size, estimate_records_size, object_size
+
+# Orderings available for the home feed
+FEED_ORDERS = ('default', 'views', 'recent', 'shuffle')
+# Server-side sort keys for search results ('relevance' keeps the ANN ranking)
+SORT_KEYS = ('relevance', 'views', 'likes', 'date', 'duration')
+# Duration facet buckets in seconds: (lower bound inclusive, upper bound exclusive, label)
+DURATION_BUCKETS = [
+    (1, 120, 'under_2m'),
+    (120, 600, '2_to_10m'),
+    (600, 1800, '10_to_30m'),
+    (1800, 3600, '30_to_60m'),
+    (3600, float('inf'), 'over_60m')
+]
+
+# Marker written last into a shared-arrays directory: array names and facet values
+SHARED_ARRAYS_MANIFEST = "arrays.json"
+
+def save_shared_arrays(arrays_dir, arrays, facet_values):
+    """
+    Writes the store's read-only arrays as .npy files that other workers can memory-map.
+    Built in a temp directory and renamed into place; if another worker got there first, its copy is kept.
+    """
+    tmp_dir = f"{arrays_dir}.tmp-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(tmp_dir, SHARED_ARRAYS_MANIFEST), 'w') as f:
+        json.dump({'arrays': sorted(arrays), 'facet_values': facet_values}, f)
+    try:
+        os.makedirs(os.path.dirname(arrays_dir) or '.', exist_ok=True)
+        os.rename(tmp_dir, arrays_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def prune_shared_arrays(arrays_dir, stale_tmp_seconds=3600):
+    """
+    Removes the sibling directories of arrays_dir saved for older versions of the same index
+    (same name up to the version, and an older manifest), and temp directories left by crashed
+    builds. Workers that already mapped a removed directory keep their mapping: the files are
+    only unlinked. Directories of newer versions are kept, so a worker still starting on an old
+    snapshot never removes what the workers on the new one map.
+    """
+    parent, name = os.path.split(os.path.abspath(arrays_dir))
+    prefix = name.rsplit('_', 1)[0] + '_'
+    manifest_path = os.path.join(arrays_dir, SHARED_ARRAYS_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return
+    kept_mtime = os.path.getmtime(manifest_path)
+    now = time.time()
+    for other in os.listdir(parent):
+        path = os.path.join(parent, other)
+        version = other[len(prefix):]
+        if other == name or not other.startswith(prefix) or '_' in version or not os.path.isdir(path):
+            continue
+        other_manifest = os.path.join(path, SHARED_ARRAYS_MANIFEST)
+        if '.tmp-' in other:
+            stale = now - os.path.getmtime(path) > stale_tmp_seconds
+        else:
+            stale = not os.path.exists(other_manifest) or os.path.getmtime(other_manifest) < kept_mtime
+        if stale:
+            shutil.rmtree(path, ignore_errors=True)
+            print(f"-> Removed unused shared arrays {other}")
+
+def load_shared_arrays(arrays_dir):
+    """Memory-maps the arrays saved by save_shared_arrays; returns (arrays, facet_values) or None."""
+    manifest_path = os.path.join(arrays_dir, SHARED_ARRAYS_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    arrays = {name: np.load(os.path.join(arrays_dir, f"{name}.npy"), mmap_mode='r') for name in manifest['arrays']}
+    return arrays, manifest['facet_values']
+
+class MetadataStore:
+    """
+    In-memory copy of the collection metadata, loaded once at startup.
+
+    Keeps the metadata dicts for hydrating results by row position, plus typed
+    columns and precomputed int32 feed orderings, so a home-feed page is an
+    O(limit) array slice regardless of how deep the client has scrolled.
+
+    With arrays_dir, those arrays are saved once as .npy files and memory-mapped read-only,
+    so every worker process serving the same index shares one physical copy of them.
+    """
+    def __init__(self, ids, metadatas, shuffle_cache_size=64, arrays_dir=None):
+        self.ids = ids
+        self.metadatas = metadatas
+        self.positions = {video_id: position for position, video_id in enumerate(ids)}
+        # YouTube video id -> first row holding it (duplicate uploads share an original_id)
+        self.video_positions = {}
+        for position, metadata in enumerate(metadatas):
+            self.video_positions.setdefault(str(metadata.get('original_id') or ids[position]), position)
+
+        shared = load_shared_arrays(arrays_dir) if arrays_dir else None
+        if shared is None:
+            shared = self._build_arrays(metadatas)
+            if arrays_dir:
+                save_shared_arrays(arrays_dir, *shared)
+                prune_shared_arrays(arrays_dir)
+                # Map the saved files so this worker shares the same pages as the others
+                shared = load_shared_arrays(arrays_dir) or shared
+        arrays, facet_values = shared
+        self.shared_arrays = arrays_dir is not None and isinstance(arrays['views'], np.memmap)
+
+        # Typed columns indexed by row position (older collections store these as strings)
+        self.views = arrays['views']
+        self.likes = arrays['likes']
+        self.comments = arrays['comments']
+        self.duration = arrays['duration']
+        self.published_ts = arrays['published_ts']
+        self.sort_columns = {
+            'views': self.views,
+            'likes': self.likes,
+            'date': self.published_ts,
+            'duration': self.duration
+        }
+        self.feeds = {order: arrays[f'feed_{order}'] for order in ('default', 'views', 'recent')}
+        # One boolean array per facet value (rows of one matrix per facet); counting is then a gather + count_nonzero
+        self.facet_bitmaps = {
+            facet: {value: arrays[f'facet_{facet}'][row] for row, value in enumerate(values)}
+            for facet, values in facet_values.items()
+        }
+        self.corpus_facet_counts = {
+            facet: {value: int(bitmap.sum()) for value, bitmap in bitmaps.items()}
+            for facet, bitmaps in self.facet_bitmaps.items()
+        }
+
+        self._shuffles = OrderedDict()
+        self._shuffles_lock = threading.Lock()
+        self._shuffle_cache_size = shuffle_cache_size
+
+    def _build_arrays(self, metadatas):
+        """Computes the typed columns, feed orderings and facet bitmaps; returns (arrays, facet_values)."""
+        frame = pd.DataFrame.from_records(metadatas) if metadatas else pd.DataFrame()
+        arrays = {
+            'views': self._numeric_column(frame, 'viewCount'),
+            'likes': self._numeric_column(frame, 'likeCount'),
+            'comments': self._numeric_column(frame, 'commentCount'),
+            'duration': self._numeric_column(frame, 'duration'),
+            'published_ts': self._timestamp_column(frame, 'publishedAt')
+        }
+        # Stable sorts keep the storage order among ties, so pages never reshuffle between requests
+        arrays['feed_default'] = np.arange(len(self.ids), dtype=np.int32)
+        arrays['feed_views'] = np.argsort(-arrays['views'], kind='stable').astype(np.int32)
+        arrays['feed_recent'] = np.argsort(-arrays['published_ts'], kind='stable').astype(np.int32)
+
+        facet_values = {}
+        for facet, bitmaps in self._build_facet_bitmaps(frame, arrays['published_ts'], arrays['duration']).items():
+            facet_values[facet] = list(bitmaps)
+            arrays[f'facet_{facet}'] = np.vstack(list(bitmaps.values())) if bitmaps \
+                else np.zeros((0, len(self.ids)), dtype=bool)
+        return arrays, facet_values
+
+    @classmethod
+    def from_collection(cls, collection, batch_size=5000, arrays_dir=None):
+        """
+        Reads all ids and metadata from a Chroma collection (or backend with the same get API).
+        arrays_dir: where to share the derived arrays between workers (one directory per index version).
+        """
+        ids, metadatas = [], []
+        total = collection.count()
+        for offset in range(0, total, batch_size):
+            batch = collection.get(limit=batch_size, offset=offset, include=['metadatas'])
+            ids.extend(batch['ids'])
+            metadatas.extend(batch['metadatas'])
+        return cls(ids, metadatas, arrays_dir=arrays_dir)
+
+    @staticmethod
+    def _numeric_column(frame, column):
+        """Parses a metadata column (native or stringified numbers) into float64, NaN -> 0."""
+        if column not in frame:
+            return np.zeros(len(frame), dtype=np.float64)
+        return pd.to_numeric(frame[column], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+
+    @staticmethod
+    def _timestamp_column(frame, column):
+        """Parses ISO dates into int64 seconds since epoch; unknown dates become -1 and sort last."""
+        if column not in frame:
+            return np.full(len(frame), -1, dtype=np.int64)
+        parsed = pd.to_datetime(frame[column], errors='coerce', utc=True)
+        seconds = (parsed - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+        return seconds.fillna(-1).to_numpy(dtype=np.int64)
+
+    def _build_facet_bitmaps(self, frame, published_ts, duration):
+        n = len(self.ids)
+        channels = frame['channel_title'].fillna('').astype(str) if 'channel_title' in frame else pd.Series([''] * n)
+        is_short = frame['is_short'].astype(str).str.lower().isin(['true', '1', 'yes']).to_numpy() \
+            if 'is_short' in frame else np.zeros(n, dtype=bool)
+        years = np.where(published_ts >= 0,
+                         pd.to_datetime(np.maximum(published_ts, 0), unit='s').year.astype(str), 'unknown')
+        buckets = np.full(n, 'unknown', dtype=object)
+        for low, high, label in DURATION_BUCKETS:
+            buckets[(duration >= low) & (duration < high)] = label
+
+        def bitmaps(values):
+            codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+            return {str(value): codes == code for code, value in enumerate(uniques)}
+
+        return {
+            'channel': bitmaps(channels.replace('', 'Unknown Channel')),
+            'is_short': {'true': is_short, 'false': ~is_short},
+            'publish_year': bitmaps(years),
+            'duration_bucket': bitmaps(buckets)
+        }
+
+    def facet_counts(self, positions=None, top_n=20):
+        """
+        Counts per facet value for a candidate set (row positions), or the whole corpus when
+        positions is None. Values are sorted by count, except years (newest first) and duration
+        buckets (shortest first).
+        """
+        if positions is None:
+            counts = self.corpus_facet_counts
+        else:
+            positions = np.asarray(positions, dtype=np.int64)
+            counts = {
+                facet: {value: int(np.count_nonzero(bitmap[positions])) for value, bitmap in bitmaps.items()}
+                for facet, bitmaps in self.facet_bitmaps.items()
+            }
+
+        bucket_order = [label for _, _, label in DURATION_BUCKETS] + ['unknown']
+        facets = {}
+        for facet, value_counts in counts.items():
+            items = [(value, count) for value, count in value_counts.items() if count > 0]
+            if facet == 'publish_year':
+                items.sort(key=lambda item: (item[0] != 'unknown', item[0]), reverse=True)
+            elif facet == 'duration_bucket':
+                items.sort(key=lambda item: bucket_order.index(item[0]))
+            else:
+                items.sort(key=lambda item: item[1], reverse=True)
+                items = items[:top_n]
+            facets[facet] = [{'value': value, 'count': count} for value, count in items]
+        return facets
+
+    def count(self):
+        return len(self.ids)
+
+    def memory_usage(self):
+        """Approximate bytes held by the store, split into its parts, plus the shuffle cache."""
+        with self._shuffles_lock:
+            shuffles = list(self._shuffles.values())
+        parts = {
+            'metadata_records': estimate_records_size(self.metadatas),
+            'id_lookups': object_size(self.ids) + object_size(self.positions) + object_size(self.video_positions),
+            'typed_columns': arrays_size([self.views, self.likes, self.comments, self.duration, self.published_ts]),
+            'feed_orders': arrays_size(self.feeds.values()),
+            'facet_bitmaps': arrays_size(bitmap for bitmaps in self.facet_bitmaps.values() for bitmap in bitmaps.values())
+        }
+        # Memory-mapped arrays are shared by every worker, so they are reported but not counted per process
+        shared_parts = ('typed_columns', 'feed_orders', 'facet_bitmaps')
+        return {
+            'bytes': sum(value for key, value in parts.items() if not (self.shared_arrays and key in shared_parts)),
+            'videos': len(self.ids),
+            'shared_arrays': self.shared_arrays,
+            'parts': parts,
+            'caches': {
+                'shuffle_orders': {'entries': len(shuffles), 'max_entries': self._shuffle_cache_size,
+                                   'bytes': arrays_size(shuffles)}
+            }
+        }
+
+    def _shuffle(self, seed):
+        """Seeded permutation; the same seed always yields the same order, so scrolling is stable."""
+        with self._shuffles_lock:
+            order = self._shuffles.get(seed)
+            if order is not None:
+                self._shuffles.move_to_end(seed)
+                return order
+        order = np.random.default_rng(seed).permutation(len(self.ids)).astype(np.int32)
+        with self._shuffles_lock:
+            self._shuffles[seed] = order
+            if len(self._shuffles) > self._shuffle_cache_size:
+                self._shuffles.popitem(last=False)
+        return order
+
+    def sort_order(self, positions, sort_key, descending=True):
+        """
+        Stable vectorized ordering of a candidate set (row positions) by a typed column.
+        Returns indices into `positions`; ties keep their relevance order.
+        """
+        values = self.sort_columns[sort_key][np.asarray(positions, dtype=np.int64)]
+        return np.argsort(-values if descending else values, kind='stable')
+
+    def feed_page(self, order='default', offset=0, limit=10, seed=0):
+        """Row positions for one page of the home feed."""
+        if order == 'shuffle':
+            feed = self._shuffle(seed)
+        else:
+            feed = self.feeds[order]
+        return feed[offset:offset + limit]
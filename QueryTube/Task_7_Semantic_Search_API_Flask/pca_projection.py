@@ -0,0 +1,42 @@
+import os
+import numpy as np
+
+# The ingest-time PCA projection, shared by Embedding.py (which fits it and projects the corpus)
+# and the API (which projects query vectors with it), so both sides always project the same way.
+# Stored as an .npz with mean, components, explained_variance, total_variance and whiten.
+
+def save_pca_projection(projection, path):
+    """Saves a projection fitted by Embedding.py's fit_pca_projection()."""
+    np.savez(
+        path,
+        mean=projection['mean'],
+        components=projection['components'],
+        explained_variance=projection['explained_variance'],
+        total_variance=projection['total_variance'],
+        whiten=np.array(projection['whiten'])
+    )
+
+def load_pca_projection(path):
+    """Loads a projection saved by save_pca_projection(), or None if there is none."""
+    if not path or not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return {
+            'mean': data['mean'],
+            'components': data['components'],
+            'explained_variance': data['explained_variance'],
+            'total_variance': data['total_variance'],
+            'whiten': bool(data['whiten'])
+        }
+
+def apply_pca_projection(vectors, projection):
+    """
+    Projects vectors with a fitted PCA projection and re-normalizes them to unit length,
+    so cosine similarity keeps working in the reduced space.
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    projected = (vectors - projection['mean']) @ projection['components'].T
+    if projection['whiten']:
+        projected /= np.sqrt(projection['explained_variance'])
+    norms = np.linalg.norm(projected, axis=1, keepdims=True)
+    return projected / np.maximum(norms, 1e-12)
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import numpy as np
+from query_log import top_queries
+
+# --- Configuration ---
+# Reads the query logs written by the API (QUERYTUBE_QUERY_LOG_DIR) and writes the most frequent
+# queries with their query vectors to PREWARM_PATH. The API (QUERYTUBE_PREWARM_PATH) loads the
+# file at startup and fills its query cache with their rankings, so the head of the query
+# distribution is answered without touching the encoder.
+QUERY_LOG_DIR = os.environ.get("QUERYTUBE_QUERY_LOG_DIR", "query_logs")
+PREWARM_PATH = os.environ.get("QUERYTUBE_PREWARM_PATH", "prewarm_queries.npz")
+TOP_N = 1000
+# Queries seen fewer times are left out: they are not worth a cache slot, and a rare query is
+# the likeliest to identify the person who typed it
+MIN_QUERY_COUNT = 3
+ENCODE_BATCH_SIZE = 32
+
+def encode_queries(queries):
+    """Raw query vectors from the API's encoder (the API applies its PCA projection, if any, itself)."""
+    from chromadb.utils import embedding_functions
+    # One instance for every batch (DefaultEmbeddingFunction opens a new ONNX session per call)
+    embedding_function = embedding_functions.ONNXMiniLM_L6_V2()
+    vectors = []
+    for start in range(0, len(queries), ENCODE_BATCH_SIZE):
+        vectors.extend(embedding_function(queries[start:start + ENCODE_BATCH_SIZE]))
+    return np.asarray(vectors, dtype=np.float32)
+
+def main():
+    print("\n--- QUERY CACHE PREWARM ---")
+    print(f"--- 1. READING QUERY LOGS ({QUERY_LOG_DIR}) ---")
+    if not os.path.isdir(QUERY_LOG_DIR):
+        print(f"FATAL ERROR: query log directory not found: {QUERY_LOG_DIR}")
+        sys.exit(1)
+    rows = top_queries(QUERY_LOG_DIR, TOP_N, min_count=MIN_QUERY_COUNT)
+    if not rows:
+        print(f"FATAL ERROR: no query was logged at least {MIN_QUERY_COUNT} times.")
+        sys.exit(1)
+    queries = [query for query, _ in rows]
+    counts = np.array([count for _, count in rows], dtype=np.int64)
+    print(f"-> {len(queries)} queries selected, covering {counts.sum()} logged searches")
+
+    print("\n--- 2. ENCODING QUERIES ---")
+    start_time = time.time()
+    vectors = encode_queries(queries)
+    print(f"-> {len(vectors)} vectors ({vectors.shape[1]} dims) in {time.time() - start_time:.2f} seconds")
+
+    # Written under a temporary name and renamed, so a starting API never reads a partial file
+    tmp_path = PREWARM_PATH + ".tmp.npz"
+    np.savez(tmp_path, queries=np.array(queries), counts=counts, vectors=vectors)
+    os.replace(tmp_path, PREWARM_PATH)
+    print(f"\n-> Prewarm file written to: {PREWARM_PATH}")
+    print("Set QUERYTUBE_PREWARM_PATH to this file to load it at API startup.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+import re
+import json
+import glob
+import logging
+import threading
+from collections import Counter
+from logging.handlers import RotatingFileHandler
+from datetime import datetime, timezone
+from semantic_cache import normalize_query
+
+# Each worker process writes its own file (rotation is not safe across processes):
+#   <log_dir>/queries.<pid>.jsonl, rotated to queries.<pid>.jsonl.1 ... .<backups>
+QUERY_LOG_PATTERN = "queries.*.jsonl*"
+
+# Queries are logged normalized, with anything that looks like contact details or an account
+# number replaced, and without any client information (no IP, headers or session)
+EMAIL = re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b")
+URL = re.compile(r"\bhttps?://\S+")
+LONG_NUMBER = re.compile(r"\b\d[\d -]{5,}\d\b")
+
+def anonymize_query(query):
+    query = normalize_query(query)
+    query = EMAIL.sub("<email>", query)
+    query = URL.sub("<url>", query)
+    return LONG_NUMBER.sub("<number>", query)
+
+class QueryLog:
+    """Appends one JSON line per search (anonymized query, latency, result count) to a rotating file."""
+    def __init__(self, log_dir, max_bytes=50_000_000, backups=5):
+        os.makedirs(log_dir, exist_ok=True)
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def _logger(self):
+        """The logger of the calling process (the file is opened on first use after a fork)."""
+        pid = os.getpid()
+        # Keyed by directory too: loggers live as long as the process, so a QueryLog for another
+        # directory must not pick up one whose handler writes to the first
+        logger = logging.getLogger(f"querytube.query_log.{pid}:{os.path.abspath(self.log_dir)}")
+        if logger.handlers:
+            return logger
+        with self._lock:
+            if logger.handlers:
+                return logger
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = RotatingFileHandler(os.path.join(self.log_dir, f"queries.{pid}.jsonl"),
+                                          maxBytes=self.max_bytes, backupCount=self.backups, encoding='utf-8')
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        return logger
+
+    def record(self, query, latency_ms, results, sort='relevance', offset=0, partial=False):
+        self._logger().info(json.dumps({
+            'ts': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'query': anonymize_query(query),
+            'sort': sort,
+            'offset': offset,
+            'results': results,
+            'latency_ms': round(latency_ms, 3),
+            'partial': partial
+        }))
+
+def top_queries(log_dir, top_n, min_count=1):
+    """[(query, count)] of the most frequent logged queries, across every worker's files and rotations."""
+    counts = Counter()
+    for path in glob.glob(os.path.join(log_dir, QUERY_LOG_PATTERN)):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    query = json.loads(line)['query']
+                except (ValueError, KeyError):
+                    continue  # a line cut short by a crash or a rotation
+                if query:
+                    counts[query] += 1
+    return [(query, count) for query, count in counts.most_common(top_n) if count >= min_count]
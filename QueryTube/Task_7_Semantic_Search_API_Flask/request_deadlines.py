@@ -0,0 +1,30 @@
+import time
+
+class Deadline:
+    """
+    Time budget of one request. The search stages check it before (and, where the work is split
+    into steps, during) their work and cut the work short once it is spent; each stage that did
+    so is recorded in `degraded` so the response can be marked partial.
+    """
+    def __init__(self, budget_ms):
+        self.budget_ms = budget_ms
+        self.expires_at = time.monotonic() + budget_ms / 1000
+        self.degraded = []
+
+    def remaining_ms(self):
+        return max(0.0, (self.expires_at - time.monotonic()) * 1000)
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def degrade(self, stage):
+        """Records that stage returned less than it would have with more time."""
+        if stage not in self.degraded:
+            self.degraded.append(stage)
+
+def remaining_ms(deadline):
+    """Remaining budget in ms, or None when the request has no deadline."""
+    return None if deadline is None else deadline.remaining_ms()
+
+def expired(deadline):
+    return deadline is not None and deadline.expired()
@@ -0,0 +1,56 @@
+import io
+import os
+import time
+import pstats
+import cProfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+@contextmanager
+def stage(timings, name):
+    """Records the wall time of a block in timings[name] (milliseconds); a no-op when timings is None."""
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round((time.perf_counter() - start) * 1000, 3)
+
+def profile_call(function, top_n=25, sort_by='cumulative', save_dir=None):
+    """
+    Runs function() under cProfile. Returns (result, report) where the report lists the top_n
+    functions by sort_by. With save_dir, the raw stats are also written to a .prof file
+    (open it with snakeviz, or convert it to a flamegraph with flameprof/gprof2dot).
+    """
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        result = function()
+    finally:
+        profiler.disable()
+    wall_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    stats.sort_stats(sort_by)
+    frames = []
+    for func in stats.fcn_list[:top_n]:
+        primitive_calls, total_calls, total_time, cumulative_time, _ = stats.stats[func]
+        filename, line, name = func
+        frames.append({
+            'function': f"{os.path.basename(filename)}:{line}({name})" if line else name,
+            'calls': total_calls,
+            'primitive_calls': primitive_calls,
+            'self_ms': round(total_time * 1000, 3),
+            'cumulative_ms': round(cumulative_time * 1000, 3)
+        })
+
+    report = {'wall_ms': wall_ms, 'sort_by': sort_by, 'top_frames': frames}
+    if save_dir:
+        os.makedirs(save_dir, exist_ok=True)
+        path = os.path.join(save_dir, f"search_{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')}.prof")
+        stats.dump_stats(path)
+        report['profile_file'] = path
+    return result, report
@@ -0,0 +1,137 @@
+import random
+import threading
+from collections import deque
+import numpy as np
+from memory_accounting import object_size
+
+def normalize_query(query):
+    """Case- and whitespace-insensitive form of a query, used as the exact-match cache key."""
+    return " ".join(query.lower().split())
+
+class CacheHit:
+    __slots__ = ('key', 'ids', 'distances', 'similarity')
+
+    def __init__(self, key, ids, distances, similarity):
+        self.key = key
+        self.ids = ids
+        self.distances = distances
+        self.similarity = similarity
+
+class SemanticQueryCache:
+    """
+    Ranked candidates (ids and distances, best first) of recently searched queries.
+
+    A lookup first tries the normalized query text, which needs no encoding at all, then the
+    query vector: the cached query vectors are kept in one unit-length matrix, and the ranking of
+    the most similar cached query is reused when its cosine similarity is at least `threshold`
+    ("beginner python tutorial" reusing "python beginner tutorial"). Least recently used entries
+    are evicted once `capacity` queries are cached.
+
+    Reusing a neighbour's ranking can be wrong, so a sample (`audit_rate`) of similarity hits is
+    also run against the index; a hit whose top `audit_top_k` overlaps the fresh ones by less
+    than `audit_min_overlap` is counted as a false hit, and the last few are kept for inspection.
+    """
+    def __init__(self, dimension, capacity=1024, threshold=0.95, audit_rate=0.02,
+                 audit_min_overlap=0.7, audit_top_k=10):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+        self.audit_min_overlap = audit_min_overlap
+        self.audit_top_k = audit_top_k
+        self.vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self.entries = [None] * capacity          # (key, ids, distances) per slot
+        self.last_used = np.full(capacity, -1, dtype=np.int64)  # -1 marks an empty slot
+        self.slots_by_key = {}
+        self._clock = 0
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self.stats = {'lookups': 0, 'exact_hits': 0, 'similar_hits': 0, 'audits': 0, 'false_hits': 0}
+        self.false_hit_samples = deque(maxlen=20)
+
+    def _touch(self, slot):
+        self._clock += 1
+        self.last_used[slot] = self._clock
+
+    def get(self, key, n_results):
+        """Exact lookup by normalized text; counts one lookup. Returns a CacheHit or None."""
+        with self._lock:
+            self.stats['lookups'] += 1
+            slot = self.slots_by_key.get(key)
+            if slot is None or len(self.entries[slot][1]) < n_results:
+                return None
+            self._touch(slot)
+            self.stats['exact_hits'] += 1
+            _, ids, distances = self.entries[slot]
+            return CacheHit(key, ids[:n_results], distances[:n_results], 1.0)
+
+    def get_similar(self, vector, n_results):
+        """Lookup by vector after a get() miss. Returns a CacheHit for the closest cached query or None."""
+        vector = np.asarray(vector, dtype=np.float32)
+        vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+        with self._lock:
+            used = self.last_used >= 0
+            if not used.any():
+                return None
+            similarities = self.vectors @ vector
+            similarities[~used] = -np.inf
+            slot = int(np.argmax(similarities))
+            similarity = float(similarities[slot])
+            key, ids, distances = self.entries[slot]
+            if similarity < self.threshold or len(ids) < n_results:
+                return None
+            self._touch(slot)
+            self.stats['similar_hits'] += 1
+            return CacheHit(key, ids[:n_results], distances[:n_results], similarity)
+
+    def should_audit(self):
+        return self._random.random() < self.audit_rate
+
+    def record_audit(self, key, hit, fresh_ids):
+        """Compares a similarity hit's ranking with the one the index returned for the actual query."""
+        top_k = min(self.audit_top_k, len(fresh_ids))
+        overlap = len(set(hit.ids[:top_k]) & set(fresh_ids[:top_k])) / top_k if top_k else 1.0
+        with self._lock:
+            self.stats['audits'] += 1
+            if overlap < self.audit_min_overlap:
+                self.stats['false_hits'] += 1
+                self.false_hit_samples.append({'query': key, 'cached_query': hit.key,
+                                               'similarity': round(hit.similarity, 4), 'overlap': round(overlap, 3)})
+        return overlap
+
+    def put(self, key, vector, ids, distances):
+        """Caches a query's ranking, replacing the least recently used entry when full."""
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            slot = self.slots_by_key.get(key)
+            if slot is None:
+                slot = int(np.argmin(self.last_used))  # an empty slot (-1) if there is one
+                if self.entries[slot] is not None:
+                    del self.slots_by_key[self.entries[slot][0]]
+                self.slots_by_key[key] = slot
+            self.vectors[slot] = vector / max(float(np.linalg.norm(vector)), 1e-12)
+            self.entries[slot] = (key, list(ids), np.asarray(distances, dtype=np.float32))
+            self._touch(slot)
+
+    def report(self):
+        """Hit rates and audit results (for /debug/query-cache)."""
+        with self._lock:
+            stats = dict(self.stats)
+            samples = list(self.false_hit_samples)
+            entries = len(self.slots_by_key)
+        hits = stats['exact_hits'] + stats['similar_hits']
+        return {
+            **stats,
+            'entries': entries,
+            'capacity': self.capacity,
+            'threshold': self.threshold,
+            'hit_rate': round(hits / stats['lookups'], 4) if stats['lookups'] else 0.0,
+            'false_hit_rate': round(stats['false_hits'] / stats['audits'], 4) if stats['audits'] else None,
+            'recent_false_hits': samples
+        }
+
+    def memory_usage(self):
+        with self._lock:
+            entries = [entry for entry in self.entries if entry is not None]
+        entries_bytes = sum(object_size(ids) + distances.nbytes for _, ids, distances in entries)
+        return {'entries': len(entries), 'max_entries': self.capacity,
+                'bytes': int(self.vectors.nbytes + entries_bytes + object_size(self.slots_by_key))}
@@ -0,0 +1,378 @@
+import os
+import sys
+import glob
+import json
+import hashlib
+import threading
+import subprocess
+import time
+import numpy as np
+from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
+import app as app_module
+import prewarm_queries
+from request_deadlines import Deadline
+from query_log import QUERY_LOG_PATTERN
+from conftest import StubEncoder, VIDEOS, TRANSCRIPTS, DIMENSION, ADMIN_TOKEN, write_chroma_dir
+
+# --- Startup ---
+
+def test_import_skips_heavy_modules():
+    code = "import sys, app; print(','.join(m for m in ('chromadb', 'flask_cors', 'onnxruntime') if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(app_module.__file__)),
+                            capture_output=True, text=True, check=True).stdout
+    assert output.strip() == ""
+
+def test_create_app_warms_up_encoder(make_app):
+    flask_app = make_app(WARM_UP_ENCODER=True)
+    encoder = StubEncoder.instances[0]
+    # Loaded during startup, so the first search does not pay for it
+    assert encoder.calls == 1
+    timings = flask_app.config['STARTUP_TIMINGS']
+    for name in ('import_chromadb_ms', 'open_index_ms', 'metadata_store_ms', 'encoder_load_ms', 'create_app_ms'):
+        assert name in timings
+    assert flask_app.test_client().get('/search?query=python tutorial').status_code == 200
+    assert encoder.calls == 2
+
+def test_missing_index_starts_without_engine(make_app, tmp_path):
+    client = make_app(NUMPY_INDEX_DIR=str(tmp_path / "missing")).test_client()
+    response = client.get('/search?query=python tutorial')
+    assert response.status_code == 500
+    assert 'not initialized' in response.get_json()['error']
+
+# --- /debug/memory ---
+
+ADMIN_HEADERS = {'X-Admin-Token': ADMIN_TOKEN}
+
+def test_memory_requires_admin_token(client):
+    assert client.get('/debug/memory').status_code == 403
+    assert client.get('/debug/memory', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    report = client.get('/debug/memory', headers=ADMIN_HEADERS).get_json()
+    assert report['components']['metadata_store']['videos'] == len(VIDEOS)
+    assert report['accounted_bytes'] > 0
+    # The backend's own metadata frame is dropped once the metadata store holds the metadata
+    assert report['components']['index']['metadata_bytes'] == 0
+
+def test_memory_reports_loaded_encoder(client, engine, tmp_path):
+    encoder = ONNXMiniLM_L6_V2()
+    encoder.DOWNLOAD_PATH = str(tmp_path / "onnx_models")
+    os.makedirs(os.path.join(encoder.DOWNLOAD_PATH, encoder.EXTRACTED_FOLDER_NAME))
+    with open(os.path.join(encoder.DOWNLOAD_PATH, encoder.EXTRACTED_FOLDER_NAME, "model.onnx"), 'wb') as f:
+        f.write(b"\0" * 4096)
+    engine.embedding_function = encoder
+
+    report = client.get('/debug/memory', headers=ADMIN_HEADERS).get_json()['components']['encoder']
+    assert report == {'bytes': 0, 'loaded': False, 'model_file_bytes': 4096}
+    # What the model cached_property stores on the instance once the ONNX session is open
+    encoder.__dict__['model'] = object()
+    report = client.get('/debug/memory', headers=ADMIN_HEADERS).get_json()['components']['encoder']
+    assert report == {'bytes': 4096, 'loaded': True, 'model_file_bytes': 4096}
+
+def test_memory_rejects_bad_parameters(client):
+    response = client.get('/debug/memory?top=abc', headers=ADMIN_HEADERS)
+    assert response.status_code == 400 and 'top' in response.get_json()['error']
+    assert client.get('/debug/memory?group_by=module', headers=ADMIN_HEADERS).status_code == 400
+    assert client.get('/debug/memory?top=5&group_by=lineno', headers=ADMIN_HEADERS).status_code == 200
+
+# --- /facets ---
+
+def facet_values(facets, facet):
+    return {item['value']: item['count'] for item in facets[facet]}
+
+def test_corpus_facets(client):
+    body = client.get('/facets').get_json()
+    assert body['candidates'] == len(VIDEOS)
+    assert facet_values(body['facets'], 'channel') == {'Code Academy': 3, 'Data Lab': 2, 'Kitchen Stories': 2,
+                                                       'Music Room': 2, 'Fit Daily': 1}
+    assert facet_values(body['facets'], 'is_short') == {'false': 8, 'true': 2}
+    assert [item['value'] for item in body['facets']['publish_year']] == \
+        ['2024', '2023', '2022', '2021', '2020', '2019']
+    assert len(client.get('/facets?top=1').get_json()['facets']['channel']) == 1
+
+def test_query_facets_count_top_candidates(make_app):
+    client = make_app(FACET_CANDIDATE_POOL=3).test_client()
+    body = client.get('/facets?query=python tutorial').get_json()
+    assert body['candidates'] == 3
+    assert facet_values(body['facets'], 'channel') == {'Code Academy': 2, 'Data Lab': 1}
+
+def test_facets_reject_bad_parameters(client):
+    response = client.get('/facets?top=abc')
+    assert response.status_code == 400 and response.is_json
+    assert client.get('/facets?query=ab').status_code == 400
+
+# --- Snapshots ---
+
+def test_snapshot_watcher_only_runs_for_chroma(make_app, tmp_path):
+    watchers = lambda: [thread for thread in threading.enumerate() if thread.name == "snapshot-watcher"]
+    before = len(watchers())
+    client = make_app(CHROMA_SNAPSHOTS_DIR=str(tmp_path / "snapshots")).test_client()
+    assert len(watchers()) == before
+    response = client.post('/admin/reload', headers=ADMIN_HEADERS)
+    assert response.status_code == 400 and 'chroma' in response.get_json()['error']
+
+# --- profile=1 ---
+
+def test_profile_requires_admin_token(client):
+    assert client.get('/search?query=python tutorial&profile=1').status_code == 403
+
+def test_profile_bypasses_query_cache(client):
+    assert client.get('/search?query=python tutorial').status_code == 200  # now cached
+    response = client.get('/search?query=python tutorial&profile=1', headers=ADMIN_HEADERS)
+    body = response.get_json()
+    assert 'encode_ms' in body['profile']['stages'] and 'ann_query_ms' in body['profile']['stages']
+    assert body['profile']['query_cache'] == 'bypassed'
+    assert body['results'] and response.cache_control.no_store and response.headers.get('ETag') is None
+
+# --- HTTP caching ---
+
+def test_search_etag_and_304(client):
+    response = client.get('/search?query=python tutorial&limit=3')
+    etag = response.headers['ETag']
+    assert response.status_code == 200 and len(response.get_json()['results']) == 3
+    assert response.cache_control.public and response.cache_control.max_age == app_module.CACHE_MAX_AGE_SECONDS
+    assert response.headers.get('Last-Modified')
+    assert etag.strip('"').startswith(app_module.engine_manager.engine.index_version)
+
+    again = client.get('/search?query=python tutorial&limit=3', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.headers['ETag'] == etag and not again.data
+    # Any other parameter is another resource
+    assert client.get('/search?query=python tutorial&limit=4').headers['ETag'] != etag
+    assert client.get('/search?query=python tutorial&limit=3&sort=views').headers['ETag'] != etag
+
+def test_search_post_is_not_cacheable(client):
+    response = client.post('/search', json={'query': 'python tutorial'})
+    assert response.status_code == 200 and response.headers.get('ETag') is None
+
+def test_initial_videos_etag_and_304(client):
+    response = client.get('/initial-videos?limit=4&order=views')
+    body = response.get_json()
+    assert [video['video_id'] for video in body['videos']] == ['vid00000004', 'vid00000010', 'vid00000002', 'vid00000005']
+    assert body['has_more'] and response.cache_control.max_age == app_module.CACHE_MAX_AGE_SECONDS
+    etag = response.headers['ETag']
+    assert client.get('/initial-videos?limit=4&order=views', headers={'If-None-Match': etag}).status_code == 304
+    # The seed only matters, and only changes the ETag, for order=shuffle
+    assert client.get('/initial-videos?limit=4&order=views&seed=5').headers['ETag'] == etag
+    shuffled = client.get('/initial-videos?limit=4&order=shuffle&seed=1').headers['ETag']
+    assert client.get('/initial-videos?limit=4&order=shuffle&seed=2').headers['ETag'] != shuffled
+
+def test_initial_videos_past_the_end(client):
+    body = client.get(f'/initial-videos?offset={len(VIDEOS)}').get_json()
+    assert body == {'videos': [], 'has_more': False, 'total': 0}
+    assert client.get('/initial-videos?order=oldest').status_code == 400
+
+# --- sort ---
+
+def result_ids(response):
+    return [video['video_id'] for video in response.get_json()['results']]
+
+def test_sort_reorders_candidate_pool(client):
+    # The pool (SORT_CANDIDATE_POOL) covers the whole test corpus, so the order is the corpus order
+    assert result_ids(client.get('/search?query=python tutorial&limit=3&sort=views')) == \
+        ['vid00000004', 'vid00000010', 'vid00000002']
+    assert result_ids(client.get('/search?query=python tutorial&limit=3&offset=3&sort=views')) == \
+        ['vid00000005', 'vid00000009', 'vid00000001']
+    assert result_ids(client.get('/search?query=python tutorial&limit=3&sort=views&direction=asc')) == \
+        ['vid00000006', 'vid00000003', 'vid00000008']
+    assert result_ids(client.get('/search?query=python tutorial&limit=3&sort=date&direction=asc')) == \
+        ['vid00000007', 'vid00000005', 'vid00000001']
+    response = client.post('/search', json={'query': 'python tutorial', 'limit': 3, 'sort': 'duration'})
+    assert result_ids(response) == ['vid00000008', 'vid00000009', 'vid00000002']
+
+def test_relevance_sort_is_default(client):
+    relevance = result_ids(client.get('/search?query=python tutorial&limit=3'))
+    assert relevance == result_ids(client.get('/search?query=python tutorial&limit=3&sort=relevance'))
+    assert set(relevance) <= {'vid00000001', 'vid00000002', 'vid00000003'}
+
+def test_sort_rejects_bad_parameters(client):
+    assert client.get('/search?query=python tutorial&sort=rating').status_code == 400
+    response = client.get('/search?query=python tutorial&sort=views&direction=up')
+    assert response.status_code == 400 and 'sort' in response.get_json()['error']
+
+# --- /videos/<id>/transcript ---
+
+def test_transcript_character_paging(client):
+    text = TRANSCRIPTS['vid00000001']
+    body = client.get('/videos/vid00000001/transcript?length=100').get_json()
+    assert body['video_id'] == 'vid00000001' and body['total_chars'] == len(text)
+    assert body['text'] == text[:100] and body['has_more'] and body['next_start'] == 100
+    body = client.get(f'/videos/vid00000001/transcript?start={len(text) - 10}&length=100').get_json()
+    assert body['text'] == text[-10:] and not body['has_more'] and body['next_start'] is None
+    # The whole (short) transcript fits in the default page
+    body = client.get('/videos/vid00000005/transcript').get_json()
+    assert body['text'] == TRANSCRIPTS['vid00000005'] and not body['has_more']
+
+def test_transcript_segment_paging(make_app):
+    client = make_app(TRANSCRIPT_SEGMENT_CHARS=100).test_client()
+    pages, segment = [], 0
+    while segment is not None:
+        body = client.get(f'/videos/vid00000001/transcript?segment={segment}').get_json()
+        assert body['segments'] == 1
+        pages.append(body['text'])
+        segment = body['next_segment']
+    # Segments break at spaces and cover the transcript without gaps
+    assert ''.join(pages) == TRANSCRIPTS['vid00000001']
+    assert len(pages) == body['total_segments'] > 1
+    assert all(page.endswith(' ') for page in pages[:-1])
+    body = client.get('/videos/vid00000001/transcript?segment=1&segments=2').get_json()
+    assert body['text'] == pages[1] + pages[2] and body['next_segment'] == 3
+
+def test_transcript_errors(client):
+    response = client.get('/videos/vid00000002/transcript')  # in the index, but no transcript
+    assert response.status_code == 404 and response.is_json
+    assert client.get('/videos/nosuchvideo/transcript').status_code == 404
+    response = client.get('/videos/vid00000001/transcript?start=abc')
+    assert response.status_code == 400 and 'integers' in response.get_json()['error']
+    assert client.get('/videos/vid00000001/transcript?segment=x').status_code == 400
+
+def test_transcript_etag(client):
+    response = client.get('/videos/vid00000001/transcript?length=100')
+    etag = response.headers['ETag']
+    assert client.get('/videos/vid00000001/transcript?length=100',
+                      headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/videos/vid00000001/transcript?length=200').headers['ETag'] != etag
+
+# --- Encoder service ---
+
+def test_search_uses_encoder_service(make_app, encoder_socket):
+    client = make_app(ENCODER_SOCKET=encoder_socket).test_client()
+    encoder = StubEncoder.instances[0]
+    response = client.get('/search?query=python tutorial&limit=3')
+    assert set(result_ids(response)) <= {'vid00000001', 'vid00000002', 'vid00000003'}
+    # Warm-up and the search both went to the service; the in-process model was never loaded
+    assert encoder.calls == 0
+    report = client.get('/debug/memory', headers=ADMIN_HEADERS).get_json()['components']['encoder']
+    assert report['service'] == {'socket': encoder_socket, 'available': True}
+
+def test_missing_encoder_service_falls_back_in_process(make_app, tmp_path, capsys):
+    client = make_app(ENCODER_SOCKET=str(tmp_path / "missing.sock")).test_client()
+    encoder = StubEncoder.instances[0]
+    assert 'loading the query encoder in-process' in capsys.readouterr().out
+    assert encoder.calls == 1  # the warm-up
+    response = client.get('/search?query=python tutorial&limit=3')
+    assert response.status_code == 200 and len(result_ids(response)) == 3
+    assert encoder.calls == 2
+    report = client.get('/debug/memory', headers=ADMIN_HEADERS).get_json()['components']['encoder']
+    assert report['service']['available'] is False
+
+# --- Deadlines ---
+
+def slow_encoder(monkeypatch, seconds):
+    encode = StubEncoder.__call__
+    def slow_call(self, texts):
+        time.sleep(seconds)
+        return encode(self, texts)
+    monkeypatch.setattr(StubEncoder, '__call__', slow_call)
+
+def test_spent_deadline_returns_partial_page(client, monkeypatch):
+    slow_encoder(monkeypatch, 0.02)
+    response = client.get('/search?query=python tutorial&limit=3&sort=views&deadline_ms=5')
+    body = response.get_json()
+    # The page is still fetched once the query is encoded; the re-sort pool and the sort are skipped
+    assert body['partial'] and body['degraded'] == ['sort_pool', 'sort']
+    assert set(result_ids(response)) <= {'vid00000001', 'vid00000002', 'vid00000003'}
+    assert response.cache_control.no_store and response.headers.get('ETag') is None
+
+def test_search_within_deadline_is_complete(client):
+    response = client.get('/search?query=python tutorial&limit=3&sort=views&deadline_ms=5000')
+    body = response.get_json()
+    assert not body['partial'] and 'degraded' not in body and response.headers.get('ETag')
+
+def test_deadline_must_be_an_integer(client):
+    assert client.get('/search?query=python tutorial&deadline_ms=soon').status_code == 400
+
+def test_deadline_spent_before_encoder_service(make_app, encoder_socket):
+    make_app(ENCODER_SOCKET=encoder_socket)
+    engine = app_module.engine_manager.engine
+    results = engine.search('python tutorial', limit=3, deadline=Deadline(0))
+    assert results['partial'] and results['degraded'] == ['encode'] and results['results'] == []
+    # Running out of time is not the service's fault, so it stays in use
+    assert engine.encoder_client.available()
+    assert len(engine.search('python tutorial', limit=3, deadline=Deadline(5000))['results']) == 3
+    assert StubEncoder.instances[0].calls == 0
+
+# --- Query log and prewarm ---
+
+def logged_queries(log_dir):
+    entries = []
+    for path in glob.glob(os.path.join(log_dir, QUERY_LOG_PATTERN)):
+        with open(path, encoding='utf-8') as f:
+            entries += [json.loads(line) for line in f]
+    return entries
+
+def test_search_log_is_anonymized(make_app, tmp_path):
+    log_dir = str(tmp_path / "query_logs")
+    client = make_app(QUERY_LOG_DIR=log_dir).test_client()
+    client.get('/search?query=Python tutorial from Jane.Doe@example.com&limit=3')
+    client.get('/search?query=python tutorial call 555 123 4567&sort=views')
+    client.get('/search?query=python tutorial&profile=1', headers=ADMIN_HEADERS)  # not logged
+    entries = logged_queries(log_dir)
+    assert [entry['query'] for entry in entries] == ['python tutorial from <email>', 'python tutorial call <number>']
+    assert entries[0]['results'] == 3 and entries[1]['sort'] == 'views' and not entries[0]['partial']
+    # Nothing about the client is logged
+    assert set(entries[0]) == {'ts', 'query', 'sort', 'offset', 'results', 'latency_ms', 'partial'}
+
+def wait_for_prewarm(engine, timeout=5.0):
+    give_up = time.monotonic() + timeout
+    while 'prewarm_ms' not in engine.startup_timings and time.monotonic() < give_up:
+        time.sleep(0.01)
+    return 'prewarm_ms' in engine.startup_timings
+
+def test_prewarm_from_query_log(make_app, tmp_path, monkeypatch):
+    log_dir, prewarm_path = str(tmp_path / "query_logs"), str(tmp_path / "prewarm.npz")
+    client = make_app(QUERY_LOG_DIR=log_dir).test_client()
+    for query in ['python tutorial'] * 3 + ['guitar lesson'] * 2 + ['pasta recipe']:
+        client.get(f'/search?query={query}&offset=1')  # offset keeps the ETag path out of it
+    app_module.engine_manager.engine.close()
+    monkeypatch.setattr(prewarm_queries, 'QUERY_LOG_DIR', log_dir)
+    monkeypatch.setattr(prewarm_queries, 'PREWARM_PATH', prewarm_path)
+    monkeypatch.setattr(prewarm_queries, 'MIN_QUERY_COUNT', 2)
+    prewarm_queries.main()
+    with np.load(prewarm_path) as data:
+        assert data['queries'].tolist() == ['python tutorial', 'guitar lesson']
+        assert data['counts'].tolist() == [3, 2] and data['vectors'].shape == (2, DIMENSION)
+
+    StubEncoder.instances = []
+    client = make_app(PREWARM_PATH=prewarm_path).test_client()
+    engine = app_module.engine_manager.engine
+    assert wait_for_prewarm(engine)
+    encoder = StubEncoder.instances[0]
+    calls = encoder.calls
+    # Both cached SORT_CANDIDATE_POOL deep: plain and sorted searches skip the encoder
+    assert len(result_ids(client.get('/search?query=Guitar Lesson&limit=3'))) == 3
+    assert result_ids(client.get('/search?query=python tutorial&limit=3&sort=views')) == \
+        ['vid00000004', 'vid00000010', 'vid00000002']
+    assert encoder.calls == calls
+    assert engine.query_cache.stats['exact_hits'] == 2
+    client.get('/search?query=pasta recipe')
+    assert encoder.calls == calls + 1
+
+# --- Read-only serving ---
+
+def directory_digest(path):
+    digest = hashlib.sha256()
+    for root, dirs, files in sorted(os.walk(path)):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+            with open(file_path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+def test_read_only_serving_leaves_store_untouched(make_app, tmp_path):
+    chroma_path, work_dir = str(tmp_path / "chroma"), str(tmp_path / "read_only")
+    write_chroma_dir(chroma_path, app_module.COLLECTION_NAME)
+    before = directory_digest(chroma_path)
+
+    client = make_app(SEARCH_BACKEND='chroma', CHROMA_DB_PATH=chroma_path, READ_ONLY_SERVING=True,
+                      READ_ONLY_WORK_DIR=work_dir).test_client()
+    engine = app_module.engine_manager.engine
+    assert os.path.dirname(engine.working_copy) == work_dir and engine.distance_space == 'cosine'
+    response = client.get('/search?query=python tutorial&limit=3')
+    assert response.status_code == 200
+    assert set(result_ids(response)) <= {'vid00000001', 'vid00000002', 'vid00000003'}
+    assert result_ids(client.get('/search?query=python tutorial&limit=3&sort=views')) == \
+        ['vid00000004', 'vid00000010', 'vid00000002']
+
+    engine.close()
+    assert not os.path.exists(engine.working_copy)
+    assert directory_digest(chroma_path) == before
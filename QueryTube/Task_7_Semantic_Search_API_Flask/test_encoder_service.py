@@ -0,0 +1,48 @@
+import os
+import tempfile
+import threading
+import numpy as np
+import pytest
+from encoder_service import BatchingEncoder, EncoderClient, EncoderServer, EncoderUnavailable
+
+DIMENSION = 4
+
+def fake_embedding_function(texts):
+    return [[float(len(text)), 1.0, 0.0, 0.0] for text in texts]
+
+@pytest.fixture
+def socket_path():
+    # Unix socket paths are limited to ~100 characters, too short for some tmp_path names
+    path = os.path.join(tempfile.gettempdir(), f"querytube_test_{os.getpid()}_{threading.get_ident()}.sock")
+    server = EncoderServer(path, BatchingEncoder(fake_embedding_function))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+    if os.path.exists(path):
+        os.remove(path)
+
+def test_encode(socket_path):
+    client = EncoderClient(socket_path)
+    vectors = client.encode(["abc", "hello"])
+    assert vectors.dtype == np.float32 and vectors.shape == (2, DIMENSION)
+    assert vectors[:, 0].tolist() == [3.0, 5.0]
+    client.close()
+
+def test_spent_budget_does_not_mark_service_down(socket_path):
+    client = EncoderClient(socket_path, timeout=2.0)
+    # A request whose deadline has run out asks for a zero timeout
+    with pytest.raises(EncoderUnavailable):
+        client.encode(["query"], timeout=0)
+    assert client.available()
+    assert client.encode(["query"], timeout=1.0).shape == (1, DIMENSION)
+    client.close()
+
+def test_stopped_service_is_marked_down(tmp_path):
+    client = EncoderClient(str(tmp_path / "missing.sock"), retry_seconds=60)
+    with pytest.raises(EncoderUnavailable):
+        client.encode(["query"])
+    assert not client.available()
+    with pytest.raises(EncoderUnavailable, match="marked down"):
+        client.encode(["query"])
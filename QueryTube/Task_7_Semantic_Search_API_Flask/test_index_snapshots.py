@@ -0,0 +1,73 @@
+import threading
+from index_snapshots import EngineManager
+
+class FakeEngine:
+    def __init__(self, index_version):
+        self.index_version = index_version
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+def test_acquire_returns_live_engine():
+    manager = EngineManager()
+    assert manager.acquire() is None
+    manager.release(None)
+    engine = FakeEngine('v1')
+    manager.swap(engine)
+    assert manager.acquire() is engine
+    manager.release(engine)
+    assert not engine.closed
+
+def test_swap_closes_idle_engine_at_once():
+    old, new = FakeEngine('v1'), FakeEngine('v2')
+    manager = EngineManager(old)
+    assert manager.swap(new) is old
+    assert old.closed and not new.closed
+    assert manager.retired_count() == 0
+
+def test_swap_drains_in_flight_requests():
+    old, new = FakeEngine('v1'), FakeEngine('v2')
+    manager = EngineManager(old)
+    first, second = manager.acquire(), manager.acquire()
+    manager.swap(new)
+    # New requests get the new engine; the old one keeps serving the two in flight
+    assert manager.acquire() is new
+    assert manager.retired_count() == 1 and not old.closed
+    manager.release(first)
+    assert not old.closed
+    manager.release(second)
+    assert old.closed and manager.retired_count() == 0
+    assert not new.closed
+
+def test_concurrent_requests_during_swaps():
+    engines = [FakeEngine(f'v{i}') for i in range(20)]
+    manager = EngineManager(engines[0])
+    stop = threading.Event()
+    served, closed_while_serving = [], []
+
+    def worker():
+        while not stop.is_set():
+            engine = manager.acquire()
+            served.append(engine)
+            if engine.closed:
+                closed_while_serving.append(engine)  # an assert here would not fail the test
+            manager.release(engine)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for engine in engines[1:]:
+        manager.swap(engine)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert all(engine.closed for engine in engines[:-1])
+    assert not engines[-1].closed and manager.retired_count() == 0
+    assert served and not closed_while_serving
+
+def test_reload_if_changed():
+    manager = EngineManager(FakeEngine('v1'))
+    assert manager.reload_if_changed('v1', lambda: FakeEngine('unused')) is None
+    assert manager.reload_if_changed('v2', lambda: FakeEngine('v2')) == 'v2'
+    assert manager.engine.index_version == 'v2'
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from metadata_store import MetadataStore
+
+# Numbers stored as strings, as older collections do; v5 has no metadata at all
+METADATAS = [
+    {'viewCount': '300', 'likeCount': 30, 'duration': 90, 'publishedAt': '2021-05-01T00:00:00Z',
+     'channel_title': 'Alpha', 'is_short': 'True'},
+    {'viewCount': '1000', 'likeCount': 5, 'duration': 700, 'publishedAt': '2023-01-01T00:00:00Z',
+     'channel_title': 'Beta', 'is_short': 'False'},
+    {'viewCount': '300', 'likeCount': 10, 'duration': 4000, 'publishedAt': '2022-03-01T00:00:00Z',
+     'channel_title': 'Alpha', 'is_short': 'False'},
+    {'viewCount': 'n/a', 'likeCount': 1, 'duration': 200, 'publishedAt': 'not a date',
+     'channel_title': 'Alpha', 'is_short': 'False'},
+    {'viewCount': '50', 'likeCount': 10, 'duration': 1200, 'publishedAt': '2023-06-01T00:00:00Z',
+     'channel_title': 'Gamma', 'is_short': 'False'},
+    {}
+]
+
+@pytest.fixture
+def store():
+    return MetadataStore([f"v{i}" for i in range(len(METADATAS))], METADATAS)
+
+def test_feed_page_orders(store):
+    assert store.feed_page('default', 0, 3).tolist() == [0, 1, 2]
+    # Ties (v0 and v2 at 300 views, v3 and v5 at 0) keep storage order
+    assert store.feed_page('views', 0, 6).tolist() == [1, 0, 2, 4, 3, 5]
+    # Unknown dates sort last
+    assert store.feed_page('recent', 0, 6).tolist() == [4, 1, 2, 0, 3, 5]
+
+def test_feed_page_offsets(store):
+    assert store.feed_page('views', 2, 2).tolist() == [2, 4]
+    assert store.feed_page('views', 5, 10).tolist() == [5]
+    assert store.feed_page('views', 100, 10).tolist() == []
+
+def test_shuffle_is_stable_per_seed():
+    store = MetadataStore([f"v{i}" for i in range(50)], [{}] * 50, shuffle_cache_size=2)
+    first = store.feed_page('shuffle', 0, 50, seed=7).tolist()
+    assert sorted(first) == list(range(50))
+    assert store.feed_page('shuffle', 10, 10, seed=7).tolist() == first[10:20]
+    assert store.feed_page('shuffle', 0, 50, seed=8).tolist() != first
+    # Still the same order after seed 7 has been evicted from the cache
+    store.feed_page('shuffle', 0, 1, seed=9)
+    store.feed_page('shuffle', 0, 1, seed=10)
+    assert 7 not in store._shuffles
+    assert store.feed_page('shuffle', 0, 50, seed=7).tolist() == first
+
+def test_sort_order_is_stable(store):
+    positions = [2, 3, 0, 1]
+    # Indices into positions; v2 and v0 tie on views and keep their relevance order
+    assert store.sort_order(positions, 'views').tolist() == [3, 0, 2, 1]
+    assert store.sort_order(positions, 'views', descending=False).tolist() == [1, 0, 2, 3]
+    assert store.sort_order(positions, 'likes').tolist() == [2, 0, 3, 1]
+
+def test_corpus_facet_counts(store):
+    facets = store.facet_counts()
+    assert facets['channel'] == [{'value': 'Alpha', 'count': 3}, {'value': 'Beta', 'count': 1},
+                                 {'value': 'Gamma', 'count': 1}, {'value': 'Unknown Channel', 'count': 1}]
+    assert facets['is_short'] == [{'value': 'false', 'count': 5}, {'value': 'true', 'count': 1}]
+    # Years newest first, unknown last; duration buckets shortest first
+    assert [item['value'] for item in facets['publish_year']] == ['2023', '2022', '2021', 'unknown']
+    assert [item['value'] for item in facets['duration_bucket']] == \
+        ['under_2m', '2_to_10m', '10_to_30m', 'over_60m', 'unknown']
+
+def test_candidate_facet_counts(store):
+    facets = store.facet_counts(positions=[0, 2, 4], top_n=1)
+    assert facets['channel'] == [{'value': 'Alpha', 'count': 2}]
+    # Values without any candidate are left out
+    assert facets['publish_year'] == [{'value': '2023', 'count': 1}, {'value': '2022', 'count': 1},
+                                      {'value': '2021', 'count': 1}]
+    assert store.facet_counts(positions=[])['channel'] == []
+
+def test_shared_arrays_are_reused(tmp_path, store):
+    ids = [f"v{i}" for i in range(len(METADATAS))]
+    first = MetadataStore(ids, METADATAS, arrays_dir=str(tmp_path))
+    second = MetadataStore(ids, METADATAS, arrays_dir=str(tmp_path))
+    assert first.shared_arrays and second.shared_arrays
+    assert isinstance(second.views, np.memmap)
+    assert second.feed_page('views', 0, 6).tolist() == store.feed_page('views', 0, 6).tolist()
+    assert second.facet_counts() == store.facet_counts()
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from pca_projection import save_pca_projection, load_pca_projection, apply_pca_projection
+
+DIMENSION = 16
+N_COMPONENTS = 4
+
+@pytest.fixture
+def projection():
+    """Top principal components of a random corpus, in the layout Embedding.py's fit_pca_projection() returns."""
+    corpus = np.random.default_rng(0).standard_normal((200, DIMENSION))
+    mean = corpus.mean(axis=0)
+    _, singular_values, components = np.linalg.svd(corpus - mean, full_matrices=False)
+    variances = singular_values ** 2 / (len(corpus) - 1)
+    return {
+        'mean': mean.astype(np.float32),
+        'components': components[:N_COMPONENTS].astype(np.float32),
+        'explained_variance': variances[:N_COMPONENTS].astype(np.float32),
+        'total_variance': np.float32(variances.sum()),
+        'whiten': False
+    }
+
+def test_round_trip(tmp_path, projection):
+    path = str(tmp_path / "pca_projection.npz")
+    save_pca_projection({**projection, 'whiten': True}, path)
+    loaded = load_pca_projection(path)
+    assert loaded['whiten'] is True
+    for name in ('mean', 'components', 'explained_variance', 'total_variance'):
+        assert np.array_equal(loaded[name], projection[name])
+
+def test_missing_projection(tmp_path):
+    assert load_pca_projection(None) is None
+    assert load_pca_projection(str(tmp_path / "missing.npz")) is None
+
+@pytest.mark.parametrize('whiten', [False, True])
+def test_projected_vectors_are_unit_length(projection, whiten):
+    vectors = np.random.default_rng(1).standard_normal((5, DIMENSION)).astype(np.float32)
+    projected = apply_pca_projection(vectors, {**projection, 'whiten': whiten})
+    assert projected.shape == (5, N_COMPONENTS)
+    assert np.linalg.norm(projected, axis=1) == pytest.approx(1.0, abs=1e-5)
+    # A single query vector is projected like a one-row batch
+    assert np.allclose(apply_pca_projection(vectors[0], {**projection, 'whiten': whiten})[0], projected[0])
@@ -0,0 +1,27 @@
+import time
+import request_deadlines
+from request_deadlines import Deadline
+
+def test_budget_runs_out():
+    deadline = Deadline(50)
+    assert not deadline.expired()
+    assert 0 < deadline.remaining_ms() <= 50
+    time.sleep(0.06)
+    assert deadline.expired()
+    assert deadline.remaining_ms() == 0.0
+
+def test_zero_budget_is_expired():
+    assert Deadline(0).expired()
+
+def test_degrade_records_each_stage_once():
+    deadline = Deadline(1000)
+    deadline.degrade('encode')
+    deadline.degrade('sort_pool')
+    deadline.degrade('encode')
+    assert deadline.degraded == ['encode', 'sort_pool']
+
+def test_helpers_without_deadline():
+    assert request_deadlines.remaining_ms(None) is None
+    assert not request_deadlines.expired(None)
+    assert request_deadlines.expired(Deadline(0))
+    assert request_deadlines.remaining_ms(Deadline(1000)) > 0
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from semantic_cache import SemanticQueryCache, normalize_query
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def test_normalize_query():
+    assert normalize_query("  Python   Beginner\tTutorial ") == "python beginner tutorial"
+
+def test_exact_hit():
+    cache = SemanticQueryCache(dimension=3, capacity=4)
+    cache.put("python tutorial", unit(1, 0, 0), ['a', 'b', 'c'], [0.1, 0.2, 0.3])
+    hit = cache.get("python tutorial", 2)
+    assert (hit.key, hit.ids, hit.similarity) == ("python tutorial", ['a', 'b'], 1.0)
+    assert hit.distances.tolist() == pytest.approx([0.1, 0.2])
+    assert cache.get("rust tutorial", 2) is None
+    # Fewer cached candidates than asked for is a miss
+    assert cache.get("python tutorial", 5) is None
+    assert cache.report()['lookups'] == 3 and cache.report()['exact_hits'] == 1
+
+def test_similar_hit_threshold():
+    cache = SemanticQueryCache(dimension=3, capacity=4, threshold=0.95)
+    assert cache.get_similar(unit(1, 0, 0), 1) is None  # empty cache
+    cache.put("python tutorial", unit(1, 0, 0), ['a', 'b'], [0.1, 0.2])
+    cache.put("cooking pasta", unit(0, 1, 0), ['x', 'y'], [0.1, 0.2])
+    hit = cache.get_similar(unit(1, 0.1, 0), 2)
+    assert hit.key == "python tutorial" and hit.ids == ['a', 'b'] and hit.similarity >= 0.95
+    # Not normalized: the cache normalizes the vector itself
+    assert cache.get_similar(np.array([10, 0.5, 0], dtype=np.float32), 1).key == "python tutorial"
+    assert cache.get_similar(unit(1, 1, 0), 1) is None
+    assert cache.get_similar(unit(1, 0.1, 0), 3) is None
+    assert cache.report()['similar_hits'] == 2
+
+def test_least_recently_used_is_evicted():
+    cache = SemanticQueryCache(dimension=3, capacity=2)
+    cache.put("first", unit(1, 0, 0), ['a'], [0.1])
+    cache.put("second", unit(0, 1, 0), ['b'], [0.1])
+    cache.get("first", 1)  # "second" is now the least recently used
+    cache.put("third", unit(0, 0, 1), ['c'], [0.1])
+    assert cache.get("second", 1) is None
+    assert cache.get("first", 1).ids == ['a'] and cache.get("third", 1).ids == ['c']
+    # The evicted vector no longer matches by similarity either
+    assert cache.get_similar(unit(0, 1, 0), 1) is None
+    assert cache.report()['entries'] == 2
+
+def test_put_replaces_existing_entry():
+    cache = SemanticQueryCache(dimension=3, capacity=2)
+    cache.put("query", unit(1, 0, 0), ['a'], [0.1])
+    cache.put("query", unit(0, 1, 0), ['b'], [0.2])
+    assert cache.get("query", 1).ids == ['b']
+    assert cache.get_similar(unit(0, 1, 0), 1).key == "query"
+    assert cache.report()['entries'] == 1
+
+def test_audit_counts_false_hits():
+    cache = SemanticQueryCache(dimension=3, capacity=4, audit_min_overlap=0.7, audit_top_k=4)
+    cache.put("python tutorial", unit(1, 0, 0), ['a', 'b', 'c', 'd'], [0.1, 0.2, 0.3, 0.4])
+    hit = cache.get_similar(unit(1, 0.1, 0), 4)
+    assert cache.record_audit("python tutorials", hit, ['a', 'b', 'c', 'e']) == 0.75
+    assert cache.record_audit("python tutorial basics", hit, ['a', 'x', 'y', 'z']) == 0.25
+    report = cache.report()
+    assert (report['audits'], report['false_hits'], report['false_hit_rate']) == (2, 1, 0.5)
+    assert report['recent_false_hits'] == [{'query': "python tutorial basics", 'cached_query': "python tutorial",
+                                            'similarity': round(hit.similarity, 4), 'overlap': 0.25}]
+
+def test_should_audit_rate():
+    assert not SemanticQueryCache(dimension=3, audit_rate=0.0).should_audit()
+    assert SemanticQueryCache(dimension=3, audit_rate=1.0).should_audit()
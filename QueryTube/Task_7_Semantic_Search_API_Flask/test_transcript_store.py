@@ -0,0 +1,77 @@
+import os
+import json
+import pandas as pd
+import pytest
+from transcript_store import (TranscriptStore, segment_bounds, transcript_page, DATA_FILENAME,
+                              INDEX_FILENAME, INFO_FILENAME)
+
+TEXT = "alpha beta gamma delta epsilon zeta eta theta"
+
+def write_store(store_dir, transcripts, codec='raw'):
+    """Same layout as write_transcript_store() in ChromaDB_updated.py (zstd without a dictionary)."""
+    compress = None
+    if codec == 'zstd':
+        zstandard = pytest.importorskip('zstandard')
+        compress = zstandard.ZstdCompressor(write_dict_id=False, write_checksum=False).compress
+    offsets, lengths = [], []
+    with open(os.path.join(store_dir, DATA_FILENAME), 'wb') as f:
+        for text in transcripts.values():
+            data = text.encode('utf-8')
+            data = compress(data) if compress else data
+            offsets.append(f.tell())
+            lengths.append(len(data))
+            f.write(data)
+    pd.DataFrame({'video_id': list(transcripts), 'offset': offsets, 'length': lengths}) \
+        .to_parquet(os.path.join(store_dir, INDEX_FILENAME), index=False)
+    with open(os.path.join(store_dir, INFO_FILENAME), 'w') as f:
+        json.dump({'codec': codec, 'count': len(transcripts)}, f)
+
+@pytest.mark.parametrize('codec', ['raw', 'zstd'])
+def test_store_get(tmp_path, codec):
+    transcripts = {'vid_a': TEXT, 'vid_b': "ünïcödé transcript", 'vid_c': "x" * 5000}
+    write_store(str(tmp_path), transcripts, codec)
+    store = TranscriptStore(str(tmp_path))
+    try:
+        assert store.count() == 3
+        assert 'vid_b' in store and 'missing' not in store
+        for video_id, text in transcripts.items():
+            assert store.get(video_id) == text
+        assert store.get('missing') is None
+    finally:
+        store.close()
+
+def test_missing_store(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        TranscriptStore(str(tmp_path))
+
+def test_segment_bounds_break_at_whitespace():
+    bounds = segment_bounds(TEXT, 12)
+    assert bounds[0] == (0, 17)  # "alpha beta gamma " rather than cutting "gamma"
+    assert "".join(TEXT[start:end] for start, end in bounds) == TEXT
+    assert all(end == start_next for (_, end), (start_next, _) in zip(bounds, bounds[1:]))
+    assert segment_bounds("", 10) == []
+
+def test_char_pages():
+    page = transcript_page(TEXT, start=0, length=20)
+    assert (page['text'], page['next_start'], page['has_more']) == (TEXT[:20], 20, True)
+    page = transcript_page(TEXT, start=40, length=20)
+    assert (page['text'], page['end'], page['next_start'], page['has_more']) == (TEXT[40:], len(TEXT), None, False)
+    assert transcript_page(TEXT)['text'] == TEXT
+
+def test_char_page_out_of_range():
+    page = transcript_page(TEXT, start=100, length=10)
+    assert (page['start'], page['end'], page['text'], page['next_start'], page['has_more']) == \
+        (len(TEXT), len(TEXT), '', None, False)
+
+def test_segment_pages():
+    bounds = segment_bounds(TEXT, 10)
+    page = transcript_page(TEXT, segment=1, segments=2, segment_chars=10)
+    assert page['text'] == TEXT[bounds[1][0]:bounds[2][1]]
+    assert (page['segments'], page['total_segments'], page['next_segment']) == (2, len(bounds), 3)
+    last = transcript_page(TEXT, segment=len(bounds) - 1, segments=5, segment_chars=10)
+    assert (last['segments'], last['next_segment'], last['has_more']) == (1, None, False)
+
+def test_segment_page_out_of_range():
+    page = transcript_page(TEXT, segment=50, segment_chars=10)
+    assert (page['text'], page['segments'], page['next_segment'], page['has_more']) == ('', 0, None, False)
+    assert page['start'] == page['end'] == len(TEXT)
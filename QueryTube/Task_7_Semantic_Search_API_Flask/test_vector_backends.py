@@ -0,0 +1,92 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from vector_backends import (NumpyMatrixBackend, ShardedBackend, MATRIX_FILENAME, METADATA_FILENAME,
+                             CONFIG_FILENAME, SHARDS_MANIFEST_FILENAME)
+
+N_VECTORS = 60
+DIMENSION = 8
+
+def write_index_dir(index_dir, ids, vectors):
+    """Same layout as write_matrix_files() in NumPy_matrix.py."""
+    os.makedirs(index_dir)
+    np.save(os.path.join(index_dir, MATRIX_FILENAME), vectors)
+    pd.DataFrame({'id': ids, 'title': [f"title {video_id}" for video_id in ids],
+                  'transcript': ["long transcript"] * len(ids)}) \
+        .to_parquet(os.path.join(index_dir, METADATA_FILENAME), index=False)
+    with open(os.path.join(index_dir, CONFIG_FILENAME), 'w') as f:
+        json.dump({'backend': 'numpy', 'count': len(ids), 'dimension': DIMENSION}, f)
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((N_VECTORS, DIMENSION)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [f"v{i}" for i in range(N_VECTORS)], vectors
+
+@pytest.fixture
+def backends(tmp_path, corpus):
+    """The same corpus as one index directory and as three uneven shards (rows dealt round-robin)."""
+    ids, vectors = corpus
+    write_index_dir(str(tmp_path / "single"), ids, vectors)
+    shards = []
+    for shard, rows in enumerate([range(0, N_VECTORS, 2), range(1, N_VECTORS, 4), range(3, N_VECTORS, 4)]):
+        rows = list(rows)
+        write_index_dir(str(tmp_path / "shards" / f"shard_{shard}"), [ids[row] for row in rows], vectors[rows])
+        shards.append({'dir': f"shard_{shard}", 'count': len(rows)})
+    with open(tmp_path / "shards" / SHARDS_MANIFEST_FILENAME, 'w') as f:
+        json.dump({'n_shards': len(shards), 'shards': shards}, f)
+    single = NumpyMatrixBackend(str(tmp_path / "single"))
+    sharded = ShardedBackend(str(tmp_path / "shards"))
+    yield single, sharded
+    sharded.close()
+
+@pytest.mark.parametrize('n_results', [1, 10, 25, N_VECTORS])
+def test_sharded_merge_matches_single_index(backends, n_results):
+    single, sharded = backends
+    queries = np.random.default_rng(1).standard_normal((5, DIMENSION)).astype(np.float32)
+    expected = single.query(queries, n_results=n_results)
+    results = sharded.query(queries, n_results=n_results)
+    assert results['ids'] == expected['ids']
+    assert results['metadatas'] == expected['metadatas']
+    for distances, expected_distances in zip(results['distances'], expected['distances']):
+        assert distances == pytest.approx(expected_distances, abs=1e-5)
+        assert distances == sorted(distances)
+
+def test_more_results_than_vectors(backends):
+    single, sharded = backends
+    results = sharded.query(np.ones((1, DIMENSION), dtype=np.float32), n_results=N_VECTORS + 10)
+    assert sorted(results['ids'][0]) == sorted(single.ids)
+
+def test_query_leaves_input_untouched(backends):
+    single, sharded = backends
+    queries = np.full((1, DIMENSION), 3.0, dtype=np.float32)
+    single.query(queries, n_results=3)
+    sharded.query(queries, n_results=3)
+    assert (queries == 3.0).all()
+
+def test_sharded_get_spans_shards(backends):
+    _, sharded = backends
+    assert sharded.count() == N_VECTORS
+    # Global positions run through shard 0 (30 rows) into shard 1
+    rows = sharded.get(limit=4, offset=28)
+    assert rows['ids'] == ['v56', 'v58', 'v1', 'v5']
+    assert rows['metadatas'][2] == {'id': 'v1', 'title': 'title v1'}  # transcript column not loaded
+    assert len(sharded.get()['ids']) == N_VECTORS
+    assert sharded.get(limit=5, offset=N_VECTORS)['ids'] == []
+
+def test_release_metadata(backends):
+    queries = np.random.default_rng(2).standard_normal((3, DIMENSION)).astype(np.float32)
+    for backend in backends:
+        expected, head = backend.query(queries, n_results=5), backend.get(limit=3)
+        backend.release_metadata()
+        results = backend.query(queries, n_results=5, include=['distances'])
+        assert results['ids'] == expected['ids'] and 'metadatas' not in results
+        assert backend.get(limit=3, include=[])['ids'] == head['ids']
+        with pytest.raises(RuntimeError, match="released"):
+            backend.query(queries, n_results=5)
+    single, sharded = backends
+    assert single.memory_usage()['metadata_bytes'] == 0
+    assert all(shard['metadata_bytes'] == 0 for shard in sharded.memory_usage()['shards'])
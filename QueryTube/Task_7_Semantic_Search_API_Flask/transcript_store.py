@@ -0,0 +1,135 @@
+import os
+import sys
+import mmap
+import json
+import threading
+import pandas as pd
+
+# Files written by write_transcript_store() in
+# "Task 5_ Merging Metadata & Transcripts/Storing_in_ChromaDB/ChromaDB_updated.py"
+TRANSCRIPT_STORE_DIRNAME = "transcripts"
+DATA_FILENAME = "transcripts.bin"
+INDEX_FILENAME = "transcripts_index.parquet"
+INFO_FILENAME = "store.json"
+DICTIONARY_FILENAME = "transcripts.dict"
+
+class TranscriptStore:
+    """
+    Read-only, per-video random access to transcripts kept outside the vector index.
+
+    The data file is memory-mapped and each transcript is located through an
+    (offset, length) index, so fetching one transcript touches only its own bytes.
+    With the 'zstd' codec every transcript is its own frame, compressed against a
+    shared dictionary that is loaded once.
+    """
+    def __init__(self, store_dir):
+        data_path = os.path.join(store_dir, DATA_FILENAME)
+        if not os.path.exists(data_path):
+            raise FileNotFoundError(f"Transcript store not found at {store_dir}")
+
+        with open(os.path.join(store_dir, INFO_FILENAME)) as f:
+            self.info = json.load(f)
+        index = pd.read_parquet(os.path.join(store_dir, INDEX_FILENAME))
+        self._locations = dict(zip(index['video_id'], zip(index['offset'].tolist(), index['length'].tolist())))
+
+        self.codec = self.info.get('codec', 'raw')
+        self._dictionary = None
+        if self.codec == 'zstd':
+            import zstandard  # Only needed for compressed stores
+            dictionary_path = os.path.join(store_dir, DICTIONARY_FILENAME)
+            if os.path.exists(dictionary_path):
+                with open(dictionary_path, 'rb') as f:
+                    self._dictionary = zstandard.ZstdCompressionDict(f.read())
+            self._zstandard = zstandard
+        elif self.codec != 'raw':
+            raise ValueError(f"Unknown transcript codec: {self.codec}")
+        # Decompression contexts are not thread-safe, so each request thread gets its own
+        self._local = threading.local()
+
+        self._file = open(data_path, 'rb')
+        # mmap cannot map an empty file
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) \
+            if os.path.getsize(data_path) else b''
+
+    def __contains__(self, video_id):
+        return video_id in self._locations
+
+    def count(self):
+        return len(self._locations)
+
+    def get(self, video_id):
+        """Full transcript text for a video, or None if the store has no transcript for it."""
+        location = self._locations.get(video_id)
+        if location is None:
+            return None
+        offset, length = location
+        data = self._data[offset:offset + length]
+        if self.codec == 'zstd':
+            data = self._decompressor().decompress(data)
+        return bytes(data).decode('utf-8')
+
+    def _decompressor(self):
+        decompressor = getattr(self._local, 'decompressor', None)
+        if decompressor is None:
+            decompressor = self._zstandard.ZstdDecompressor(dict_data=self._dictionary)
+            self._local.decompressor = decompressor
+        return decompressor
+
+    def memory_usage(self):
+        """Heap used by the id index and dictionary; the data file is mapped and paged in on demand."""
+        index_bytes = sys.getsizeof(self._locations) + sum(
+            sys.getsizeof(video_id) + 120 for video_id in self._locations)  # ~120 B per (offset, length) tuple
+        dictionary_bytes = len(self._dictionary.as_bytes()) if self._dictionary is not None else 0
+        return {
+            'bytes': index_bytes + dictionary_bytes,
+            'transcripts': len(self._locations),
+            'codec': self.codec,
+            'dictionary_bytes': dictionary_bytes,
+            'mapped_file_bytes': len(self._data)
+        }
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+def segment_bounds(text, segment_chars):
+    """
+    Splits a transcript into segments of about segment_chars characters, breaking at the
+    next whitespace so words are never cut. Returns a list of (start, end) character offsets.
+    """
+    bounds = []
+    start = 0
+    while start < len(text):
+        end = min(start + segment_chars, len(text))
+        if end < len(text):
+            space = text.find(' ', end)
+            end = len(text) if space == -1 else space + 1
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+def transcript_page(text, start=0, length=None, segment=None, segments=1, segment_chars=1000):
+    """
+    One page of a transcript, either a character range (start/length) or a range of
+    segments (segment/segments, see segment_bounds). Returns the page text and paging info.
+    """
+    total_chars = len(text)
+    page = {'total_chars': total_chars}
+    if segment is not None:
+        bounds = segment_bounds(text, segment_chars)
+        selected = bounds[segment:segment + segments]
+        start = selected[0][0] if selected else total_chars
+        end = selected[-1][1] if selected else total_chars
+        page.update({
+            'segment': segment,
+            'segments': len(selected),
+            'total_segments': len(bounds),
+            'next_segment': segment + len(selected) if segment + len(selected) < len(bounds) else None
+        })
+    else:
+        start = min(start, total_chars)
+        end = total_chars if length is None else min(start + length, total_chars)
+        page['next_start'] = end if end < total_chars else None
+    page.update({'start': start, 'end': end, 'text': text[start:end], 'has_more': end < total_chars})
+    return page
@@ -0,0 +1,306 @@
+import os
+import json
+import time
+import heapq
+from abc import ABC, abstractmethod
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Files written by "Task 5_ Merging Metadata & Transcripts/Storing_in_FAISS/FAISS_IVFPQ.py"
+# and "Task 5_ Merging Metadata & Transcripts/Storing_in_NumPy/NumPy_matrix.py"
+INDEX_FILENAME = "ivfpq.index"
+MATRIX_FILENAME = "embeddings.npy"
+METADATA_FILENAME = "metadata.parquet"
+CONFIG_FILENAME = "index_config.json"
+# Written by NumPy_matrix.py (N_SHARDS > 1) next to one index directory per shard
+SHARDS_MANIFEST_FILENAME = "shards.json"
+# Text columns of index directories built before transcripts moved to the transcript store;
+# they are never loaded (search results do not carry them)
+SKIPPED_METADATA_COLUMNS = ('text_for_embedding', 'transcript')
+
+class _IndexDirBackend(ABC):
+    """
+    Shared part of the backends that serve an index directory (index file, metadata.parquet
+    and index_config.json). Exposes the subset of the Chroma collection API used by
+    VideoSearchEngine (count, get and query), so it can be used in place of a Chroma collection.
+    Subclasses implement _search.
+    """
+    def __init__(self, index_dir, index_filename):
+        index_path = os.path.join(index_dir, index_filename)
+        # Files whose size/mtime identify this build (used for the API's index version)
+        self.index_files = [index_path, os.path.join(index_dir, METADATA_FILENAME)]
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"Index not found at {index_path}")
+
+        with open(os.path.join(index_dir, CONFIG_FILENAME)) as f:
+            self.config = json.load(f)
+
+        metadata_path = os.path.join(index_dir, METADATA_FILENAME)
+        columns = [name for name in pq.read_schema(metadata_path).names if name not in SKIPPED_METADATA_COLUMNS]
+        self.metadata = pd.read_parquet(metadata_path, columns=columns)
+        self.ids = self.metadata['id'].tolist()
+
+    def count(self):
+        return len(self.ids)
+
+    def release_metadata(self):
+        """
+        Drops the metadata frame once the caller keeps the metadata itself (VideoSearchEngine's
+        MetadataStore). Ids stay loaded, so count and queries without 'metadatas' keep working.
+        """
+        self.metadata = None
+
+    def _metadata_bytes(self):
+        return int(self.metadata.memory_usage(deep=True).sum()) if self.metadata is not None else 0
+
+    def _rows(self, positions, include):
+        """Builds the id/metadata/document lists for the given row positions."""
+        rows = {'ids': [self.ids[p] for p in positions]}
+        if 'metadatas' in include:
+            if self.metadata is None:
+                raise RuntimeError("metadata was released; read it from the MetadataStore")
+            # Missing values are left out, as Chroma does for None metadata
+            rows['metadatas'] = [{key: value for key, value in record.items() if not pd.isna(value)}
+                                 for record in self.metadata.iloc[positions].to_dict('records')]
+        if 'documents' in include:
+            rows['documents'] = [''] * len(positions)
+        return rows
+
+    def get(self, limit=None, offset=0, include=('metadatas',)):
+        end = self.count() if limit is None else min(offset + limit, self.count())
+        return self._rows(list(range(offset, end)), include)
+
+    @abstractmethod
+    def _search(self, queries, n_results):
+        """Returns (scores, positions), each of shape (n_queries, n_results); position -1 is padding."""
+
+    def query(self, query_embeddings, n_results=10, include=('metadatas', 'distances')):
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        # Not in place: a float32 array from the caller would be normalized under it
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores, positions = self._search(queries, n_results)
+
+        results = {key: [] for key in ('ids', 'metadatas', 'documents', 'distances')}
+        for row_scores, row_positions in zip(scores, positions):
+            # FAISS pads with -1 when fewer than n_results vectors were scanned
+            keep = row_positions >= 0
+            rows = self._rows(row_positions[keep].tolist(), include)
+            for key, values in rows.items():
+                results[key].append(values)
+            # Cosine distance (0 = identical, 2 = opposite), the same scale as a cosine Chroma collection
+            results['distances'].append((1.0 - row_scores[keep]).tolist())
+        return {key: value for key, value in results.items() if value}
+
+class FaissIVFPQBackend(_IndexDirBackend):
+    """Serves a FAISS IVF-PQ index built from the embedded Parquet."""
+    def __init__(self, index_dir, nprobe=None, use_mmap=True):
+        import faiss  # Optional dependency, only needed for this backend
+
+        super().__init__(index_dir, INDEX_FILENAME)
+        # IO_FLAG_MMAP maps the inverted lists instead of reading them into the heap,
+        # so the page cache is shared between processes serving the same file
+        io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if use_mmap else 0
+        self.use_mmap = use_mmap
+        self.index = faiss.read_index(self.index_files[0], io_flags)
+        self.index.nprobe = nprobe or self.config.get('nprobe', 16)
+        self.dimension = self.index.d
+
+    def count(self):
+        return self.index.ntotal
+
+    def memory_usage(self):
+        """Index codes (mapped from disk when use_mmap is on) and the metadata frame, unless released."""
+        index_bytes = os.path.getsize(self.index_files[0])
+        metadata_bytes = self._metadata_bytes()
+        return {
+            'bytes': metadata_bytes + (0 if self.use_mmap else index_bytes),
+            'vectors': self.count(),
+            'index_file_bytes': index_bytes,
+            'mmapped': self.use_mmap,
+            'metadata_bytes': metadata_bytes
+        }
+
+    def _search(self, queries, n_results):
+        return self.index.search(queries, n_results)
+
+class NumpyMatrixBackend(_IndexDirBackend):
+    """
+    Exact cosine search over the unit-length embedding matrix written by NumPy_matrix.py.
+
+    With use_mmap the .npy file is memory-mapped read-only, so every worker process maps the
+    same physical pages from the OS page cache instead of holding its own copy of the matrix.
+    """
+    def __init__(self, index_dir, use_mmap=True):
+        super().__init__(index_dir, MATRIX_FILENAME)
+        self.use_mmap = use_mmap
+        self.matrix = np.load(self.index_files[0], mmap_mode='r' if use_mmap else None)
+        self.dimension = self.matrix.shape[1]
+
+    def memory_usage(self):
+        """The matrix (shared, paged in on demand when mmapped) and the metadata frame, unless released."""
+        metadata_bytes = self._metadata_bytes()
+        return {
+            'bytes': metadata_bytes + (0 if self.use_mmap else int(self.matrix.nbytes)),
+            'vectors': self.count(),
+            'index_file_bytes': int(self.matrix.nbytes),
+            'mmapped': self.use_mmap,
+            'metadata_bytes': metadata_bytes
+        }
+
+    def _search(self, queries, n_results):
+        n_results = min(n_results, self.count())
+        scores = queries @ self.matrix.T
+        if n_results < scores.shape[1]:
+            top = np.argpartition(-scores, n_results - 1, axis=1)[:, :n_results]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        return np.take_along_axis(top_scores, order, axis=1), np.take_along_axis(top, order, axis=1)
+
+def open_index_dir(index_dir, use_mmap=True):
+    """Opens an index directory with the backend matching the index file it contains."""
+    if os.path.exists(os.path.join(index_dir, INDEX_FILENAME)):
+        return FaissIVFPQBackend(index_dir, use_mmap=use_mmap)
+    return NumpyMatrixBackend(index_dir, use_mmap=use_mmap)
+
+class ShardedBackend:
+    """
+    Scatter-gather over independently built shards (one index directory each, listed in shards.json).
+
+    A query is sent to every shard at once on a thread pool (the matrix products and FAISS searches
+    release the GIL, so the shards are searched on separate cores) and the shards' sorted top-k lists
+    are merged with a k-way heap merge. Row positions are global: shard i's rows follow shard i-1's.
+    """
+    def __init__(self, shards_dir, max_workers=None, use_mmap=True):
+        with open(os.path.join(shards_dir, SHARDS_MANIFEST_FILENAME)) as f:
+            self.manifest = json.load(f)
+        self.shards = [open_index_dir(os.path.join(shards_dir, entry['dir']), use_mmap=use_mmap)
+                       for entry in self.manifest['shards']]
+        # offsets[i] is the global position of shard i's first row
+        self.offsets = np.cumsum([0] + [shard.count() for shard in self.shards])
+        self.index_files = [path for shard in self.shards for path in shard.index_files]
+        self.dimension = self.shards[0].dimension
+        self.pool = ThreadPoolExecutor(max_workers=max_workers or len(self.shards), thread_name_prefix="shard-query")
+
+    def count(self):
+        return int(self.offsets[-1])
+
+    def release_metadata(self):
+        """Drops every shard's metadata frame (see _IndexDirBackend.release_metadata)."""
+        for shard in self.shards:
+            shard.release_metadata()
+
+    def memory_usage(self):
+        """Sum over the shards, plus each shard's own report."""
+        shards = [shard.memory_usage() for shard in self.shards]
+        return {
+            'bytes': sum(shard['bytes'] for shard in shards),
+            'vectors': self.count(),
+            'index_file_bytes': sum(shard['index_file_bytes'] for shard in shards),
+            'shards': shards
+        }
+
+    def _rows(self, hits, include):
+        """Row lists for (shard, local position) hits, fetching each shard's rows in one call."""
+        by_shard = {}
+        for shard, position in hits:
+            by_shard.setdefault(shard, []).append(position)
+        shard_rows = {shard: self.shards[shard]._rows(positions, include) for shard, positions in by_shard.items()}
+        cursors = dict.fromkeys(by_shard, 0)
+        rows = {key: [] for key in next(iter(shard_rows.values()), {'ids': []})}
+        for shard, _ in hits:
+            for key in rows:
+                rows[key].append(shard_rows[shard][key][cursors[shard]])
+            cursors[shard] += 1
+        return rows
+
+    def get(self, limit=None, offset=0, include=('metadatas',)):
+        end = self.count() if limit is None else min(offset + limit, self.count())
+        hits = []
+        for shard, shard_offset in enumerate(self.offsets[:-1].tolist()):
+            start, stop = max(offset, shard_offset), min(end, int(self.offsets[shard + 1]))
+            hits.extend((shard, position - shard_offset) for position in range(start, stop))
+        return self._rows(hits, include)
+
+    def query(self, query_embeddings, n_results=10, include=('metadatas', 'distances')):
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        # Scatter: every shard returns its own top n_results, best first
+        shard_results = list(self.pool.map(lambda shard: shard._search(queries, n_results), self.shards))
+
+        results = {key: [] for key in ('ids', 'metadatas', 'documents', 'distances')}
+        for row in range(len(queries)):
+            # Gather: k-way merge of the sorted per-shard lists, keeping the overall top n_results
+            streams = [
+                [(-score, shard, position) for score, position in zip(scores[row].tolist(), positions[row].tolist())
+                 if position >= 0]
+                for shard, (scores, positions) in enumerate(shard_results)
+            ]
+            merged = list(islice(heapq.merge(*streams), n_results))
+            rows = self._rows([(shard, position) for _, shard, position in merged], include)
+            for key, values in rows.items():
+                results[key].append(values)
+            # Cosine distance, as in _IndexDirBackend.query
+            results['distances'].append([1.0 + negative_score for negative_score, _, _ in merged])
+        return {key: value for key, value in results.items() if value}
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+class RetryingCollection:
+    """
+    Wraps a Chroma collection served over HTTP. Reads (count, get and query) that fail at the
+    transport level (connection refused or reset, timeout) are retried with exponential backoff;
+    everything else is passed through to the wrapped collection unchanged.
+    """
+    def __init__(self, collection, retries=2, backoff_seconds=0.1):
+        self._collection = collection
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def _call(self, method, *args, **kwargs):
+        import httpx
+        for attempt in range(self.retries + 1):
+            try:
+                return method(*args, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff_seconds * 2 ** attempt
+                print(f"WARNING: Chroma server request failed ({e!r}); retrying in {delay:.2f}s")
+                time.sleep(delay)
+
+    def count(self):
+        return self._call(self._collection.count)
+
+    def get(self, *args, **kwargs):
+        return self._call(self._collection.get, *args, **kwargs)
+
+    def query(self, *args, **kwargs):
+        return self._call(self._collection.query, *args, **kwargs)
+
+def open_chroma_http_collection(host, port, collection_name, ssl=False, timeout_seconds=10.0,
+                                connect_timeout_seconds=2.0, pool_size=16, retries=2):
+    """
+    Connects to a Chroma server (`chroma run --path <db>`) and returns (client, collection).
+    The client keeps one pooled keep-alive session per process, capped at pool_size connections.
+    """
+    import httpx
+    from chromadb import HttpClient
+    from chromadb.config import Settings
+
+    settings = Settings(chroma_http_max_connections=pool_size, chroma_http_max_keepalive_connections=pool_size)
+    client = HttpClient(host=host, port=port, ssl=ssl, settings=settings)
+    # Chroma's HTTP client sends requests without a timeout; set one on its pooled session
+    session = getattr(getattr(client, '_server', None), '_session', None)
+    if isinstance(session, httpx.Client):
+        session.timeout = httpx.Timeout(timeout_seconds, connect=connect_timeout_seconds)
+    collection = RetryingCollection(client.get_collection(name=collection_name), retries=retries)
+    return client, collection
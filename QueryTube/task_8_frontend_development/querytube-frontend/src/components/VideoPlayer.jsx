@@ -27,7 +27,7 @@ import ShareOutlinedIcon from '@mui/icons-material/ShareOutlined';
 import DownloadOutlinedIcon from '@mui/icons-material/DownloadOutlined';
 import MoreHorizIcon from '@mui/icons-material/MoreHoriz';
 import Navbar from './Navbar';
-import { getInitialVideos } from '../services/api';
+import { getInitialVideos, getTranscript } from '../services/api';
 import ShortsIconPng from '../assets/QueryTube_Short.png';
 
 const DRAWER_WIDTH = 240;
@@ -43,6 +43,8 @@ const VideoPlayer = () => {
   const [relatedVideos, setRelatedVideos] = useState([]);
   const [showFullDescription, setShowFullDescription] = useState(false);
   const [sidebarOpen, setSidebarOpen] = useState(false);
+  const [transcript, setTranscript] = useState(null); // { text, nextStart, hasMore }
+  const [transcriptLoading, setTranscriptLoading] = useState(false);
 
   const sidebarItems = [
     { text: 'Home', icon: <HomeIcon />, path: '/' },
@@ -57,6 +59,28 @@ const VideoPlayer = () => {
     loadRelatedVideos();
   }, []);
 
+  useEffect(() => {
+    setTranscript(null);
+  }, [videoId]);
+
+  // Transcripts are fetched page by page, only when the viewer asks for them
+  const loadTranscript = async () => {
+    setTranscriptLoading(true);
+    try {
+      const start = transcript?.nextStart ?? 0;
+      const page = await getTranscript(videoId, start);
+      setTranscript({
+        text: (transcript?.text || '') + page.text,
+        nextStart: page.nextStart,
+        hasMore: page.hasMore
+      });
+    } catch (err) {
+      console.error('Error loading transcript:', err);
+    } finally {
+      setTranscriptLoading(false);
+    }
+  };
+
   const loadRelatedVideos = async () => {
     try {
       const { videos } = await getInitialVideos(0, 20);
@@ -380,6 +404,29 @@ const VideoPlayer = () => {
             )}
           </Box>
 
+          {/* Transcript (loaded on demand) */}
+          <Box sx={{ mt: 2 }}>
+            {transcript === null ? (
+              <Button variant="outlined" size="small" onClick={loadTranscript} disabled={transcriptLoading}>
+                {transcriptLoading ? 'Loading transcript...' : 'Show transcript'}
+              </Button>
+            ) : (
+              <Box sx={{ bgcolor: '#f2f2f2', borderRadius: '12px', p: 2 }}>
+                <Typography variant="subtitle2" sx={{ fontWeight: 600, mb: 1 }}>
+                  Transcript
+                </Typography>
+                <Typography variant="body2" sx={{ color: '#0f0f0f', whiteSpace: 'pre-wrap' }}>
+                  {transcript.text || 'No transcript available'}
+                </Typography>
+                {transcript.hasMore && (
+                  <Button size="small" sx={{ mt: 1 }} onClick={loadTranscript} disabled={transcriptLoading}>
+                    {transcriptLoading ? 'Loading...' : 'Show more'}
+                  </Button>
+                )}
+              </Box>
+            )}
+          </Box>
+
           <Divider sx={{ my: 3 }} />
 
           {/* Comments Section Placeholder */}
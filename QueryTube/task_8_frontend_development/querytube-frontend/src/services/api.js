@@ -9,12 +9,18 @@ axios.defaults.headers.common['Content-Type'] = 'application/json';
 
 const PAGE_SIZE = 12; // Number of videos to load per page (3 columns x 4 rows)
 
-export const searchVideos = async (query, offset = 0, limit = PAGE_SIZE) => {
+// sort: 'relevance' | 'views' | 'likes' | 'date' | 'duration' (sorted server-side over the full candidate set)
+export const searchVideos = async (query, offset = 0, limit = PAGE_SIZE, sort = 'relevance', direction = 'desc') => {
   try {
-    const response = await axios.post(`${API_URL}/search`, {
-      query,
-      offset,
-      limit
+    // GET so the browser and intermediary caches can reuse results (the API answers repeats with 304)
+    const response = await axios.get(`${API_URL}/search`, {
+      params: {
+        query,
+        offset,
+        limit,
+        sort,
+        direction
+      }
     });
     
     return {
@@ -28,12 +34,15 @@ export const searchVideos = async (query, offset = 0, limit = PAGE_SIZE) => {
   }
 };
 
-export const getInitialVideos = async (offset = 0, limit = PAGE_SIZE) => {
+// order: 'default' | 'views' | 'recent' | 'shuffle' (pass the same seed for every page of a session)
+export const getInitialVideos = async (offset = 0, limit = PAGE_SIZE, order = 'default', seed = 0) => {
   try {
     const response = await axios.get(`${API_URL}/initial-videos`, {
       params: {
         offset,
-        limit
+        limit,
+        order,
+        seed
       }
     });
     
@@ -46,4 +55,42 @@ export const getInitialVideos = async (offset = 0, limit = PAGE_SIZE) => {
     console.error('Error fetching initial videos:', error);
     throw error;
   }
-};
\ No newline at end of file
+};
+// Facet counts (channel, is_short, publish_year, duration_bucket) for a query, or the whole corpus
+export const getFacets = async (query = '', top = 20) => {
+  try {
+    const response = await axios.get(`${API_URL}/facets`, {
+      params: query ? { query, top } : { top }
+    });
+
+    return {
+      facets: response.data.facets || {},
+      candidates: response.data.candidates || 0
+    };
+  } catch (error) {
+    console.error('Error fetching facets:', error);
+    throw error;
+  }
+};
+
+// One page of a video's transcript, fetched on demand (search results do not include it)
+export const getTranscript = async (videoId, start = 0, length = 5000) => {
+  try {
+    const response = await axios.get(`${API_URL}/videos/${encodeURIComponent(videoId)}/transcript`, {
+      params: { start, length }
+    });
+
+    return {
+      text: response.data.text || '',
+      nextStart: response.data.next_start ?? null,
+      hasMore: response.data.has_more || false,
+      totalChars: response.data.total_chars || 0
+    };
+  } catch (error) {
+    if (error.response?.status === 404) {
+      return { text: '', nextStart: null, hasMore: false, totalChars: 0 };
+    }
+    console.error('Error fetching transcript:', error);
+    throw error;
+  }
+};